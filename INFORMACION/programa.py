@@ -14,22 +14,61 @@
 Características principales:
 • Navegación multinivel con menús y submenús
 • Breadcrumbs (migas de pan) para orientación
-• Sistema intuitivo de navegación: [0] Volver, [R] Recargar, [Q] Salir
+• Sistema intuitivo de navegación: [0] Volver, [<]/[>] Historial, [R] Recargar, [B] Buscar, [G] Ir a, [Q] Salir
 • Visualización profesional y clara de la información
 • Lectura dinámica de DOCUMENTACION.md
 • Secciones organizadas jerárquicamente
+• Menús declarados en menu_visor.json y armados sobre el árbol de encabezados
+• Modo --watch: actualiza la vista cuando DOCUMENTACION.md cambia en disco
+• Búsqueda de texto completo con ranking BM25 sobre todas las secciones
+• Paginador de secciones: páginas adelante y atrás, saltos a títulos, resultados o líneas
+• Con la salida redirigida (| less, | head) no hay pausas y las secciones se transmiten enteras
+• --section N / --key CLAVE: imprime una sola sección en crudo, sin abrir el visor
+• --serve: API JSON local con el árbol de secciones y cada sección, con ETag y gzip
+• --sessions: varios usuarios navegan por red sobre un único índice compartido
+• Mientras se elige una opción, las secciones del menú se preparan en segundo plano (--prefetch)
+• --profile: percentiles de latencia por fase (carga, parseo, menús, pantallas, recargas) al salir
+• --mem-report: memoria pico y estable, repartida entre documento, secciones, menús, índices y cachés
 
 Autor: Augusto Villegas
 Proyecto: IBM & Guayerd - Análisis de Datos Retail
 """
 
+import argparse
+import asyncio
+import gc
+import gzip
+import hashlib
+import heapq
+import json
+import math
+import mmap
 import os
+import pickle
+import queue
 import re
+import shutil
 import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
 import unicodedata
-from typing import Dict, List, Optional, Tuple
+import weakref
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+from urllib.parse import unquote, urlsplit
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Tuple, Union
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache, wraps
+from itertools import accumulate, chain, count, repeat
+from operator import add, truediv
 
 # Configurar codificación UTF-8 para Windows
 if sys.platform == 'win32':
@@ -39,9 +78,24 @@ if sys.platform == 'win32':
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RUTA_DOC = os.path.join(BASE_DIR, "DOCUMENTACION.md")
+RUTA_MENU = os.path.join(BASE_DIR, "menu_visor.json")
+DIR_CACHE = os.path.join(BASE_DIR, ".visor_cache")
+VERSION_CACHE = 5
+INTERVALO_VIGILANCIA = 1.0
 DEMO_MODE = False
 ASCII_MODE = True 
+MMAP_MODE = False
+PIPE_MODE = False
 ANCHO_MARCO = 78
+ANCHO_MINIMO_MARCO = 40
+PRESUPUESTO_CACHE_LINEAS = 64 << 20
+PRESUPUESTO_CACHE_BLOQUES = 32 << 20
+PRESUPUESTO_CACHE_RESPUESTAS = 32 << 20
+PRESUPUESTO_PRECARGA = 16 << 20
+PRESUPUESTO_CACHE_PANTALLAS = 1 << 20
+LIMITE_HISTORIAL = 100
+ANFITRION_SERVIDOR = "127.0.0.1"
+PUERTO_SERVIDOR = 8765
 
 
 class TipoOpcion(Enum):
@@ -53,748 +107,2927 @@ class TipoOpcion(Enum):
 
 @dataclass
 class OpcionMenu:
-    """Representa una opción del menú con metadatos completos."""
+    """
+    Representa una opción del menú con metadatos completos.
+
+    Los submenús se arman diferidos: mientras `pendiente` no sea None, sus
+    hijos todavía no se construyeron y `pendiente` guarda la ruta de la regla
+    de la especificación que los genera (ver `expandir_submenu`).
+    """
     clave: str
     etiqueta: str
     icono: str
     tipo: TipoOpcion
     descripcion: Optional[str] = None
     hijos: List['OpcionMenu'] = field(default_factory=list)
+    pendiente: Optional[Tuple[int, ...]] = None
+
+
+class NodoSeccion:
+    """
+    Encabezado del documento y el rango [inicio, fin) de su texto en el buffer.
+
+    `padre` e `hijos` forman el árbol de encabezados dentro de su bloque H2
+    (los H2 y las secciones especiales no tienen padre).
+    """
+    __slots__ = ("clave", "titulo", "nivel", "inicio", "fin", "padre", "hijos")
+
+    def __init__(self, clave: str, titulo: str, nivel: int, inicio: int, fin: int = -1):
+        self.clave = clave
+        self.titulo = titulo
+        self.nivel = nivel
+        self.inicio = inicio
+        self.fin = fin
+        self.padre: Optional[NodoSeccion] = None
+        self.hijos: List[NodoSeccion] = []
+
+
+class SeccionesDoc(Mapping):
+    """
+    Índice de secciones sobre un único buffer con el documento completo.
+
+    Se comporta como un diccionario clave → texto, pero cada sección guarda
+    solo su rango; el texto se recorta del buffer recién al pedirlo.
+    Además conserva los nodos agrupados por bloque H2 en orden de documento
+    (incluidos los de claves repetidas), base de la recarga incremental, y
+    un índice por numeración ("3.4.2" → nodo) para ubicar secciones sin
+    recorrer las claves.
+    """
+
+    def __init__(self, texto: str):
+        self.texto = texto
+        self._nodos: Dict[str, NodoSeccion] = {}
+        self._bloques: List[List[NodoSeccion]] = []
+        self._numeros: Dict[str, NodoSeccion] = {}
+        # Si se armó con _tokenizar_por_niveles (None: no se sabe, p. ej. desde la caché)
+        self._por_niveles: Optional[bool] = None
+        # Índice del que se derivó por recarga incremental y claves reprocesadas
+        self._diferencia: Optional[Tuple["weakref.ref[SeccionesDoc]", FrozenSet[str]]] = None
+
+    def __getitem__(self, clave: str) -> str:
+        nodo = self._nodos[clave]
+        return self.fragmento(nodo.inicio, nodo.fin)
+
+    def fragmento(self, inicio: int, fin: int) -> str:
+        """Texto del buffer entre dos offsets del índice."""
+        return self.texto[inicio:fin]
+
+    def __contains__(self, clave: object) -> bool:
+        return clave in self._nodos
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._nodos)
+
+    def __len__(self) -> int:
+        return len(self._nodos)
+
+    def nodo(self, clave: str) -> Optional[NodoSeccion]:
+        return self._nodos.get(clave)
+
+    def titulo(self, clave: str) -> Optional[str]:
+        """Título del encabezado de la sección (None para DOC_COMPLETA/INTRO)."""
+        nodo = self._nodos.get(clave)
+        return nodo.titulo if nodo and nodo.nivel else None
+
+    def raices(self) -> List[NodoSeccion]:
+        """Encabezados H2 en orden de documento: la raíz de cada bloque."""
+        return [bloque[0] for bloque in self._bloques]
+
+    def por_numero(self, numero: str) -> Optional[NodoSeccion]:
+        """Encabezado cuyo título empieza con esa numeración, p. ej. "3.4.2"."""
+        return self._numeros.get(numero)
+
+    def descendientes(self, nodo: NodoSeccion) -> Iterator[NodoSeccion]:
+        """Subsecciones de `nodo` en orden de documento (recorrido en preorden)."""
+        pendientes = list(reversed(nodo.hijos))
+        while pendientes:
+            actual = pendientes.pop()
+            yield actual
+            pendientes.extend(reversed(actual.hijos))
+
+    def claves_cambiadas(self, desde: Optional["SeccionesDoc"]) -> Optional[FrozenSet[str]]:
+        """
+        Claves cuyo texto, título o ubicación pudo cambiar respecto de `desde`,
+        si este índice salió de él por una recarga incremental; None si no se
+        sabe y hay que compararlas todas.
+        """
+        if desde is None or self._diferencia is None:
+            return None
+        origen, claves = self._diferencia
+        return claves if origen() is desde else None
+
+    def rangos(self) -> List[Tuple[str, str, int, int, int]]:
+        """Exporta el índice como tuplas (clave, titulo, nivel, inicio, fin) en orden de documento."""
+        especiales = [self._nodos[c] for c in ("DOC_COMPLETA", "INTRO") if c in self._nodos]
+        return [(n.clave, n.titulo, n.nivel, n.inicio, n.fin)
+                for n in especiales + [n for bloque in self._bloques for n in bloque]]
+
+    @classmethod
+    def desde_rangos(cls, texto: str, rangos: List[Tuple[str, str, int, int, int]]) -> "SeccionesDoc":
+        """Reconstruye el índice exportado con `rangos()` sobre el mismo texto."""
+        especiales: List[NodoSeccion] = []
+        bloques: List[List[NodoSeccion]] = []
+        for clave, titulo, nivel, inicio, fin in rangos:
+            if not 0 <= inicio <= fin <= len(texto):
+                raise ValueError(f"Rango fuera del documento: {clave}")
+            nodo = NodoSeccion(clave, titulo, nivel, inicio, fin)
+            if nivel == 0:
+                especiales.append(nodo)
+            elif nivel == 2:
+                bloques.append([nodo])
+            else:
+                bloques[-1].append(nodo)
+        return _ensamblar_secciones(texto, especiales, [_enlazar_bloque(b) for b in bloques])
+
+
+class ArchivoMapeado(mmap.mmap):
+    """
+    Archivo mapeado en memoria de solo lectura que recuerda su ruta y la
+    firma (tamaño, mtime_ns) que tenía el archivo al mapearlo.
+    """
+
+    def __new__(cls, ruta: str):
+        with open(ruta, "rb") as f:
+            st = os.fstat(f.fileno())
+            mapeado = super().__new__(cls, f.fileno(), 0, access=mmap.ACCESS_READ)
+        mapeado.ruta = ruta
+        mapeado.firma = (st.st_size, st.st_mtime_ns)
+        return mapeado
+
+    def vigente(self) -> bool:
+        """Si el archivo en disco sigue siendo el que se mapeó."""
+        return _firma_stat(self.ruta) == self.firma
+
+
+class SeccionesMmap(SeccionesDoc):
+    """
+    Variante de SeccionesDoc sobre el archivo mapeado en memoria (modo --mmap).
+
+    Los rangos son offsets en bytes y solo se decodifica a UTF-8 la sección
+    que se pide, así que abrir documentos enormes no copia su contenido.
+
+    Si el archivo se reescribe en el lugar (abrirlo con "w" lo trunca), leer
+    el mapeo viejo más allá del nuevo tamaño termina el proceso con SIGBUS.
+    Por eso, antes de cada lectura se compara la firma del archivo con la del
+    mapeo y, si cambió, se vuelve a mapear y a indexar; mientras el archivo
+    no se pueda mapear (por ejemplo, vacío a mitad de una reescritura) las
+    secciones se leen vacías.
+    """
+
+    _cerrojo_remapeo = threading.Lock()
+
+    def __getitem__(self, clave: str) -> str:
+        if not self._vigente():
+            return ""
+        return super().__getitem__(clave)
+
+    def fragmento(self, inicio: int, fin: int) -> str:
+        if not self._vigente():
+            return ""
+        crudo = self.texto[inicio:fin].decode("utf-8", errors="replace")
+        return crudo.replace("\r\n", "\n")
+
+    def _vigente(self) -> bool:
+        """Remapea e indexa de nuevo si el archivo cambió en disco; False si no se pudo."""
+        texto = self.texto
+        if not isinstance(texto, ArchivoMapeado) or texto.vigente():
+            return True
+        with self._cerrojo_remapeo:
+            if self.texto is not texto:
+                return True  # otro hilo ya lo remapeó
+            try:
+                nuevo = ArchivoMapeado(texto.ruta)
+            except (OSError, ValueError):
+                return False
+            indice = parsear_secciones(nuevo)
+            self._nodos, self._bloques, self._numeros = indice._nodos, indice._bloques, indice._numeros
+            self._diferencia = None
+            self.texto = nuevo
+            return True
+
+
+TextoDoc = Union[str, mmap.mmap]
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# FUNCIONES DE UTILIDAD Y CARGA DE DATOS
+# COMPOSICIÓN DE PANTALLA
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def pausar():
-    if DEMO_MODE:
-        return
+# Filas que se dejan libres debajo de cada cuadro para el prompt y la respuesta
+FILAS_PROMPT = 3
+# Caracteres acumulados a partir de los cuales se escribe sin esperar al prompt
+LIMITE_BUFFER = 1 << 16
+
+
+def _es_terminal() -> bool:
     try:
-        input("\n💡 Presioná [ENTER] para continuar...")
-    except EOFError:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _escribir_salida(texto: str):
+    """Escribe el texto con una sola escritura sobre el stream binario de stdout."""
+    salida = sys.stdout
+    binario = getattr(salida, "buffer", None)
+    if binario is None:
+        salida.write(texto)
+        salida.flush()
         return
+    salida.flush()
+    binario.write(texto.encode(salida.encoding or "utf-8", "replace"))
+    binario.flush()
 
-def cargar_documentacion(ruta: str) -> str:
-    if not os.path.exists(ruta):
-        print("\n" + "╔" + "═" * ANCHO_MARCO + "╗")
-        print(linea_marco(" ERROR - ARCHIVO NO ENCONTRADO ", ANCHO_MARCO, "║", "║"))
-        print("╚" + "═" * ANCHO_MARCO + "╝")
-        print(f"\n📁 Ruta esperada: {os.path.abspath(ruta)}")
-        print("⚠️  Asegurate de que DOCUMENTACION.md esté en la misma carpeta que programa.py\n")
-        return ""
-    try:
-        with open(ruta, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception as e:
-        print(f"\n❌ Error al leer el archivo: {e}\n")
-        return ""
 
-def limpiar_pantalla():
-    os.system('cls' if os.name == 'nt' else 'clear')
+def _filas_ocupadas(lineas: List[str], columnas: int) -> int:
+    """Filas de terminal que ocupan las líneas, contando las que se parten por ancho."""
+    return sum(max(1, -(-ancho // columnas)) for ancho in anchos_visuales(lineas))
 
 
-def ancho_visual(texto: str) -> int:
-    ancho = 0
-    for char in texto:
-        code_point = ord(char)
-        if (0x1F300 <= code_point <= 0x1F9FF or
-            0x2600 <= code_point <= 0x27BF or
-            0x2B50 <= code_point <= 0x2B55):
-            ancho += 2
-        else:
-            ancho += 1
-    return ancho
+class CompositorPantalla:
+    """
+    Arma cada pantalla en memoria y la escribe de una sola vez.
 
+    `nuevo_cuadro` reemplaza al `clear` externo: marca que lo próximo que se
+    escriba es una pantalla nueva. Al volcarla en una terminal, si el cuadro
+    anterior sigue visible y el nuevo entra en la ventana sin desplazarla,
+    solo se reescriben las filas que cambiaron, ubicando el cursor con
+    secuencias ANSI; si no, se borra la pantalla y se escribe completa.
+    Fuera de una terminal el texto sale tal cual, sin secuencias de control.
 
-def linea_marco(texto: str, ancho: int, borde_izq: str = "║", borde_der: str = "║") -> str:
-    ancho_texto = ancho_visual(texto)
-    espacios_totales = ancho - ancho_texto
-    espacios_izq = espacios_totales // 2
-    espacios_der = espacios_totales - espacios_izq
-    return f"{borde_izq}{' ' * espacios_izq}{texto}{' ' * espacios_der}{borde_der}"
+    La salida, la entrada y las medidas de la terminal pasan por
+    `_emitir`, `_pedir` y `medidas`, que las sesiones remotas redefinen.
+    """
 
+    def __init__(self):
+        self._partes: List[str] = []
+        self._tamano = 0
+        self._cuadro_nuevo = False
+        # Líneas completas del último cuadro que siguen en pantalla, fila por
+        # fila; None si no se sabe qué muestra la terminal.
+        self._visibles: Optional[List[str]] = None
+        # Fila del cursor contada desde el borde superior
+        self._fila = 0
+        self._columnas = 0
+        if os.name == 'nt':
+            os.system('')  # habilita las secuencias ANSI en la consola de Windows
 
-def parsear_secciones(md: str) -> Dict[str, str]:
-    secciones: Dict[str, str] = {}
-    md = md.strip()
+    def nuevo_cuadro(self):
+        self.volcar()
+        self._cuadro_nuevo = True
 
-    if not md:
-        return secciones
+    def escribir(self, texto: str):
+        self._partes.append(texto)
+        self._tamano += len(texto)
+        if self._tamano >= LIMITE_BUFFER:
+            self.volcar()
 
-    secciones["DOC_COMPLETA"] = md
+    def volcar(self):
+        """Escribe lo acumulado desde el último volcado."""
+        if not self._partes and not self._cuadro_nuevo:
+            return
+        texto = "".join(self._partes)
+        self._partes = []
+        self._tamano = 0
+        if not self.es_terminal():
+            self._cuadro_nuevo = False
+            self._visibles = None
+        elif self._cuadro_nuevo:
+            self._cuadro_nuevo = False
+            texto = self._componer(texto)
+        else:
+            self._avanzar(texto)
+        self._emitir(texto)
 
-    patron_h2 = re.compile(r"^##\s+(.+?)$", re.MULTILINE)
-    patron_h3 = re.compile(r"^###\s+(.+?)$", re.MULTILINE)
-    patron_h4 = re.compile(r"^####\s+(.+?)$", re.MULTILINE)
-    
-    matches_h2 = list(patron_h2.finditer(md))
-
-    if matches_h2:
-        intro = md[:matches_h2[0].start()].strip()
-        if intro:
-            secciones["INTRO"] = intro
-
-    for i, match in enumerate(matches_h2):
-        titulo = match.group(1).strip()
-        inicio = match.start()
-        fin = matches_h2[i + 1].start() if i + 1 < len(matches_h2) else len(md)
-        contenido_completo = md[inicio:fin].strip()
-        
-        clave = normalizar_clave(titulo)
-        secciones[clave] = contenido_completo
-        
-        subseccion_matches = list(patron_h3.finditer(contenido_completo))
-        for j, sub_match in enumerate(subseccion_matches):
-            sub_titulo = sub_match.group(1).strip()
-            sub_inicio = sub_match.start()
-            sub_fin = subseccion_matches[j + 1].start() if j + 1 < len(subseccion_matches) else len(contenido_completo)
-            sub_contenido = contenido_completo[sub_inicio:sub_fin].strip()
-            
-            sub_clave = f"{clave}_{normalizar_clave(sub_titulo)}"
-            secciones[sub_clave] = sub_contenido
-            
-            h4_matches = list(patron_h4.finditer(sub_contenido))
-            for k, h4_match in enumerate(h4_matches):
-                h4_titulo = h4_match.group(1).strip()
-                h4_inicio = h4_match.start()
-                h4_fin = h4_matches[k + 1].start() if k + 1 < len(h4_matches) else len(sub_contenido)
-                h4_contenido = sub_contenido[h4_inicio:h4_fin].strip()
-                
-                h4_clave = f"{sub_clave}_{normalizar_clave(h4_titulo)}"
-                secciones[h4_clave] = h4_contenido
+    def leer(self, mensaje: str = "") -> str:
+        """Vuelca lo pendiente y lee una línea del usuario."""
+        self.volcar()
+        try:
+            return self._pedir(mensaje)
+        finally:
+            self.tras_entrada(mensaje)
 
-    return secciones
+    def es_terminal(self) -> bool:
+        return _es_terminal()
 
+    def medidas(self) -> os.terminal_size:
+        return shutil.get_terminal_size()
 
-def normalizar_clave(titulo: str) -> str:
-    titulo = re.sub(r'[^\w\s\-]', '', titulo)
-    titulo = re.sub(r'\s+', '_', titulo.strip())
-    return titulo.upper()
+    def _emitir(self, texto: str):
+        _escribir_salida(texto)
 
+    def _pedir(self, mensaje: str) -> str:
+        return input(mensaje)
 
-def _es_emoji(ch: str) -> bool:
-    cp = ord(ch)
-    return 0x1F300 <= cp <= 0x1FAFF or 0x1F600 <= cp <= 0x1F64F
+    def cuadro_en_curso(self) -> Optional[str]:
+        """Texto del cuadro nuevo aún sin volcar, o None si no hay uno o ya salió una parte."""
+        return "".join(self._partes) if self._cuadro_nuevo else None
 
+    def lineas_pendientes(self) -> int:
+        """Líneas completas acumuladas desde el último volcado."""
+        return sum(parte.count("\n") for parte in self._partes)
 
-def ancho_visual(texto: str) -> int:
-    """Calcula el ancho en consola considerando caracteres de doble ancho."""
-    ancho = 0
-    for ch in texto:
-        if unicodedata.combining(ch):
-            continue
-        if unicodedata.east_asian_width(ch) in ("F", "W") or _es_emoji(ch):
-            ancho += 2
+    def tras_entrada(self, mensaje: str):
+        """Registra las filas que ocuparon el prompt y la respuesta del usuario."""
+        self._avanzar(mensaje + "\n")
+
+    def _avanzar(self, texto: str):
+        if self._visibles is None:
+            return
+        columnas, filas = self.medidas()
+        self._fila += _filas_ocupadas(texto.split("\n"), columnas) - 1
+        if self._fila >= filas:
+            # La terminal se desplazó: las filas registradas ya no coinciden
+            self._visibles = None
+
+    def _componer(self, texto: str) -> str:
+        columnas, filas = self.medidas()
+        *completas, ultima = texto.split("\n")
+        anchos = anchos_visuales(completas + [ultima])
+        if len(anchos) + FILAS_PROMPT > filas or max(anchos) > columnas:
+            # No entra en la ventana o hay líneas partidas: repintado completo
+            self._visibles = None
+            return "\x1b[H\x1b[2J\x1b[3J" + texto
+
+        previas = self._visibles if columnas == self._columnas else None
+        self._columnas = columnas
+        if previas is None:
+            salida = "\x1b[H\x1b[2J\x1b[3J" + texto
         else:
-            ancho += 1
-    return ancho
+            partes = [f"\x1b[{i}H\x1b[2K{linea}"
+                      for i, linea in enumerate(completas, 1)
+                      if i > len(previas) or previas[i - 1] != linea]
+            partes.append(f"\x1b[{len(completas) + 1}H\x1b[J{ultima}")
+            salida = "".join(partes)
+        self._visibles = completas
+        self._fila = len(completas)
+        return salida
 
 
-def recortar_visual(texto: str, ancho: int) -> str:
-    """Recorta texto para que no exceda el ancho visual especificado."""
-    resultado = []
-    acumulado = 0
-    for ch in texto:
-        w = ancho_visual(ch)
-        if acumulado + w > ancho:
-            break
-        resultado.append(ch)
-        acumulado += w
-    return "".join(resultado)
+_PANTALLA = CompositorPantalla()
+# Pantalla de la sesión remota que corre en este hilo (None: la terminal local)
+_PANTALLA_SESION: ContextVar[Optional[CompositorPantalla]] = ContextVar("pantalla_sesion", default=None)
 
 
-def rellenar_visual(texto: str, ancho: int, alineacion: str = "left") -> str:
-    """Rellena con espacios respetando ancho visual y truncando con elipsis."""
-    if ancho <= 0:
-        return ""
-    if ancho_visual(texto) > ancho:
-        texto = recortar_visual(texto, max(ancho - 1, 0)) + ("…" if ancho > 1 else "")
-    faltante = max(ancho - ancho_visual(texto), 0)
-    if alineacion == "right":
-        return " " * faltante + texto
-    if alineacion == "center":
-        izq = faltante // 2
-        der = faltante - izq
-        return " " * izq + texto + " " * der
-    return texto + " " * faltante
+def pantalla_actual() -> CompositorPantalla:
+    return _PANTALLA_SESION.get() or _PANTALLA
 
 
-def centrar_visual(texto: str, ancho: int) -> str:
-    """Centra texto según su ancho visual."""
-    return rellenar_visual(texto, ancho, alineacion="center")
+def escribir(*valores, sep: str = " ", end: str = "\n"):
+    """Como print, pero acumula el texto en el cuadro en curso."""
+    pantalla_actual().escribir(sep.join(map(str, valores)) + end)
 
 
-def envolver_texto_display(texto: str, ancho: int) -> List[str]:
-    """Envuelve texto respetando el ancho visual."""
-    lineas: List[str] = []
-    actual = ""
-    ancho_actual = 0
-    for palabra in texto.split():
-        palabra_ancho = ancho_visual(palabra)
-        sep = 1 if actual else 0
-        if ancho_actual + sep + palabra_ancho > ancho:
-            if actual:
-                lineas.append(actual)
-            actual = palabra
-            ancho_actual = palabra_ancho
-        else:
-            if actual:
-                actual += " "
-                ancho_actual += 1
-            actual += palabra
-            ancho_actual += palabra_ancho
-    if actual:
-        lineas.append(actual)
-    if not lineas:
-        lineas.append("")
-    return lineas
+def volcar_pantalla():
+    """Escribe en la terminal lo que quede acumulado."""
+    pantalla_actual().volcar()
 
 
-def dividir_por_ancho(texto: str, ancho: int) -> List[str]:
-    """Divide texto en segmentos consecutivos respetando el ancho visual."""
-    if ancho <= 0:
-        return [""]
-    lineas: List[str] = []
-    actual = ""
-    ancho_actual = 0
-    for ch in texto:
-        w = ancho_visual(ch)
-        if ancho_actual + w > ancho:
-            lineas.append(actual)
-            actual = ch
-            ancho_actual = w
-        else:
-            actual += ch
-            ancho_actual += w
-    if actual or not lineas:
-        lineas.append(actual)
-    return lineas
+def leer_entrada(mensaje: str = "") -> str:
+    """Vuelca la pantalla pendiente y lee una línea del usuario."""
+    pantalla = pantalla_actual()
+    if _PERFIL is None:
+        return pantalla.leer(mensaje)
+    # Escribir el cuadro es parte de la pantalla medida; esperar al usuario no
+    pantalla.volcar()
+    with _PERFIL.esperando():
+        return pantalla.leer(mensaje)
+
 
+def actualizar_ancho_marco() -> int:
+    """Ajusta ANCHO_MARCO al ancho actual de la terminal, descontando los dos bordes."""
+    global ANCHO_MARCO
+    ANCHO_MARCO = max(pantalla_actual().medidas().columns - 2, ANCHO_MINIMO_MARCO)
+    return ANCHO_MARCO
 
-def linea_marco(contenido: str, ancho: int = ANCHO_MARCO, borde_izq: str = "│", borde_der: str = "│") -> str:
-    """Retorna una línea enmarcada con los bordes indicados."""
-    return f"{borde_izq}{rellenar_visual(contenido, ancho)}{borde_der}"
+
+def limpiar_pantalla():
+    """Empieza un cuadro nuevo, con el marco al ancho que tenga la terminal en este momento."""
+    pantalla_actual().nuevo_cuadro()
+    actualizar_ancho_marco()
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# CONSTRUCCIÓN DE ESTRUCTURA DE MENÚS
+# PERFIL DE LATENCIAS (--profile)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def _strip_accents(text: str) -> str:
-    """Elimina acentos para comparaciones robustas en claves/títulos."""
-    text_nfd = unicodedata.normalize('NFD', text)
-    return ''.join(ch for ch in text_nfd if unicodedata.category(ch) != 'Mn')
+PERCENTILES_PERFIL = (50, 95, 99)
+# Límites superiores (ms) de las barras del histograma que se guarda en JSON
+LIMITES_HISTOGRAMA = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
 
 
-def _normalize_for_match(text: str) -> str:
-    """Normaliza texto para comparación: minúsculas, sin acentos, guiones bajos."""
-    t = _strip_accents(text).lower()
-    t = re.sub(r"[^a-z0-9]+", "_", t)
-    return t.strip('_')
+class Medicion(NamedTuple):
+    pared: float
+    cpu: float
 
 
-def _get_title_from_content(content: str) -> Optional[str]:
-    """Extrae el título de la primera línea de encabezado del bloque (##, ###, o ####)."""
-    for line in content.splitlines():
-        m = re.match(r"^\s*#{2,4}\s+(.*)$", line)
-        if m:
-            return m.group(1).strip()
-    return None
+def _percentil(ordenados: List[float], percentil: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada."""
+    return ordenados[max(math.ceil(percentil / 100 * len(ordenados)) - 1, 0)]
 
 
-def _find_first_key_by_tokens(secciones: Dict[str, str], tokens: List[str]) -> Optional[str]:
-    """Busca la primera clave cuyo nombre normalizado contenga todos los tokens."""
-    toks = [_normalize_for_match(tok) for tok in tokens]
-    for k in secciones.keys():
-        kn = _normalize_for_match(k)
-        if all(tok in kn for tok in toks):
-            return k
-    return None
+class RegistroLatencias:
+    """
+    Tiempos de pared y de CPU (del hilo que mide) de cada vez que corre una
+    fase del visor. Las esperas de entrada del usuario dentro de una fase
+    (pausas, comandos del paginador) se descuentan del tiempo de pared, así
+    una pantalla mide lo que tarda en componerse y escribirse, no lo que el
+    usuario tarda en leerla.
+    """
 
+    def __init__(self):
+        self._fases: Dict[str, List[Medicion]] = {}
+        self._cerrojo = threading.Lock()
+        # Por hilo: esperas acumuladas de cada fase abierta, de afuera hacia adentro
+        self._abiertas = threading.local()
 
-def construir_estructura_menus(secciones: Dict[str, str]) -> OpcionMenu:
-    """Construye dinámicamente el árbol de menús según las secciones detectadas."""
-    menu_raiz = OpcionMenu(
-        clave="RAIZ", etiqueta="Proyecto Aurelion - Documentación Técnica", icono="🏪", tipo=TipoOpcion.SUBMENU
-    )
-
-    # Opción: Ver documentación completa
-    if "DOC_COMPLETA" in secciones:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave="DOC_COMPLETA", etiqueta="Ver Documentación Completa", icono="📄", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Visualiza todo el documento en una sola vista"
-        ))
-
-    # Introducción / portada e índice
-    if "INTRO" in secciones:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave="INTRO", etiqueta="Introducción y Tabla de Contenidos", icono="🏠", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Portada, índice y organización del proyecto"
-        ))
-
-    # TL;DR (buscar clave que contenga TLDR)
-    k_tldr = _find_first_key_by_tokens(secciones, ["TLDR"]) 
-    if k_tldr:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave=k_tldr, etiqueta="Resumen Ejecutivo (TL;DR)", icono="📋", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Cambios clave y resultados principales en formato resumido"
-        ))
-
-    # Cómo ejecutar el visor
-    k_ejecutar = _find_first_key_by_tokens(secciones, ["como", "ejecutar"])
-    if k_ejecutar:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave=k_ejecutar, etiqueta="Cómo Ejecutar el Visor", icono="🚀", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Instrucciones de instalación y ejecución del programa"
-        ))
-
-    # Visión general (buscar por tokens)
-    k_vision = _find_first_key_by_tokens(secciones, ["vision", "general"])
-    if k_vision:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave=k_vision, etiqueta="Visión General del Proyecto", icono="🎯", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Objetivos estratégicos y estructura del proyecto"
-        ))
-
-    # Construir Sprint 1 usando función especializada
-    sprint1 = construir_submenu_sprint1(secciones)
-    if sprint1:
-        menu_raiz.hijos.append(sprint1)
-    
-    # Construir Sprint 2 usando función especializada con etapas
-    sprint2 = construir_submenu_sprint2(secciones)
-    if sprint2:
-        menu_raiz.hijos.append(sprint2)
-
-    # Construir Sprint 3 (Machine Learning y Modelado Predictivo)
-    sprint3 = construir_submenu_sprint3(secciones)
-    if sprint3:
-        menu_raiz.hijos.append(sprint3)
-
-    # Referencias y Glosario
-    k_refs = _find_first_key_by_tokens(secciones, ["referencia", "bibliografia"])
-    if k_refs:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave=k_refs, etiqueta="Referencias y Bibliografía", icono="📚", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Fuentes, bibliografía y recursos utilizados"
-        ))
-    
-    k_glos = _find_first_key_by_tokens(secciones, ["glosario"])
-    if k_glos:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave=k_glos, etiqueta="Glosario de Términos", icono="📖", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Definiciones de términos técnicos y de negocio"
-        ))
-    
-    # Mapa de artefactos
-    k_mapa = _find_first_key_by_tokens(secciones, ["mapa", "artefactos"])
-    if k_mapa:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave=k_mapa, etiqueta="Mapa de Artefactos", icono="🗂️", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Inventario completo de archivos y modelos generados"
-        ))
-    
-    # Outputs de artefactos
-    k_outputs = _find_first_key_by_tokens(secciones, ["outputs", "artefactos"])
-    if k_outputs:
-        menu_raiz.hijos.append(OpcionMenu(
-            clave=k_outputs, etiqueta="Outputs de Artefactos (Muestras)", icono="📊", tipo=TipoOpcion.CONTENIDO,
-            descripcion="Ejemplos de salidas y resultados de los modelos"
-        ))
-
-    # Opción 13: Diagrama de flujo del menú
-    menu_raiz.hijos.append(OpcionMenu(
-        clave="DIAGRAMA_FLUJO_MENU", etiqueta="Diagrama de Flujo del Menú", icono="🔀", tipo=TipoOpcion.CONTENIDO,
-        descripcion="Visualiza el diagrama de flujo de navegación del menú"
-    ))
+    def _pila(self) -> List[float]:
+        if not hasattr(self._abiertas, "esperas"):
+            self._abiertas.esperas = []
+        return self._abiertas.esperas
 
-    if ASCII_MODE:
-        aplicar_ascii_iconos(menu_raiz)
-    return menu_raiz
+    @contextmanager
+    def medir(self, fase: str):
+        esperas = self._pila()
+        esperas.append(0.0)
+        pared, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            medicion = Medicion(time.perf_counter() - pared - esperas.pop(), time.thread_time() - cpu)
+            with self._cerrojo:
+                self._fases.setdefault(fase, []).append(medicion)
 
-def aplicar_ascii_iconos(menu: OpcionMenu):
-    """Reemplaza iconos por ASCII simple si la consola no soporta Unicode."""
-    stack = [menu]
-    while stack:
-        nodo = stack.pop()
-        nodo.icono = "*"
-        stack.extend(nodo.hijos)
+    @contextmanager
+    def esperando(self):
+        """Descuenta el bloque de todas las fases abiertas en este hilo."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            esperas = self._pila()
+            demora = time.perf_counter() - inicio
+            for i in range(len(esperas)):
+                esperas[i] += demora
 
+    def resumen(self) -> Dict[str, dict]:
+        """Percentiles, máximo, total e histograma de cada fase, en milisegundos."""
+        with self._cerrojo:
+            fases = {fase: list(mediciones) for fase, mediciones in self._fases.items()}
+        resumen = {}
+        for fase, mediciones in fases.items():
+            ficha = {"n": len(mediciones)}
+            for nombre, valores in (("pared_ms", [m.pared for m in mediciones]),
+                                    ("cpu_ms", [m.cpu for m in mediciones])):
+                ordenados = sorted(v * 1000 for v in valores)
+                ficha[nombre] = {f"p{p}": round(_percentil(ordenados, p), 4) for p in PERCENTILES_PERFIL}
+                ficha[nombre].update(max=round(ordenados[-1], 4), total=round(sum(ordenados), 4))
+            barras = Counter(bisect_left(LIMITES_HISTOGRAMA, m.pared * 1000) for m in mediciones)
+            ficha["histograma_ms"] = [[limite, barras.get(i, 0)]
+                                      for i, limite in enumerate(LIMITES_HISTOGRAMA + (None,))]
+            resumen[fase] = ficha
+        return resumen
 
-def construir_submenu_sprint3(secciones: Dict[str, str]) -> Optional[OpcionMenu]:
-    """Construye el submenú completo del Sprint 3 con todas las nuevas secciones y subapartados."""
-    # Buscar clave base de Sprint 3
-    clave_base = None
-    for k in secciones:
-        kn = _normalize_for_match(k)
-        partes = k.split('_')
-        if re.match(r"^4_.*sprint.*3", kn):
-            clave_base = k
-            break
-    if not clave_base:
-        return None
+    def informe(self) -> List[str]:
+        """Tabla de percentiles por fase, en el orden en que cada fase corrió por primera vez."""
+        columnas = [f"p{p}" for p in PERCENTILES_PERFIL]
+        lineas = [f"{'Fase':<28}{'N':>6}" + "".join(f"{c:>10}" for c in columnas)
+                  + f"{'Máx':>10}{'CPU p50':>10}{'CPU p99':>10}"]
+        for fase, ficha in self.resumen().items():
+            pared, cpu = ficha["pared_ms"], ficha["cpu_ms"]
+            lineas.append(f"{fase:<28}{ficha['n']:>6}" + "".join(f"{pared[c]:>10.3f}" for c in columnas)
+                          + f"{pared['max']:>10.3f}{cpu['p50']:>10.3f}{cpu['p99']:>10.3f}")
+        return lineas
 
-    sprint3 = OpcionMenu(
-        clave=clave_base,
-        etiqueta="Sprint 3 (Demo 3 – Machine Learning y Modelado Predictivo)",
-        icono="3️⃣",
-        tipo=TipoOpcion.SUBMENU,
-        descripcion="Modelado predictivo, métricas, artefactos y mejores prácticas"
-    )
-
-    # Ver Sprint 3 completo
-    sprint3.hijos.append(OpcionMenu(
-        clave=clave_base,
-        etiqueta="Ver Sprint 3 Completo",
-        icono="📖",
-        tipo=TipoOpcion.CONTENIDO,
-        descripcion="Todo el contenido del Sprint 3 en una sola vista"
-    ))
-
-    # Buscar todas las subsecciones H3 de Sprint 3
-    subsecciones = []
-    for k in secciones:
-        if k.startswith(clave_base + "_"):  # H3 subsections
-            titulo = _get_title_from_content(secciones[k])
-            if titulo:
-                # Determinar icono
-                icono = "📄"
-                t = titulo.lower()
-                if "objetivo" in t:
-                    icono = "🎯"
-                elif "parámetro" in t or "artefacto" in t:
-                    icono = "🗃️"
-                elif "indicador" in t or "métrica" in t:
-                    icono = "📊"
-                elif "recomendación" in t or "consideración" in t:
-                    icono = "💡"
-                elif "próximo" in t:
-                    icono = "⏭️"
-                elif "trazabilidad" in t or "calidad" in t:
-                    icono = "🔎"
-                elif "hiperparámetro" in t or "validación" in t:
-                    icono = "⚙️"
-                elif "limitación" in t or "advertencia" in t:
-                    icono = "⚠️"
-                elif "ética" in t or "privacidad" in t:
-                    icono = "🔐"
-                elif "mantenimiento" in t or "actualización" in t:
-                    icono = "🔄"
-                elif "reproducibilidad" in t or "entorno" in t:
-                    icono = "🖥️"
-                elif "esquema" in t:
-                    icono = "🗺️"
-                elif "feature" in t:
-                    icono = "🧩"
-                elif "explicación" in t or "métrica" in t:
-                    icono = "📏"
-                elif "benchmark" in t or "alternativo" in t:
-                    icono = "🏁"
-                elif "impacto" in t or "caso de uso" in t:
-                    icono = "🚀"
-                elif "checklist" in t or "práctica" in t:
-                    icono = "✅"
-                subsecciones.append((k, titulo, icono))
-
-    # Ordenar por código numérico
-    def _num_key(label: str) -> Tuple:
-        m = re.match(r"^\s*(\d+(?:\.\d+)+)", label)
-        if not m:
-            return (999,)
-        return tuple(int(x) for x in m.group(1).split('.'))
-
-    subsecciones.sort(key=lambda x: _num_key(x[1]))
-
-    # Agregar subsecciones
-    for clave, etiqueta, icono in subsecciones:
-        sprint3.hijos.append(OpcionMenu(
-            clave=clave,
-            etiqueta=etiqueta,
-            icono=icono,
-            tipo=TipoOpcion.CONTENIDO,
-            descripcion=""
-        ))
-
-    return sprint3
-
-
-def construir_submenu_sprint1(secciones: Dict[str, str]) -> Optional[OpcionMenu]:
-    """Construye el submenú completo del Sprint 1 dinámicamente."""
-    # Buscar clave base de Sprint 1
-    clave_base = None
-    for k in secciones:
-        kn = _normalize_for_match(k)
-        partes = k.split('_')
-        if re.match(r"^2_.*sprint.*1", kn):
-            clave_base = k
-            break
-    
-    if not clave_base:
+    def guardar(self, ruta: str):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({"documento": RUTA_DOC, "unidad": "ms", "fases": self.resumen()},
+                      f, ensure_ascii=False, indent=2)
+
+
+_PERFIL: Optional[RegistroLatencias] = None
+
+
+@contextmanager
+def medir_fase(fase: str):
+    """Mide el bloque como una corrida de `fase` si --profile está activo."""
+    if _PERFIL is None:
+        yield
+        return
+    with _PERFIL.medir(fase):
+        yield
+
+
+def cronometrado(fase: str):
+    """Decorador: cada llamada cuenta como una corrida de `fase` en el perfil."""
+    def decorar(funcion):
+        @wraps(funcion)
+        def medida(*args, **kwargs):
+            if _PERFIL is None:
+                return funcion(*args, **kwargs)
+            with _PERFIL.medir(fase):
+                return funcion(*args, **kwargs)
+        return medida
+    return decorar
+
+
+def informar_perfil(registro: RegistroLatencias, ruta_json: str):
+    """Escribe la tabla por stderr (stdout puede ser un pipe) y, si se pidió, el JSON."""
+    print("\n⏱️  Perfil de latencias (ms; pared sin esperas de entrada, CPU del hilo)", file=sys.stderr)
+    print("\n".join(registro.informe()), file=sys.stderr)
+    if ruta_json:
+        try:
+            registro.guardar(ruta_json)
+            print(f"📝 Perfil guardado en {ruta_json}", file=sys.stderr)
+        except OSError as e:
+            print(f"❌ No se pudo guardar el perfil: {e}", file=sys.stderr)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# INFORME DE MEMORIA (--mem-report)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Objetos compartidos por todo el programa que no se cargan a ninguna estructura
+_TIPOS_SIN_MEMORIA = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                      types.MethodType, types.CodeType)
+
+
+def _memoria_alcanzable(raiz: object, vistos: set) -> int:
+    """
+    Bytes de los objetos alcanzables desde `raiz` que no estén en `vistos`
+    (que se actualiza): así cada objeto se carga a la primera estructura que
+    lo alcanza, aunque otras también lo referencien.
+    """
+    total = 0
+    pendientes = [raiz]
+    while pendientes:
+        objeto = pendientes.pop()
+        if id(objeto) in vistos or isinstance(objeto, _TIPOS_SIN_MEMORIA):
+            continue
+        vistos.add(id(objeto))
+        total += sys.getsizeof(objeto)
+        pendientes.extend(gc.get_referents(objeto))
+    return total
+
+
+class EtapaMemoria(NamedTuple):
+    nombre: str
+    actual: int
+    pico: int
+    # Bytes por estructura, en el orden en que se atribuyeron
+    estructuras: Dict[str, int]
+
+
+class InformeMemoria:
+    """
+    Sigue las asignaciones con tracemalloc desde el arranque. En cada etapa
+    (tras la carga, al salir) anota la memoria viva, el pico hasta ese
+    momento y cuánto retiene cada estructura del visor. Las estructuras se
+    recorren en orden y cada objeto cuenta una sola vez: el documento
+    primero, luego lo que las secciones agregan sobre él, y así.
+    """
+
+    def __init__(self):
+        self.etapas: List[EtapaMemoria] = []
+        tracemalloc.start()
+
+    def etapa(self, nombre: str, estructuras: Dict[str, object]):
+        vistos = {id(self)}
+        atribuido = {etiqueta: _memoria_alcanzable(objeto, vistos)
+                     for etiqueta, objeto in estructuras.items() if objeto is not None}
+        actual, pico = tracemalloc.get_traced_memory()
+        self.etapas.append(EtapaMemoria(nombre, actual, pico, atribuido))
+
+    def informe(self) -> List[str]:
+        etiquetas: List[str] = []
+        for etapa in reversed(self.etapas):
+            etiquetas.extend(e for e in etapa.estructuras if e not in etiquetas)
+        mb = lambda n: f"{n / 2**20:>12.2f}"
+        lineas = [f"{'MB':<30}" + "".join(f"{etapa.nombre:>12}" for etapa in self.etapas)]
+        for etiqueta in etiquetas:
+            lineas.append(f"{etiqueta:<30}" + "".join(
+                mb(etapa.estructuras[etiqueta]) if etiqueta in etapa.estructuras else f"{'-':>12}"
+                for etapa in self.etapas))
+        lineas.append(f"{'Resto (intérprete, temporales)':<30}" + "".join(
+            mb(max(etapa.actual - sum(etapa.estructuras.values()), 0)) for etapa in self.etapas))
+        lineas.append(f"{'Total vivo (tracemalloc)':<30}" + "".join(mb(etapa.actual) for etapa in self.etapas))
+        lineas.append(f"{'Pico hasta la etapa':<30}" + "".join(mb(etapa.pico) for etapa in self.etapas))
+        return lineas
+
+
+_MEMORIA: Optional[InformeMemoria] = None
+
+
+def anotar_memoria(nombre: str, secciones: SeccionesDoc, menu_raiz: OpcionMenu,
+                   navegador: Optional["NavegadorMenus"] = None):
+    """Registra una etapa del informe de memoria si --mem-report está activo."""
+    if _MEMORIA is None:
+        return
+    estructuras = {
+        "Documento (texto crudo)": secciones.texto,
+        "Secciones (índice)": secciones,
+        "Árbol de menús (OpcionMenu)": menu_raiz,
+    }
+    if navegador is not None:
+        estructuras["Índices de búsqueda"] = (navegador.buscador, navegador.titulos)
+        estructuras["Historial y pantallas"] = (navegador.historial, navegador.pantallas)
+    estructuras["Cachés de bloques y líneas"] = (_CACHE_BLOQUES, _CACHE_LINEAS)
+    _MEMORIA.etapa(nombre, estructuras)
+
+
+def informar_memoria(informe: InformeMemoria):
+    print("\n🧠 Memoria retenida por estructura (tracemalloc; pico = máximo desde el arranque)",
+          file=sys.stderr)
+    if not informe.etapas:
+        informe.etapa("salida", {})
+    print("\n".join(informe.informe()), file=sys.stderr)
+    tracemalloc.stop()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FUNCIONES DE UTILIDAD Y CARGA DE DATOS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def pausar():
+    if DEMO_MODE or PIPE_MODE:
+        return
+    try:
+        leer_entrada("\n💡 Presioná [ENTER] para continuar...")
+    except EOFError:
+        return
+
+def _avisar_archivo_faltante(ruta: str):
+    escribir("\n" + "╔" + "═" * ANCHO_MARCO + "╗")
+    escribir(linea_marco(" ERROR - ARCHIVO NO ENCONTRADO ", ANCHO_MARCO, "║", "║"))
+    escribir("╚" + "═" * ANCHO_MARCO + "╝")
+    escribir(f"\n📁 Ruta esperada: {os.path.abspath(ruta)}")
+    escribir("⚠️  Asegurate de que DOCUMENTACION.md esté en la misma carpeta que programa.py\n")
+
+@cronometrado("cargar_documentacion")
+def cargar_documentacion(ruta: str) -> str:
+    if not os.path.exists(ruta):
+        _avisar_archivo_faltante(ruta)
+        return ""
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return f.read()
+    except Exception as e:
+        escribir(f"\n❌ Error al leer el archivo: {e}\n")
+        return ""
+
+def _mapear_archivo(ruta: str) -> ArchivoMapeado:
+    return ArchivoMapeado(ruta)
+
+
+@cronometrado("cargar_documentacion")
+def cargar_documentacion_mmap(ruta: str) -> Optional[mmap.mmap]:
+    """Mapea el documento en memoria de solo lectura, sin leerlo ni decodificarlo."""
+    if not os.path.exists(ruta):
+        _avisar_archivo_faltante(ruta)
         return None
-    
-    sprint1 = OpcionMenu(
-        clave=clave_base,
-        etiqueta="Sprint 1 (Demo 1 – asincrónica)",
-        icono="1️⃣",
-        tipo=TipoOpcion.SUBMENU,
-        descripcion="Definición del problema, datasets y estructura de tablas"
-    )
-    
-    # Ver Sprint 1 completo
-    sprint1.hijos.append(OpcionMenu(
-        clave=clave_base,
-        etiqueta="Ver Sprint 1 Completo",
-        icono="📖",
-        tipo=TipoOpcion.CONTENIDO,
-        descripcion="Todo el contenido del Sprint 1 en una sola vista"
-    ))
-    
-    # Buscar todas las subsecciones H3 de Sprint 1
-    subsecciones = []
-    for k in secciones:
-        if k.startswith(clave_base + "_"):  # H3 subsections
-            titulo = _get_title_from_content(secciones[k])
-            if titulo:
-                # Determinar icono
-                icono = "📄"
-                if "problema" in titulo.lower() or "solución" in titulo.lower():
-                    icono = "🎯"
-                elif "dataset" in titulo.lower():
-                    icono = "📊"
-                elif "estructura" in titulo.lower() or "tabla" in titulo.lower():
-                    icono = "🗂️"
-                elif "escala" in titulo.lower() or "medición" in titulo.lower():
-                    icono = "📏"
-                elif "ia" in titulo.lower() or "sugerencia" in titulo.lower():
-                    icono = "🤖"
-                
-                subsecciones.append((k, titulo, icono))
-    
-    # Ordenar por código numérico
-    def _num_key(label: str) -> Tuple:
-        m = re.match(r"^\s*(\d+(?:\.\d+)+)", label)
-        if not m:
-            return (999,)
-        return tuple(int(x) for x in m.group(1).split('.'))
-    
-    subsecciones.sort(key=lambda x: _num_key(x[1]))
-    
-    # Agregar subsecciones
-    for clave, etiqueta, icono in subsecciones:
-        sprint1.hijos.append(OpcionMenu(
-            clave=clave,
-            etiqueta=etiqueta,
-            icono=icono,
-            tipo=TipoOpcion.CONTENIDO,
-            descripcion=""
-        ))
-    
-    return sprint1
-
-
-def construir_submenu_sprint2(secciones: Dict[str, str]) -> Optional[OpcionMenu]:
-    """Construye el submenú completo del Sprint 2 con subsecciones agrupadas."""
-    # Buscar clave base de Sprint 2 (debe tener exactamente 6 partes)
-    clave_base = None
-    for k in secciones:
-        kn = _normalize_for_match(k)
-        partes = k.split('_')
-        if re.match(r"^3_.*sprint.*2", kn) and len(partes) == 6:
-            clave_base = k
-            break
-    
-    if not clave_base:
+    try:
+        return _mapear_archivo(ruta)
+    except (OSError, ValueError) as e:
+        # ValueError: archivo vacío, que no se puede mapear
+        escribir(f"\n❌ Error al mapear el archivo: {e}\n")
         return None
-    
-    sprint2 = OpcionMenu(
-        clave=clave_base,
-        etiqueta="Sprint 2 (Demo 2 – sincrónica)",
-        icono="2️⃣",
-        tipo=TipoOpcion.SUBMENU,
-        descripcion="ETL, análisis descriptivo y consolidación de datos"
-    )
-    
-    # Ver Sprint 2 completo
-    sprint2.hijos.append(OpcionMenu(
-        clave=clave_base,
-        etiqueta="Ver Sprint 2 Completo",
-        icono="📖",
-        tipo=TipoOpcion.CONTENIDO,
-        descripcion="Todo el contenido del Sprint 2 en una sola vista"
-    ))
-    
-    # Submenú: Etapa 1 - Limpieza
-    etapa1 = construir_submenu_etapa(secciones, clave_base, "1", "Limpieza y Normalización", "🧹",
-                                      "Estandarización de datos, eliminación de duplicados e integridad referencial")
-    if etapa1:
-        sprint2.hijos.append(etapa1)
-    
-    # Submenú: Etapa 2 - Análisis Descriptivo
-    etapa2 = construir_submenu_etapa(secciones, clave_base, "2", "Análisis Descriptivo", "📊",
-                                      "Estadísticas, distribuciones, correlaciones y visualizaciones")
-    if etapa2:
-        sprint2.hijos.append(etapa2)
-    
-    # Submenú: Etapa 3 - Procesamiento
-    etapa3 = construir_submenu_etapa(secciones, clave_base, "3", "Procesamiento de Productos y Ventas", "🛒",
-                                      "Análisis detallado de productos y patrones de ventas")
-    if etapa3:
-        sprint2.hijos.append(etapa3)
-    
-    # Submenú: Etapa 4 - Consolidación
-    etapa4 = construir_submenu_etapa(secciones, clave_base, "4", "Consolidación e Integración", "🔗",
-                                      "Integración de tablas y generación de bases finales")
-    if etapa4:
-        sprint2.hijos.append(etapa4)
-    
-    # Agregar secciones H3 que NO son etapas (3.1, 3.2, 3.3)
-    otras_secciones = []
-    for k in secciones:
-        if k.startswith(clave_base + "_") and k.count("_") == 9:  # H3 subsections
-            titulo = _get_title_from_content(secciones[k])
-            if titulo:
-                # Verificar si es 3.1, 3.2 o 3.3 (no etapas)
-                m = re.match(r"^\s*3\.([1-3])\s", titulo)
-                if m:
-                    icono = "📄"
-                    if "contexto" in titulo.lower():
-                        icono = "🎯"
-                    elif "problema" in titulo.lower():
-                        icono = "🔍"
-                    elif "dataset" in titulo.lower():
-                        icono = "📊"
-                    otras_secciones.append((k, titulo, icono))
-    
-    # Ordenar por código numérico
-    def _num_key(label: str) -> Tuple:
-        m = re.match(r"^\s*(\d+(?:\.\d+)+)", label)
-        if not m:
-            return (999,)
-        return tuple(int(x) for x in m.group(1).split('.'))
-    
-    otras_secciones.sort(key=lambda x: _num_key(x[1]))
-    
-    # Agregar al final del menú
-    for clave, etiqueta, icono in otras_secciones:
-        sprint2.hijos.append(OpcionMenu(
-            clave=clave,
-            etiqueta=etiqueta,
-            icono=icono,
-            tipo=TipoOpcion.CONTENIDO,
-            descripcion=""
-        ))
-    
-    return sprint2
 
 
-def construir_submenu_etapa(secciones: Dict[str, str], clave_sprint: str, 
-                            num_etapa: str, nombre_etapa: str, icono: str, 
-                            descripcion: str) -> Optional[OpcionMenu]:
-    
-    etapa_seccion_map = {
-        "1": "34",
-        "2": "35",
-        "3": "36",
-        "4": "37"
-    }
-    
-    if num_etapa not in etapa_seccion_map:
-        return None
-    
-    num_seccion = etapa_seccion_map[num_etapa]
-    
-    clave_etapa = None
-    for k in secciones:
-        if (f"_{num_seccion}_ETAPA_{num_etapa}_" in k and 
-            k.count("_") == 13):
-            clave_etapa = k
-            break
-    
-    if not clave_etapa:
-        return None
-    
-    etapa = OpcionMenu(
-        clave=clave_etapa,
-        etiqueta=f"Etapa {num_etapa}: {nombre_etapa}",
-        icono=icono,
-        tipo=TipoOpcion.SUBMENU,
-        descripcion=descripcion
-    )
-    
-    # Ver etapa completa
-    etapa.hijos.append(OpcionMenu(
-        clave=clave_etapa,
-        etiqueta=f"Ver Etapa {num_etapa} Completa",
-        icono="📖",
-        tipo=TipoOpcion.CONTENIDO,
-        descripcion=f"Todo el contenido de la Etapa {num_etapa}"
-    ))
-    
-    # Buscar dinámicamente todas las subsecciones H4 de esta etapa
-    # Las H4 empiezan con la clave de etapa + "_" y tienen 15+ guiones bajos
-    subsecciones_h4 = []
-    for k in secciones:
-        if (k.startswith(clave_etapa + "_") and 
-            k.count("_") >= 15):  # H4 tiene al menos 15 guiones bajos
-            # Extraer el título desde el contenido
-            titulo = _get_title_from_content(secciones[k])
-            if titulo:
-                # Determinar icono según el contenido del título
-                icono_h4 = "📄"
-                titulo_lower = titulo.lower()
-                
-                if "objetivo" in titulo_lower:
-                    icono_h4 = "🎯"
-                elif "estadística" in titulo_lower or "estadístic" in titulo_lower:
-                    icono_h4 = "📊"
-                elif "correlac" in titulo_lower:
-                    icono_h4 = "🔗"
-                elif "outlier" in titulo_lower:
-                    icono_h4 = "🔍"
-                elif "visual" in titulo_lower:
-                    icono_h4 = "📈"
-                elif "dataset" in titulo_lower or "trabajado" in titulo_lower:
-                    icono_h4 = "🗄️"
-                elif "distribuc" in titulo_lower or "transformac" in titulo_lower:
-                    icono_h4 = "📉"
-                elif "acciones" in titulo_lower or "principales" in titulo_lower:
-                    icono_h4 = "⚙️"
-                elif "calidad" in titulo_lower or "resultado" in titulo_lower:
-                    icono_h4 = "✅"
-                elif "producto" in titulo_lower:
-                    icono_h4 = "📦"
-                elif "venta" in titulo_lower:
-                    icono_h4 = "💰"
-                elif "modelo" in titulo_lower or "relacion" in titulo_lower:
-                    icono_h4 = "🔗"
-                elif "clave" in titulo_lower and "definida" in titulo_lower:
-                    icono_h4 = "🔑"
-                elif "merge" in titulo_lower or "secuencial" in titulo_lower:
-                    icono_h4 = "🔄"
-                elif "análisis" in titulo_lower or "analisis" in titulo_lower or "estratég" in titulo_lower:
-                    icono_h4 = "💡"
-                
-                subsecciones_h4.append((k, titulo, icono_h4))
-    
-    # Ordenar por clave numérica para mantener orden lógico (3.4.1, 3.4.2, etc.)
-    def _num_key(item):
-        k, titulo, _ = item
-        m = re.search(r'_(\d+)_', k.replace(clave_etapa + "_", ""))
-        return int(m.group(1)) if m else 999
-    
-    subsecciones_h4.sort(key=_num_key)
-    
-    # Agregar subsecciones al menú
-    for clave, titulo, icono_sub in subsecciones_h4:
-        etapa.hijos.append(OpcionMenu(
-            clave=clave,
-            etiqueta=titulo,
-            icono=icono_sub,
-            tipo=TipoOpcion.CONTENIDO,
-            descripcion=""
-        ))
-    
-    return etapa
+def cargar_buffer(ruta: str) -> TextoDoc:
+    """Carga el documento como texto o, en modo --mmap, como archivo mapeado."""
+    if MMAP_MODE:
+        return cargar_documentacion_mmap(ruta) or ""
+    return cargar_documentacion(ruta)
+
+
+# Los patrones empiezan con un salto de línea literal en lugar de "^": así el
+# motor de regex salta directo a cada línea candidata en vez de probar todas
+# las posiciones del documento. La primera línea del rango se revisa aparte.
+# Las variantes en bytes recorren el archivo mapeado del modo --mmap. La
+# segunda alternativa atrapa los marcadores sin título en su línea (solo
+# espacios hasta el salto, ver _TituloEnOtraLinea) sin agregar otra pasada
+# sobre el documento.
+_PATRON_ENCABEZADO = re.compile(r"\n(#{2,4})(?:[^\S\n]+(\S.*?)$|[^\S\n]*\n)", re.MULTILINE)
+_PATRON_ENCABEZADO_INICIAL = re.compile(r"(#{2,4})(?:[^\S\n]+(\S.*?)$|[^\S\n]*\n)", re.MULTILINE)
+_PATRON_ENCABEZADO_B = re.compile(rb"\n(#{2,4})(?:[^\S\n]+(\S.*?)$|[^\S\n]*\n)", re.MULTILINE)
+_PATRON_ENCABEZADO_INICIAL_B = re.compile(rb"(#{2,4})(?:[^\S\n]+(\S.*?)$|[^\S\n]*\n)", re.MULTILINE)
+
+
+class _TituloEnOtraLinea(Exception):
+    """
+    Un marcador ##/###/#### no tiene título en su línea ("##" y solo espacios).
+    El "\\s+" de los patrones por nivel de la versión original cruza el salto
+    de línea y toma como título la siguiente línea con texto, que hasta puede
+    ser a la vez un encabezado de otro nivel: el recorrido único no lo
+    reproduce y quien lo recibe recurre a `_tokenizar_por_niveles`.
+    """
+
+
+def _iterar_encabezados(md: TextoDoc, inicio: int, fin: int) -> Iterator[Tuple[int, str, int]]:
+    """
+    Genera (nivel, título, posición) de cada encabezado ##/###/#### en [inicio, fin).
+    `inicio` se toma siempre como comienzo de línea (inicio del documento ya
+    sin espacios, o inicio de un bloque H2). Lanza _TituloEnOtraLinea al
+    llegar a un marcador sin título.
+    """
+    if isinstance(md, str):
+        patron, inicial, decodificar = _PATRON_ENCABEZADO, _PATRON_ENCABEZADO_INICIAL, False
+    else:
+        patron, inicial, decodificar = _PATRON_ENCABEZADO_B, _PATRON_ENCABEZADO_INICIAL_B, True
+    if inicio < fin:
+        match = inicial.match(md, inicio, fin)
+        if match:
+            titulo = match.group(2)
+            if titulo is None:
+                raise _TituloEnOtraLinea()
+            yield len(match.group(1)), titulo.decode("utf-8", errors="replace") if decodificar else titulo, inicio
+    for match in patron.finditer(md, inicio, fin):
+        titulo = match.group(2)
+        if titulo is None:
+            raise _TituloEnOtraLinea()
+        yield (len(match.group(1)), titulo.decode("utf-8", errors="replace") if decodificar else titulo,
+               match.start() + 1)
+
+
+_ESPACIOS_ASCII = frozenset(b" \t\n\r\x0b\x0c")
+
+
+def _recortar_rango(texto: TextoDoc, inicio: int, fin: int) -> Tuple[int, int]:
+    """Ajusta [inicio, fin) para excluir espacios en los extremos, como str.strip()."""
+    if not isinstance(texto, str):
+        while inicio < fin and texto[inicio] in _ESPACIOS_ASCII:
+            inicio += 1
+        while fin > inicio and texto[fin - 1] in _ESPACIOS_ASCII:
+            fin -= 1
+        return inicio, fin
+    while inicio < fin and texto[inicio].isspace():
+        inicio += 1
+    while fin > inicio and texto[fin - 1].isspace():
+        fin -= 1
+    return inicio, fin
+
+
+# Patrones de la versión original, un nivel por vez y con "\s+" tras el
+# marcador: (texto, texto inicial, bytes, bytes inicial)
+_PATRONES_NIVEL = {nivel: (re.compile(r"\n(%s)\s+(.+?)$" % ("#" * nivel), re.MULTILINE),
+                           re.compile(r"(%s)\s+(.+?)$" % ("#" * nivel), re.MULTILINE),
+                           re.compile(rb"\n(%s)\s+(.+?)$" % (b"#" * nivel), re.MULTILINE),
+                           re.compile(rb"(%s)\s+(.+?)$" % (b"#" * nivel), re.MULTILINE))
+                   for nivel in (2, 3, 4)}
+
+
+def _titulos_en_otra_linea(md: TextoDoc, inicio: int, fin: int) -> bool:
+    """Si en [inicio, fin) hay un marcador ##/###/#### sin título en su línea."""
+    try:
+        for _ in _iterar_encabezados(md, inicio, fin):
+            pass
+    except _TituloEnOtraLinea:
+        return True
+    return False
+
+
+def _encabezados_nivel(md: TextoDoc, nivel: int, inicio: int, fin: int) -> List[Tuple[int, str]]:
+    """(posición, título) de los encabezados de un solo nivel en [inicio, fin), con "\\s+" tras el marcador."""
+    if isinstance(md, str):
+        patron, inicial, _, _ = _PATRONES_NIVEL[nivel]
+    else:
+        _, _, patron, inicial = _PATRONES_NIVEL[nivel]
+    encabezados = []
+    desde = inicio
+    match = inicial.match(md, inicio, fin)
+    if match:
+        encabezados.append((inicio, match.group(2)))
+        desde = match.end()
+    for match in patron.finditer(md, desde, fin):
+        encabezados.append((match.start() + 1, match.group(2)))
+    if not isinstance(md, str):
+        encabezados = [(pos, titulo.decode("utf-8", errors="replace")) for pos, titulo in encabezados]
+    return encabezados
+
+
+def _tokenizar_por_niveles(md: TextoDoc, inicio: int, fin: int) -> List[List[NodoSeccion]]:
+    """
+    Bloques H2 buscando cada nivel dentro del rango de su padre, como la
+    versión original del parser. Solo se usa cuando `_tokenizar_bloques`
+    encuentra un marcador sin título (_TituloEnOtraLinea).
+    """
+    bloques: List[List[NodoSeccion]] = []
+    niveles_h2 = _encabezados_nivel(md, 2, inicio, fin)
+    for i, (pos, titulo) in enumerate(niveles_h2):
+        titulo = titulo.strip()
+        limite = niveles_h2[i + 1][0] if i + 1 < len(niveles_h2) else fin
+        h2 = NodoSeccion(normalizar_clave(titulo), titulo, 2, *_recortar_rango(md, pos, limite))
+        bloque = [h2]
+        niveles_h3 = _encabezados_nivel(md, 3, h2.inicio, h2.fin)
+        for j, (pos3, titulo3) in enumerate(niveles_h3):
+            titulo3 = titulo3.strip()
+            limite = niveles_h3[j + 1][0] if j + 1 < len(niveles_h3) else h2.fin
+            h3 = NodoSeccion(h2.clave + "_" + normalizar_clave(titulo3), titulo3, 3,
+                             *_recortar_rango(md, pos3, limite))
+            bloque.append(h3)
+            niveles_h4 = _encabezados_nivel(md, 4, h3.inicio, h3.fin)
+            for k, (pos4, titulo4) in enumerate(niveles_h4):
+                titulo4 = titulo4.strip()
+                limite = niveles_h4[k + 1][0] if k + 1 < len(niveles_h4) else h3.fin
+                bloque.append(NodoSeccion(h3.clave + "_" + normalizar_clave(titulo4), titulo4, 4,
+                                          *_recortar_rango(md, pos4, limite)))
+        bloques.append(_enlazar_bloque(bloque))
+    return bloques
+
+
+def _tokenizar_bloques(md: TextoDoc, inicio: int, fin: int) -> List[List[NodoSeccion]]:
+    """
+    Recorre [inicio, fin) una sola vez y agrupa los encabezados en bloques H2.
+
+    Cada encabezado abre una sección que se cierra con el siguiente encabezado
+    de nivel igual o superior. Las claves se forman encadenando la clave del
+    padre (H2 → H3 → H4); los H3 sin H2 previo y los H4 sin H3 abierto se
+    ignoran, igual que en la versión por niveles.
+    """
+    bloques: List[List[NodoSeccion]] = []
+    # Pila de secciones abiertas, de la más externa a la más interna
+    abiertas: List[NodoSeccion] = []
+
+    for nivel, titulo, pos in _iterar_encabezados(md, inicio, fin):
+
+        while abiertas and abiertas[-1].nivel >= nivel:
+            cerrada = abiertas.pop()
+            cerrada.inicio, cerrada.fin = _recortar_rango(md, cerrada.inicio, pos)
+
+        if nivel == 2:
+            prefijo = ""
+        elif abiertas and abiertas[-1].nivel == nivel - 1:
+            prefijo = abiertas[-1].clave + "_"
+        else:
+            continue
+
+        titulo = titulo.strip()
+        nodo = NodoSeccion(prefijo + normalizar_clave(titulo), titulo, nivel, pos)
+        if nivel == 2:
+            bloques.append([nodo])
+        else:
+            bloques[-1].append(nodo)
+        abiertas.append(nodo)
+
+    for cerrada in abiertas:
+        cerrada.inicio, cerrada.fin = _recortar_rango(md, cerrada.inicio, fin)
+
+    for bloque in bloques:
+        _enlazar_bloque(bloque)
+    return bloques
+
+
+def _enlazar_bloque(bloque: List[NodoSeccion]) -> List[NodoSeccion]:
+    """
+    Arma el árbol padre/hijos de un bloque H2 a partir de los niveles.
+
+    Dentro de un bloque cada encabezado cuelga del último de nivel menor,
+    así que alcanza con la misma pila de abiertos que usa el tokenizador.
+    """
+    abiertos: List[NodoSeccion] = []
+    for nodo in bloque:
+        while abiertos and abiertos[-1].nivel >= nodo.nivel:
+            abiertos.pop()
+        nodo.padre = abiertos[-1] if abiertos else None
+        nodo.hijos = []
+        if abiertos:
+            abiertos[-1].hijos.append(nodo)
+        abiertos.append(nodo)
+    return bloque
+
+
+_PATRON_NUMERO = re.compile(r"(\d+(?:\.\d+)*)\.?(?:\s|$)")
+
+
+@lru_cache(maxsize=65536)
+def numero_seccion(titulo: str) -> Optional[str]:
+    """Numeración con la que empieza un título ("3.4 Etapa 1" → "3.4"), o None."""
+    m = _PATRON_NUMERO.match(titulo.lstrip())
+    return m.group(1) if m else None
+
+
+def _clase_indice(md: TextoDoc) -> type:
+    return SeccionesDoc if isinstance(md, str) else SeccionesMmap
+
+
+def _ensamblar_secciones(md: TextoDoc, especiales: List[NodoSeccion],
+                         bloques: List[List[NodoSeccion]]) -> SeccionesDoc:
+    """
+    Arma el índice; ante claves repetidas gana la última, en la posición de la primera.
+
+    En el índice por numeración, en cambio, gana el encabezado menos profundo
+    y, entre los del mismo nivel, la primera aparición.
+    """
+    secciones = _clase_indice(md)(md)
+    nodos = secciones._nodos
+    numeros = secciones._numeros
+    for nodo in especiales:
+        nodos[nodo.clave] = nodo
+    for bloque in bloques:
+        for nodo in bloque:
+            nodos[nodo.clave] = nodo
+            if nodo.titulo[:1].isdigit():
+                numero = numero_seccion(nodo.titulo)
+                previo = numeros.get(numero) if numero else nodo
+                if previo is None or nodo.nivel < previo.nivel:
+                    numeros[numero] = nodo
+    secciones._bloques = bloques
+    return secciones
+
+
+def _nodos_especiales(md: TextoDoc, doc_inicio: int, doc_fin: int,
+                      bloques: List[List[NodoSeccion]]) -> List[NodoSeccion]:
+    """DOC_COMPLETA y, si hay algún H2, la INTRO que lo precede."""
+    especiales = [NodoSeccion("DOC_COMPLETA", "", 0, doc_inicio, doc_fin)]
+    if bloques:
+        intro_inicio, intro_fin = _recortar_rango(md, doc_inicio, bloques[0][0].inicio)
+        if intro_inicio < intro_fin:
+            especiales.append(NodoSeccion("INTRO", "", 0, intro_inicio, intro_fin))
+    return especiales
+
+
+@cronometrado("parsear_secciones")
+def parsear_secciones(md: TextoDoc) -> SeccionesDoc:
+    """
+    Divide el markdown en secciones H2/H3/H4 con un único recorrido lineal.
+
+    Las secciones no copian texto: cada nodo guarda su rango sobre `md`.
+    Si `md` es un archivo mapeado (modo --mmap) el recorrido es en bytes y
+    devuelve un SeccionesMmap con offsets en bytes. Los documentos con algún
+    título en la línea siguiente a su marcador se recorren por niveles.
+    """
+    doc_inicio, doc_fin = _recortar_rango(md, 0, len(md))
+    if doc_inicio == doc_fin:
+        return _clase_indice(md)(md)
+
+    try:
+        bloques = _tokenizar_bloques(md, doc_inicio, doc_fin)
+        por_niveles = False
+    except _TituloEnOtraLinea:
+        bloques = _tokenizar_por_niveles(md, doc_inicio, doc_fin)
+        por_niveles = True
+    secciones = _ensamblar_secciones(md, _nodos_especiales(md, doc_inicio, doc_fin, bloques), bloques)
+    secciones._por_niveles = por_niveles
+    return secciones
+
+
+# Tramo de texto que se compara por vez al buscar el prefijo y el sufijo comunes
+TRAMO_COMPARACION = 1 << 16
+
+
+def _prefijo_comun(a: str, b: str) -> int:
+    """
+    Largo del prefijo común de dos textos. Compara por tramos (comparaciones
+    en C sobre copias chicas) y, en el tramo que difiere, por bisección.
+    """
+    limite = min(len(a), len(b))
+    i = 0
+    while i < limite:
+        fin = min(i + TRAMO_COMPARACION, limite)
+        if not a.startswith(b[i:fin], i):
+            while fin - i > 1:
+                medio = (i + fin) // 2
+                if a.startswith(b[i:medio], i):
+                    i = medio
+                else:
+                    fin = medio
+            return i
+        i = fin
+    return limite
+
+
+def _sufijo_comun(a: str, b: str, limite: int) -> int:
+    """Largo del sufijo común de dos textos, sin pasar de `limite` caracteres."""
+    la, lb = len(a), len(b)
+    i = 0
+    while i < limite:
+        fin = min(i + TRAMO_COMPARACION, limite)
+        if not a.startswith(b[lb - fin:lb - i], la - fin):
+            while fin - i > 1:
+                medio = (i + fin) // 2
+                if a.startswith(b[lb - medio:lb - i], la - medio):
+                    i = medio
+                else:
+                    fin = medio
+            return i
+        i = fin
+    return limite
+
+
+def _desplazar_bloque(bloque: List[NodoSeccion], delta: int) -> List[NodoSeccion]:
+    if not delta:
+        return bloque
+    return _enlazar_bloque([NodoSeccion(n.clave, n.titulo, n.nivel, n.inicio + delta, n.fin + delta)
+                            for n in bloque])
+
+
+def _firma_bloques(bloques: List[List[NodoSeccion]]) -> List[Tuple[str, str, int]]:
+    return [(n.clave, n.titulo, n.nivel) for bloque in bloques for n in bloque]
+
+
+@cronometrado("reparsear_secciones")
+def reparsear_secciones(anterior: SeccionesDoc, md: TextoDoc) -> Tuple[SeccionesDoc, bool]:
+    """
+    Reindexa `md` reutilizando el índice de la versión anterior del documento.
+
+    Primero ubica el tramo que cambió con el prefijo y el sufijo comunes de
+    los dos textos. Solo se vuelven a tokenizar los bloques H2 que lo tocan,
+    empezando un bloque antes (editar la línea de un encabezado puede
+    sumar su texto al bloque previo); los bloques anteriores se reusan tal
+    cual y los posteriores solo desplazan sus rangos.
+
+    Retorna (secciones, estructura_cambiada); la estructura cambia cuando
+    difieren las claves, títulos o niveles de los encabezados, es decir,
+    cuando hace falta reconstruir el menú. El índice nuevo recuerda qué
+    claves salieron del tramo reprocesado, para que los índices de búsqueda
+    se sincronicen solo con esas (`claves_cambiadas`).
+
+    Con archivos mapeados se reparsea completo: si el archivo se reescribió,
+    el mapeo anterior ya no conserva la versión vieja para comparar. También
+    cuando alguna de las dos versiones necesita el recorrido por niveles
+    (_TituloEnOtraLinea), porque ahí un encabezado puede afectar a bloques
+    alejados.
+    """
+    doc_anterior = anterior.nodo("DOC_COMPLETA")
+    doc_inicio, doc_fin = _recortar_rango(md, 0, len(md))
+    if (doc_anterior is None or doc_inicio == doc_fin
+            or not isinstance(md, str) or not isinstance(anterior.texto, str)):
+        nuevas = parsear_secciones(md)
+        return nuevas, True
+
+    viejo = anterior.texto
+    if anterior._por_niveles is None:
+        anterior._por_niveles = _titulos_en_otra_linea(viejo, doc_anterior.inicio, doc_anterior.fin)
+    if anterior._por_niveles:
+        return parsear_secciones(md), True
+    prefijo = _prefijo_comun(viejo, md)
+    sufijo = _sufijo_comun(viejo, md, min(len(viejo), len(md)) - prefijo)
+    delta = len(md) - len(viejo)
+
+    bloques_viejos = anterior._bloques
+    inicios = [bloque[0].inicio for bloque in bloques_viejos]
+    # Bloque que contiene el último carácter intacto, y uno más atrás
+    primero = bisect_right(inicios, prefijo - 1) - 2
+    # Primer bloque que empieza después del tramo modificado: su encabezado y
+    # el salto de línea que lo precede quedaron dentro del sufijo común
+    ultimo = bisect_right(inicios, len(viejo) - sufijo)
+    desde = inicios[primero] if primero >= 0 else doc_inicio
+    hasta = inicios[ultimo] + delta if ultimo < len(inicios) else doc_fin
+    primero = max(primero, 0)
+
+    medio_viejo = bloques_viejos[primero:ultimo]
+    try:
+        medio_nuevo = _tokenizar_bloques(md, desde, hasta)
+    except _TituloEnOtraLinea:
+        # Todo marcador sin título de la versión nueva quedó en el tramo reprocesado
+        return parsear_secciones(md), True
+    bloques = bloques_viejos[:primero] + medio_nuevo
+    bloques += [_desplazar_bloque(bloque, delta) for bloque in bloques_viejos[ultimo:]]
+
+    especiales = _nodos_especiales(md, doc_inicio, doc_fin, bloques)
+    nuevas = _ensamblar_secciones(md, especiales, bloques)
+    cambiadas = {n.clave for bloque in medio_viejo + medio_nuevo for n in bloque}
+    cambiadas.add("DOC_COMPLETA")
+    if desde == doc_inicio:
+        cambiadas.add("INTRO")
+    nuevas._por_niveles = False
+    nuevas._diferencia = (weakref.ref(anterior), frozenset(cambiadas))
+    cambio = (("INTRO" in nuevas) != ("INTRO" in anterior)
+              or _firma_bloques(medio_viejo) != _firma_bloques(medio_nuevo))
+    return nuevas, cambio
+
+
+def normalizar_clave(titulo: str) -> str:
+    titulo = re.sub(r'[^\w\s\-]', '', titulo)
+    titulo = re.sub(r'\s+', '_', titulo.strip())
+    return titulo.upper()
+
+
+def _es_emoji(ch: str) -> bool:
+    cp = ord(ch)
+    return 0x1F300 <= cp <= 0x1FAFF or 0x1F600 <= cp <= 0x1F64F
+
+
+def _ancho_caracter(ch: str) -> int:
+    """Ancho en consola de un carácter: 0 si es combinante, 2 si es de doble ancho o emoji, 1 si no."""
+    if unicodedata.combining(ch):
+        return 0
+    if unicodedata.east_asian_width(ch) in ("F", "W") or _es_emoji(ch):
+        return 2
+    return 1
+
+
+# Bloques de 256 códigos que se clasifican en la primera consulta: latín,
+# marcas combinantes, puntuación, flechas, cajas, símbolos y emojis.
+_BLOQUES_FRECUENTES = (0x00, 0x01, 0x03, 0x20, 0x21, 0x22, 0x25, 0x26, 0x27, 0x2B, 0xFE,
+                       0x1F3, 0x1F4, 0x1F5, 0x1F6, 0x1F9)
+
+
+class _TablaAnchos(dict):
+    """
+    Tabla código → ancho en consola, completada por bloques de 256 códigos,
+    y una clase de caracteres compilada con los rangos cuyo ancho no es 1.
+
+    Los bloques todavía sin clasificar entran enteros en la clase, así que
+    un texto sin coincidencias mide exactamente su largo y se resuelve con
+    una búsqueda de regex en C. Cuando aparece un carácter de un bloque
+    nuevo, el bloque se clasifica y la clase se recompila.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.bloques: set = set()
+        self._patron: Optional[Pattern] = None
+
+    def __missing__(self, codigo: int) -> int:
+        self._clasificar(codigo >> 8)
+        return self[codigo]
+
+    def _clasificar(self, bloque: int):
+        base = bloque << 8
+        for cp in range(base, base + 0x100):
+            self[cp] = _ancho_caracter(chr(cp))
+        self.bloques.add(bloque)
+        self._patron = None
+
+    def _compilar(self) -> Pattern:
+        if not self.bloques:
+            for bloque in _BLOQUES_FRECUENTES:
+                self._clasificar(bloque)
+        rangos: List[List[int]] = []
+
+        def _agregar(inicio: int, fin: int):
+            if rangos and rangos[-1][1] == inicio - 1:
+                rangos[-1][1] = fin
+            else:
+                rangos.append([inicio, fin])
+
+        for bloque in range(0x1100):
+            base = bloque << 8
+            if bloque not in self.bloques:
+                _agregar(base, base + 0xFF)
+                continue
+            for cp in range(base, base + 0x100):
+                if self[cp] != 1:
+                    _agregar(cp, cp)
+        clase = "".join(f"\\U{a:08x}" if a == b else f"\\U{a:08x}-\\U{b:08x}" for a, b in rangos)
+        self._patron = re.compile(f"[{clase}]")
+        return self._patron
+
+    def especiales(self, texto: str) -> List[str]:
+        """Caracteres del texto cuyo ancho no es 1, en orden."""
+        encontrados = (self._patron or self._compilar()).findall(texto)
+        nuevos = {ord(ch) >> 8 for ch in encontrados} - self.bloques
+        if nuevos:
+            for bloque in nuevos:
+                self._clasificar(bloque)
+            encontrados = self._compilar().findall(texto)
+        return encontrados
+
+
+_ANCHOS = _TablaAnchos()
+
+
+def _ancho_uniforme(texto: str) -> bool:
+    """True si todos los caracteres del texto ocupan exactamente una columna."""
+    return texto.isascii() or not _ANCHOS.especiales(texto)
+
+
+def ancho_visual(texto: str) -> int:
+    """Calcula el ancho en consola considerando caracteres de doble ancho."""
+    if texto.isascii():
+        return len(texto)
+    especiales = _ANCHOS.especiales(texto)
+    if not especiales:
+        return len(texto)
+    return len(texto) - len(especiales) + sum([_ANCHOS[ord(ch)] for ch in especiales])
+
+
+def anchos_visuales(textos: Iterable[str]) -> List[int]:
+    """
+    Ancho visual de cada texto; versión por lotes de `ancho_visual`.
+    Si ningún texto tiene caracteres de ancho distinto de 1, alcanza con
+    una sola búsqueda sobre todos juntos.
+    """
+    textos = list(textos)
+    if _ancho_uniforme("".join(textos)):
+        return [len(t) for t in textos]
+    return [ancho_visual(t) for t in textos]
+
+
+def anchos_acumulados(texto: str) -> List[int]:
+    """Prefijos de ancho: el elemento i es el ancho visual de texto[:i]."""
+    if _ancho_uniforme(texto):
+        return list(range(len(texto) + 1))
+    return list(accumulate(map(_ANCHOS.__getitem__, map(ord, texto)), initial=0))
+
+
+def recortar_visual(texto: str, ancho: int) -> str:
+    """Recorta texto para que no exceda el ancho visual especificado."""
+    if _ancho_uniforme(texto):
+        return texto[:max(ancho, 0)]
+    return texto[:max(bisect_right(anchos_acumulados(texto), ancho) - 1, 0)]
+
+
+def rellenar_visual(texto: str, ancho: int, alineacion: str = "left") -> str:
+    """Rellena con espacios respetando ancho visual y truncando con elipsis."""
+    if ancho <= 0:
+        return ""
+    ancho_texto = ancho_visual(texto)
+    if ancho_texto > ancho:
+        texto = recortar_visual(texto, max(ancho - 1, 0)) + ("…" if ancho > 1 else "")
+        ancho_texto = ancho_visual(texto)
+    faltante = max(ancho - ancho_texto, 0)
+    if alineacion == "right":
+        return " " * faltante + texto
+    if alineacion == "center":
+        izq = faltante // 2
+        der = faltante - izq
+        return " " * izq + texto + " " * der
+    return texto + " " * faltante
+
+
+def centrar_visual(texto: str, ancho: int) -> str:
+    """Centra texto según su ancho visual."""
+    return rellenar_visual(texto, ancho, alineacion="center")
+
+
+def envolver_texto_display(texto: str, ancho: int) -> List[str]:
+    """Envuelve texto respetando el ancho visual."""
+    lineas: List[str] = []
+    actual = ""
+    ancho_actual = 0
+    palabras = texto.split()
+    for palabra, palabra_ancho in zip(palabras, anchos_visuales(palabras)):
+        sep = 1 if actual else 0
+        if ancho_actual + sep + palabra_ancho > ancho:
+            if actual:
+                lineas.append(actual)
+            actual = palabra
+            ancho_actual = palabra_ancho
+        else:
+            if actual:
+                actual += " "
+                ancho_actual += 1
+            actual += palabra
+            ancho_actual += palabra_ancho
+    if actual:
+        lineas.append(actual)
+    if not lineas:
+        lineas.append("")
+    return lineas
+
+
+def dividir_por_ancho(texto: str, ancho: int) -> List[str]:
+    """Divide texto en segmentos consecutivos respetando el ancho visual."""
+    if ancho <= 0:
+        return [""]
+    if _ancho_uniforme(texto):
+        return [texto[i:i + ancho] for i in range(0, len(texto), ancho)] or [""]
+    prefijos = anchos_acumulados(texto)
+    lineas: List[str] = []
+    inicio = 0
+    while inicio < len(texto):
+        fin = bisect_right(prefijos, prefijos[inicio] + ancho, inicio) - 1
+        if fin == inicio:
+            # Un carácter más ancho que el segmento queda solo en el suyo
+            # (precedido por un segmento vacío si es el primero del texto)
+            if inicio == 0:
+                lineas.append("")
+            fin = inicio + 1
+        lineas.append(texto[inicio:fin])
+        inicio = fin
+    return lineas or [""]
+
+def linea_marco(contenido: str, ancho: Optional[int] = None, borde_izq: str = "│", borde_der: str = "│") -> str:
+    """Retorna una línea enmarcada con los bordes indicados (por defecto, al ancho del marco)."""
+    return f"{borde_izq}{rellenar_visual(contenido, ANCHO_MARCO if ancho is None else ancho)}{borde_der}"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONSTRUCCIÓN DE ESTRUCTURA DE MENÚS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class _TablaSinMarcas(dict):
+    """Tabla para str.translate que descarta las marcas combinantes (categoría Mn)."""
+
+    def __missing__(self, codigo: int) -> Optional[int]:
+        valor = None if unicodedata.category(chr(codigo)) == 'Mn' else codigo
+        self[codigo] = valor
+        return valor
+
+
+_SIN_MARCAS = _TablaSinMarcas()
+
+
+def _strip_accents(text: str) -> str:
+    """Elimina acentos para comparaciones robustas en claves/títulos."""
+    text_nfd = unicodedata.normalize('NFD', text)
+    # La tabla memoriza la categoría de cada carácter: translate recorre en C
+    return text_nfd if text_nfd.isascii() else text_nfd.translate(_SIN_MARCAS)
+
+
+def _normalize_for_match(text: str) -> str:
+    """Normaliza texto para comparación: minúsculas, sin acentos, guiones bajos."""
+    t = _strip_accents(text).lower()
+    t = re.sub(r"[^a-z0-9]+", "_", t)
+    return t.strip('_')
+
+
+def _primeras_claves_por_tokens(secciones: SeccionesDoc,
+                                busquedas: Iterable[Tuple[str, ...]]) -> Dict[Tuple[str, ...], str]:
+    """
+    Recorre los H2 una sola vez y asigna a cada búsqueda (tupla de tokens) la
+    clave del primero cuyo nombre normalizado contenga todos sus tokens.
+
+    El recorrido se corta en cuanto quedan resueltas todas las búsquedas.
+    """
+    pendientes = {tokens: [_normalize_for_match(tok) for tok in tokens] for tokens in busquedas}
+    encontradas: Dict[Tuple[str, ...], str] = {}
+    for nodo in secciones.raices():
+        if not pendientes:
+            break
+        kn = _normalize_for_match(nodo.clave)
+        for tokens, toks in list(pendientes.items()):
+            if all(tok in kn for tok in toks):
+                encontradas[tokens] = nodo.clave
+                del pendientes[tokens]
+    return encontradas
+
+
+def _clave_numerica(titulo: str) -> Tuple:
+    """Clave de orden por numeración ("4.10" → (4, 10)); lo no numerado va al final."""
+    numero = numero_seccion(titulo)
+    return tuple(int(x) for x in numero.split(".")) if numero else (999,)
+
+
+def _subsecciones(secciones: SeccionesDoc, nodos: Iterable[NodoSeccion]) -> List[Tuple[str, str]]:
+    """(clave, título) de los nodos, sin claves repetidas y ordenados por numeración."""
+    vistas = set()
+    subsecciones = []
+    for sub in nodos:
+        titulo = secciones.titulo(sub.clave)
+        if titulo and sub.clave not in vistas:
+            vistas.add(sub.clave)
+            subsecciones.append((sub.clave, titulo))
+    subsecciones.sort(key=lambda x: _clave_numerica(x[1]))
+    return subsecciones
+
+
+class ReglaIcono(NamedTuple):
+    """Icono para los títulos que contienen alguna (o todas) de las palabras."""
+    icono: str
+    alguna: Tuple[str, ...] = ()
+    todas: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class ReglaMenu:
+    """
+    Una opción de la especificación de menús, ya validada y compilada.
+
+    Según qué campo tenga, la opción se ubica por clave fija (`clave`), por
+    tokens en la clave de un H2 (`tokens`) o por numeración y título
+    (`numero` + `titulo`). Dentro de un submenú, `completo` agrega la vista
+    de la sección entera y `subsecciones` genera una opción por cada
+    subsección ("hijos" o "descendientes"), con icono según `iconos`.
+    """
+    etiqueta: str = ""
+    icono: str = "📄"
+    descripcion: Optional[str] = None
+    nombre: str = ""
+    requerida: bool = False
+    clave: Optional[str] = None
+    siempre: bool = False
+    tokens: Tuple[str, ...] = ()
+    numero: Optional[str] = None
+    titulo: Optional[Pattern] = None
+    completo: bool = False
+    subsecciones: Optional[str] = None
+    numeros: Tuple[str, ...] = ()
+    iconos: Tuple[ReglaIcono, ...] = ()
+    hijos: Tuple["ReglaMenu", ...] = ()
+
+    def icono_para(self, titulo: str) -> str:
+        t = titulo.lower()
+        for regla in self.iconos:
+            if (regla.alguna and any(p in t for p in regla.alguna)) or \
+                    (regla.todas and all(p in t for p in regla.todas)):
+                return regla.icono
+        return "📄"
+
+
+class MenuCompilado:
+    """
+    Especificación de menús (menu_visor.json) compilada una sola vez.
+
+    `construir` ubica cada opción con búsquedas O(1) sobre el árbol de
+    encabezados (índice por clave y por numeración) y una única pasada por
+    los H2 para todas las opciones por tokens, así que su costo depende del
+    tamaño del menú y no del documento. Solo arma el menú principal; cada
+    submenú se arma con `hijos_diferidos` la primera vez que se abre.
+    """
+
+    def __init__(self, datos: dict, firma: str = ""):
+        self.firma = firma
+        raiz = datos["raiz"]
+        self.raiz = OpcionMenu(clave=raiz["clave"], etiqueta=raiz["etiqueta"], icono=raiz["icono"],
+                               tipo=TipoOpcion.SUBMENU)
+        tablas = {nombre: tuple(ReglaIcono(r["icono"], tuple(r.get("alguna", ())), tuple(r.get("todas", ())))
+                                for r in reglas)
+                  for nombre, reglas in datos.get("iconos", {}).items()}
+        self.reglas = tuple(self._compilar(r, tablas) for r in datos["opciones"])
+
+    def _compilar(self, datos: dict, tablas: Dict[str, Tuple[ReglaIcono, ...]]) -> ReglaMenu:
+        if datos.get("subsecciones") not in (None, "hijos", "descendientes"):
+            raise ValueError(f"Valor de 'subsecciones' desconocido: {datos['subsecciones']}")
+        if not any(k in datos for k in ("clave", "tokens", "numero", "completo", "subsecciones")):
+            raise ValueError(f"Opción de menú sin forma de ubicarla: {datos.get('etiqueta', datos)}")
+        return ReglaMenu(
+            etiqueta=datos.get("etiqueta", ""),
+            icono=datos.get("icono", "📄"),
+            descripcion=datos.get("descripcion"),
+            nombre=datos.get("nombre", ""),
+            requerida=datos.get("requerida", False),
+            clave=datos.get("clave"),
+            siempre=datos.get("siempre", False),
+            tokens=tuple(datos.get("tokens", ())),
+            numero=datos.get("numero"),
+            titulo=re.compile(datos["titulo"]) if "titulo" in datos else None,
+            completo=datos.get("completo", False),
+            subsecciones=datos.get("subsecciones"),
+            numeros=tuple(datos.get("numeros", ())),
+            iconos=tablas[datos["iconos"]] if "iconos" in datos else (),
+            hijos=tuple(self._compilar(h, tablas) for h in datos.get("hijos", ())),
+        )
+
+    @staticmethod
+    def _claves_por_tokens(reglas: Tuple[ReglaMenu, ...], secciones: SeccionesDoc) -> Dict[Tuple[str, ...], str]:
+        busquedas = {r.tokens for r in reglas if r.tokens}
+        return _primeras_claves_por_tokens(secciones, busquedas) if busquedas else {}
+
+    def _ubicar(self, regla: ReglaMenu, secciones: SeccionesDoc, padre: Optional[NodoSeccion],
+                claves: Dict[Tuple[str, ...], str]) -> Optional[str]:
+        """Clave de la sección que corresponde a la regla, o None si no está."""
+        if regla.clave is not None:
+            return regla.clave if regla.siempre or regla.clave in secciones else None
+        if regla.tokens:
+            return claves.get(regla.tokens)
+        nodo = secciones.por_numero(regla.numero) if regla.numero else None
+        if nodo is None:
+            return None
+        if regla.titulo and not regla.titulo.search(_normalize_for_match(nodo.titulo)):
+            return None
+        # Dentro de un submenú, la sección tiene que colgar de la del submenú
+        if padre is not None and (nodo.padre is None or nodo.padre.clave != padre.clave):
+            return None
+        return nodo.clave
+
+    def _opciones(self, reglas: Tuple[ReglaMenu, ...], secciones: SeccionesDoc,
+                  padre: Optional[NodoSeccion], ruta: Tuple[int, ...]) -> List[OpcionMenu]:
+        """Opciones de un nivel del menú; los submenús quedan diferidos."""
+        claves = self._claves_por_tokens(reglas, secciones)
+        opciones: List[OpcionMenu] = []
+        for i, regla in enumerate(reglas):
+            if regla.subsecciones:
+                if padre is None:
+                    continue
+                nodos = padre.hijos if regla.subsecciones == "hijos" else secciones.descendientes(padre)
+                if regla.numeros:
+                    nodos = [n for n in nodos if numero_seccion(n.titulo) in regla.numeros]
+                for clave, titulo in _subsecciones(secciones, nodos):
+                    opciones.append(OpcionMenu(clave=clave, etiqueta=titulo, icono=regla.icono_para(titulo),
+                                               tipo=TipoOpcion.CONTENIDO, descripcion=""))
+            elif regla.completo:
+                if padre is not None:
+                    opciones.append(OpcionMenu(clave=padre.clave, etiqueta=regla.etiqueta, icono=regla.icono,
+                                               tipo=TipoOpcion.CONTENIDO, descripcion=regla.descripcion))
+            else:
+                clave = self._ubicar(regla, secciones, padre, claves)
+                if clave is None:
+                    continue
+                opciones.append(OpcionMenu(clave=clave, etiqueta=regla.etiqueta, icono=regla.icono,
+                                           tipo=TipoOpcion.SUBMENU if regla.hijos else TipoOpcion.CONTENIDO,
+                                           descripcion=regla.descripcion,
+                                           pendiente=ruta + (i,) if regla.hijos else None))
+        return opciones
+
+    def construir(self, secciones: SeccionesDoc) -> OpcionMenu:
+        """
+        Menú principal para estas secciones (un árbol nuevo en cada llamada).
+        Solo se arma el primer nivel: cada submenú se completa al entrar.
+        """
+        raiz = OpcionMenu(clave=self.raiz.clave, etiqueta=self.raiz.etiqueta, icono=self.raiz.icono,
+                          tipo=TipoOpcion.SUBMENU)
+        raiz.hijos = self._opciones(self.reglas, secciones, None, ())
+        return raiz
+
+    def hijos_diferidos(self, ruta: Tuple[int, ...], clave: str, secciones: SeccionesDoc) -> List[OpcionMenu]:
+        """Hijos del submenú con esa clave, generado por la regla en `ruta`."""
+        reglas = self.reglas
+        for i in ruta:
+            reglas = reglas[i].hijos
+        # Con claves repetidas, el submenú lista los hijos de la sección que se muestra
+        nodo = secciones.nodo(clave)
+        if nodo is None:
+            return []
+        return self._opciones(reglas, secciones, nodo, ruta)
+
+    def faltantes(self, secciones: SeccionesDoc) -> List[str]:
+        """Nombres de las opciones marcadas como requeridas que el documento no tiene."""
+        claves = self._claves_por_tokens(self.reglas, secciones)
+        return [r.nombre for r in self.reglas
+                if r.requerida and self._ubicar(r, secciones, None, claves) is None]
+
+
+# Si menu_visor.json falta o es inválido, el visor sigue con este menú mínimo
+_ESPECIFICACION_MINIMA = {
+    "raiz": {"clave": "RAIZ", "etiqueta": "Proyecto Aurelion - Documentación Técnica", "icono": "🏪"},
+    "opciones": [
+        {"clave": "DOC_COMPLETA", "nombre": "DOC_COMPLETA", "requerida": True,
+         "etiqueta": "Ver Documentación Completa", "icono": "📄",
+         "descripcion": "Visualiza todo el documento en una sola vista"},
+        {"clave": "INTRO", "nombre": "INTRO", "requerida": True,
+         "etiqueta": "Introducción y Tabla de Contenidos", "icono": "🏠",
+         "descripcion": "Portada, índice y organización del proyecto"},
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def cargar_especificacion_menu(ruta: str) -> MenuCompilado:
+    """Lee y compila la especificación de menús; se hace una sola vez por ruta."""
+    try:
+        with open(ruta, "rb") as f:
+            crudo = f.read()
+        return MenuCompilado(json.loads(crudo.decode("utf-8")), hashlib.sha256(crudo).hexdigest())
+    except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+        escribir(f"\n⚠️ No se pudo cargar la especificación de menús ({os.path.basename(ruta)}): {e}")
+        escribir("   Se muestra un menú mínimo con el documento completo.\n")
+        return MenuCompilado(_ESPECIFICACION_MINIMA)
+
+
+@cronometrado("construir_estructura_menus")
+def construir_estructura_menus(secciones: SeccionesDoc) -> OpcionMenu:
+    """Construye el árbol de menús aplicando la especificación de menu_visor.json."""
+    menu_raiz = cargar_especificacion_menu(RUTA_MENU).construir(secciones)
+    if ASCII_MODE:
+        aplicar_ascii_iconos(menu_raiz)
+    return menu_raiz
+
+# Serializa la expansión de submenús diferidos entre hilos que comparten el árbol
+_CERROJO_MENUS = threading.Lock()
+
+
+def expandir_submenu(opcion: OpcionMenu, secciones: SeccionesDoc) -> List[OpcionMenu]:
+    """Hijos de la opción, construyéndolos la primera vez si el submenú estaba diferido."""
+    if opcion.pendiente is None:
+        return opcion.hijos
+    with _CERROJO_MENUS:
+        if opcion.pendiente is not None:
+            hijos = cargar_especificacion_menu(RUTA_MENU).hijos_diferidos(opcion.pendiente, opcion.clave, secciones)
+            if ASCII_MODE:
+                for hijo in hijos:
+                    aplicar_ascii_iconos(hijo)
+            opcion.hijos = hijos
+            opcion.pendiente = None
+    return opcion.hijos
+
+
+def aplicar_ascii_iconos(menu: OpcionMenu):
+    """Reemplaza iconos por ASCII simple si la consola no soporta Unicode."""
+    stack = [menu]
+    while stack:
+        nodo = stack.pop()
+        nodo.icono = "*"
+        stack.extend(nodo.hijos)
+
+
+def parchear_menu(actual: OpcionMenu, nuevo: OpcionMenu, secciones: SeccionesDoc):
+    """
+    Actualiza `actual` en el lugar para que refleje `nuevo` (armado sobre `secciones`).
+
+    Las opciones que siguen existiendo (misma clave y tipo) conservan su
+    objeto, de modo que las referencias de la ruta de navegación siguen
+    siendo válidas; las nuevas se insertan y las eliminadas se descartan.
+    Los submenús que el usuario nunca abrió quedan diferidos; los ya
+    abiertos se completan en `nuevo` para poder compararlos.
+    """
+    actual.clave = nuevo.clave
+    actual.etiqueta = nuevo.etiqueta
+    actual.icono = nuevo.icono
+    actual.tipo = nuevo.tipo
+    actual.descripcion = nuevo.descripcion
+    if actual.pendiente is not None:
+        actual.hijos = nuevo.hijos
+        actual.pendiente = nuevo.pendiente
+        return
+
+    disponibles: Dict[Tuple[str, TipoOpcion], List[OpcionMenu]] = {}
+    for hijo in actual.hijos:
+        disponibles.setdefault((hijo.clave, hijo.tipo), []).append(hijo)
+
+    hijos: List[OpcionMenu] = []
+    for hijo in expandir_submenu(nuevo, secciones):
+        previos = disponibles.get((hijo.clave, hijo.tipo))
+        if previos:
+            existente = previos.pop(0)
+            parchear_menu(existente, hijo, secciones)
+            hijos.append(existente)
+        else:
+            hijos.append(hijo)
+    actual.hijos[:] = hijos
+
+
+def ruta_en_menu(menu: OpcionMenu, clave: str, secciones: SeccionesDoc) -> Optional[List[OpcionMenu]]:
+    """
+    Opciones desde `menu` (excluido) hasta el contenido con esa clave, o None
+    si no figura. Completa los submenús diferidos que recorre.
+    """
+    for hijo in expandir_submenu(menu, secciones):
+        if hijo.tipo == TipoOpcion.CONTENIDO and hijo.clave == clave:
+            return [hijo]
+        if hijo.tipo == TipoOpcion.SUBMENU:
+            camino = ruta_en_menu(hijo, clave, secciones)
+            if camino:
+                return [hijo] + camino
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CACHÉ DEL ÍNDICE EN DISCO
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _ruta_cache(ruta_doc: str, md: TextoDoc) -> str:
+    # Los offsets del modo --mmap son en bytes: se guardan en otra caché
+    sufijo = ".idx" if isinstance(md, str) else ".mmap.idx"
+    return os.path.join(DIR_CACHE, os.path.basename(ruta_doc) + sufijo)
+
+
+def _firma_documento(ruta_doc: str, md: TextoDoc) -> Tuple[int, int, str]:
+    """
+    Firma (tamaño, mtime_ns, sha256) que identifica la versión leída del documento.
+
+    En modo --mmap el hash se omite: recorrer cientos de MB para validarlo
+    anularía la apertura en tiempo casi constante, así que alcanzan tamaño
+    y mtime.
+    """
+    st = os.stat(ruta_doc)
+    if not isinstance(md, str):
+        return st.st_size, st.st_mtime_ns, ""
+    return st.st_size, st.st_mtime_ns, hashlib.sha256(md.encode("utf-8")).hexdigest()
+
+
+def _menu_a_tupla(opcion: OpcionMenu) -> tuple:
+    return (opcion.clave, opcion.etiqueta, opcion.icono, opcion.tipo.value, opcion.descripcion,
+            tuple(_menu_a_tupla(h) for h in opcion.hijos), opcion.pendiente)
+
+
+def _menu_desde_tupla(datos: tuple) -> OpcionMenu:
+    clave, etiqueta, icono, tipo, descripcion, hijos, pendiente = datos
+    return OpcionMenu(clave=clave, etiqueta=etiqueta, icono=icono, tipo=TipoOpcion(tipo),
+                      descripcion=descripcion, hijos=[_menu_desde_tupla(h) for h in hijos],
+                      pendiente=pendiente)
+
+
+@cronometrado("leer_cache_indice")
+def leer_cache_indice(ruta_doc: str, md: TextoDoc) -> Optional[Tuple[SeccionesDoc, OpcionMenu]]:
+    """
+    Devuelve (secciones, menú) guardados para este documento, o None si no hay
+    caché, pertenece a otra versión del documento o está dañada.
+    """
+    try:
+        with open(_ruta_cache(ruta_doc, md), "rb") as f:
+            datos = pickle.load(f)
+        tamano, mtime_ns, _ = datos["firma"]
+        st = os.stat(ruta_doc)
+        if (datos["version"] != VERSION_CACHE or datos["ascii"] != ASCII_MODE
+                or datos["menu_spec"] != cargar_especificacion_menu(RUTA_MENU).firma
+                or (tamano, mtime_ns) != (st.st_size, st.st_mtime_ns)
+                or datos["firma"] != _firma_documento(ruta_doc, md)):
+            return None
+        return SeccionesDoc.desde_rangos(md, datos["rangos"]), _menu_desde_tupla(datos["menu"])
+    except Exception:
+        # Caché ausente, truncada o de un formato anterior: se reparsea
+        return None
+
+
+def guardar_cache_indice(ruta_doc: str, md: TextoDoc, secciones: SeccionesDoc, menu_raiz: OpcionMenu):
+    """Escribe la caché de forma atómica (archivo temporal + reemplazo). Los errores se ignoran."""
+    datos = {
+        "version": VERSION_CACHE,
+        "ascii": ASCII_MODE,
+        "menu_spec": cargar_especificacion_menu(RUTA_MENU).firma,
+        "firma": _firma_documento(ruta_doc, md),
+        "rangos": secciones.rangos(),
+        "menu": _menu_a_tupla(menu_raiz),
+    }
+    tmp = None
+    try:
+        os.makedirs(DIR_CACHE, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=DIR_CACHE, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _ruta_cache(ruta_doc, md))
+    except Exception:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def obtener_indice(ruta_doc: str, md: TextoDoc) -> Tuple[SeccionesDoc, OpcionMenu]:
+    """Secciones y menú del documento: desde la caché si sigue vigente, o parseando y construyendo."""
+    cacheado = leer_cache_indice(ruta_doc, md)
+    if cacheado:
+        return cacheado
+    secciones = parsear_secciones(md)
+    menu_raiz = construir_estructura_menus(secciones)
+    guardar_cache_indice(ruta_doc, md, secciones, menu_raiz)
+    return secciones, menu_raiz
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BÚSQUEDA DE TEXTO COMPLETO
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_RESULTADOS = 10
+
+# Letras/dígitos ASCII y marcas de los bloques Unicode de diacríticos combinantes
+_PATRON_TERMINO = re.compile("[a-z0-9\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]+")
+
+
+def _terminos(texto: str) -> List[str]:
+    """
+    Palabras del texto plegadas igual que `_normalize_for_match` (minúsculas,
+    sin acentos, [a-z0-9]). Se descompone y se corta el texto entero en C y
+    solo se pliegan con `_normalize_for_match` los términos que traen marcas.
+    """
+    plegado = unicodedata.normalize("NFD", texto).lower()
+    terminos = _PATRON_TERMINO.findall(plegado)
+    if plegado.isascii():
+        return terminos
+    resultado: List[str] = []
+    for termino in terminos:
+        if termino.isascii():
+            resultado.append(termino)
+        else:
+            resultado.extend(t for t in _normalize_for_match(termino).split("_") if t)
+    return resultado
+
+
+def _unidades_busqueda(secciones: SeccionesDoc) -> Iterator[Tuple[str, Tuple[str, ...], int, int]]:
+    """
+    Genera (clave, ruta de títulos, inicio, fin) del texto propio de cada sección:
+    desde su encabezado hasta el primer subencabezado, para que una palabra
+    cuente solo en la sección que la contiene y no en todos sus ancestros.
+    """
+    intro = secciones.nodo("INTRO")
+    if intro:
+        yield "INTRO", ("Introducción",), intro.inicio, intro.fin
+    for bloque in secciones._bloques:
+        ruta: List[str] = []
+        for i, nodo in enumerate(bloque):
+            del ruta[nodo.nivel - 2:]
+            ruta.append(nodo.titulo)
+            if secciones.nodo(nodo.clave) is not nodo:
+                continue  # clave repetida: el menú solo alcanza a la última
+            siguiente = bloque[i + 1] if i + 1 < len(bloque) else None
+            fin = siguiente.inicio if siguiente and siguiente.nivel > nodo.nivel else nodo.fin
+            yield nodo.clave, tuple(ruta), nodo.inicio, fin
+
+
+def _unidad_busqueda(secciones: SeccionesDoc, clave: str) -> Optional[Tuple[str, Tuple[str, ...], int, int]]:
+    """La unidad de `_unidades_busqueda` de una sola clave, o None si no se indexa."""
+    nodo = secciones.nodo(clave)
+    if nodo is None or clave == "DOC_COMPLETA":
+        return None
+    if nodo.nivel == 0:
+        return clave, ("Introducción",), nodo.inicio, nodo.fin
+    ruta = []
+    ancestro = nodo
+    while ancestro is not None:
+        ruta.append(ancestro.titulo)
+        ancestro = ancestro.padre
+    fin = nodo.hijos[0].inicio if nodo.hijos else nodo.fin
+    return clave, tuple(reversed(ruta)), nodo.inicio, fin
+
+
+def _unidades_a_sincronizar(secciones: SeccionesDoc, anteriores: Optional[SeccionesDoc]):
+    """
+    Unidades a revisar al pasar de `anteriores` a `secciones` y claves que
+    pueden haber desaparecido: solo las del tramo reprocesado si `secciones`
+    salió de `anteriores` por una recarga incremental, todas si no.
+    """
+    claves = secciones.claves_cambiadas(anteriores)
+    if claves is None:
+        return _unidades_busqueda(secciones), None
+    unidades = (_unidad_busqueda(secciones, clave) for clave in sorted(claves))
+    return (unidad for unidad in unidades if unidad), claves
+
+
+class _SeccionIndexada(NamedTuple):
+    ruta: Tuple[str, ...]
+    huella: int
+    distintos: Tuple[str, ...]
+
+
+class ResultadoBusqueda(NamedTuple):
+    clave: str
+    ruta: Tuple[str, ...]
+    puntaje: float
+    fragmento: str
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido término → {clave de sección: frecuencia} con ranking BM25.
+
+    `sincronizar` lo alinea con una versión de las secciones comparando la
+    huella del texto propio de cada una: solo se retokenizan las secciones
+    nuevas o modificadas y se retiran las que desaparecieron. Si la versión
+    nueva salió de la indexada por una recarga incremental, solo se revisan
+    las claves del tramo reprocesado.
+
+    Para responder sin recorrer listas enteras, cada término tiene además su
+    lista de impacto: las claves ordenadas por su peso BM25. Las listas se
+    mantienen al sincronizar (cada sección modificada se saca y se reinserta
+    por bisección) y se arman en segundo plano con `precalentar`. Los pesos
+    usan una longitud media congelada que se actualiza recién cuando la real
+    se aparta más de un 10%, para que editar una sección no reordene todas
+    las listas.
+
+    Las consultas y la sincronización toman el mismo lock, porque el índice
+    inicial se construye en un hilo aparte mientras el navegador ya responde.
+    Un índice compartido por sesiones en versiones distintas se consulta con
+    `buscar(consulta, secciones=...)`, que sincroniza y busca sin soltarlo.
+    """
+
+    def __init__(self):
+        self.secciones: Optional[SeccionesDoc] = None
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._docs: Dict[str, _SeccionIndexada] = {}
+        self._longitudes: Dict[str, int] = {}
+        self._longitud_total = 0
+        self._media = 0.0
+        # Denominador BM25 de cada sección sin el tf: k1·(1 - b + b·longitud/media)
+        self._normas: Dict[str, float] = {}
+        self._impactos: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def sincronizar(self, secciones: SeccionesDoc):
+        """Actualiza el índice para que refleje `secciones`."""
+        with self._lock:
+            self._sincronizar(secciones)
+
+    def _sincronizar(self, secciones: SeccionesDoc):
+        if secciones is self.secciones:
+            return
+        unidades, candidatas = _unidades_a_sincronizar(secciones, self.secciones)
+        vistas = set()
+        for clave, ruta, inicio, fin in unidades:
+            vistas.add(clave)
+            texto = secciones.fragmento(inicio, fin)
+            huella = hash(texto)
+            previo = self._docs.get(clave)
+            if previo and previo.huella == huella:
+                self._docs[clave] = previo._replace(ruta=ruta)
+                continue
+            if previo:
+                self._retirar(clave)
+            self._agregar(clave, ruta, huella, texto)
+        for clave in [c for c in (self._docs if candidatas is None else candidatas)
+                      if c not in vistas and c in self._docs]:
+            self._retirar(clave)
+        self.secciones = secciones
+
+        media = self._longitud_total / len(self._docs) if self._docs else 0.0
+        if abs(media - self._media) > 0.1 * self._media or not self._media:
+            self._media = media or 1.0
+            self._normas = {clave: self._norma(longitud) for clave, longitud in self._longitudes.items()}
+            self._impactos.clear()
+
+    def precalentar(self):
+        """Arma las listas de impacto que falten, soltando el lock entre término y término."""
+        for termino in list(self._postings):
+            with self._lock:
+                if termino in self._postings:
+                    self._lista_impacto(termino)
+
+    def _norma(self, longitud: int) -> float:
+        return BM25_K1 * (1 - BM25_B + BM25_B * longitud / self._media)
+
+    def _peso(self, termino: str, clave: str) -> float:
+        tf = self._postings[termino][clave]
+        return tf / (tf + self._normas[clave])
+
+    def _agregar(self, clave: str, ruta: Tuple[str, ...], huella: int, texto: str):
+        terminos = _terminos(texto)
+        # Internar evita guardar una copia de cada término por sección
+        frecuencias = {sys.intern(t): tf for t, tf in Counter(terminos).items()}
+        self._docs[clave] = _SeccionIndexada(ruta, huella, tuple(frecuencias))
+        self._longitudes[clave] = len(terminos)
+        self._longitud_total += len(terminos)
+        if self._media:
+            self._normas[clave] = self._norma(len(terminos))
+        for termino, tf in frecuencias.items():
+            self._postings.setdefault(termino, {})[clave] = tf
+            orden = self._impactos.get(termino)
+            if orden is not None:
+                insort(orden, clave, key=lambda c, t=termino: -self._peso(t, c))
+
+    def _retirar(self, clave: str):
+        for termino in self._docs.pop(clave).distintos:
+            posting = self._postings[termino]
+            del posting[clave]
+            if not posting:
+                del self._postings[termino]
+                self._impactos.pop(termino, None)
+            elif termino in self._impactos:
+                self._impactos[termino].remove(clave)
+        self._longitud_total -= self._longitudes.pop(clave)
+        self._normas.pop(clave, None)
+
+    def _lista_impacto(self, termino: str) -> List[str]:
+        orden = self._impactos.get(termino)
+        if orden is None:
+            posting = self._postings[termino]
+            claves = list(posting)
+            tfs = list(posting.values())
+            # tf / (tf + norma) con map, sin iterar en Python
+            pesos = list(map(truediv, tfs, map(add, tfs, map(self._normas.__getitem__, claves))))
+            # sorted es estable: ante pesos iguales queda el orden de documento
+            orden = list(map(claves.__getitem__, sorted(range(len(claves)), key=pesos.__getitem__, reverse=True)))
+            self._impactos[termino] = orden
+        return orden
+
+    def buscar(self, consulta: str, limite: int = MAX_RESULTADOS,
+               secciones: Optional[SeccionesDoc] = None) -> List[ResultadoBusqueda]:
+        """
+        Las `limite` secciones con mayor puntaje BM25 para la consulta; con
+        `secciones`, sobre esa versión (se sincroniza dentro del mismo lock).
+
+        Recorre las listas de impacto de los términos con el algoritmo de
+        umbral de Fagin: cada sección nueva se puntúa completa por acceso
+        directo, y la búsqueda termina cuando el peor de los mejores alcanza
+        la frontera (lo máximo que podría sumar una sección todavía no vista).
+        Se avanza siempre la lista que más aporta a la frontera, en lotes que
+        duplican su tamaño, así los términos muy frecuentes y de idf bajo casi
+        no se recorren.
+        """
+        with self._lock:
+            if secciones is not None:
+                self._sincronizar(secciones)
+            n_docs = len(self._docs)
+            terminos = [t for t in dict.fromkeys(_terminos(consulta)) if t in self._postings]
+            listas = []
+            for termino in terminos:
+                posting = self._postings[termino]
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                listas.append((termino, idf * (BM25_K1 + 1), self._lista_impacto(termino), posting))
+
+            # (puntaje, -orden de llegada, clave): ante empates gana la vista antes
+            mejores: List[Tuple[float, int, str]] = []
+            vistas = set()
+            posiciones = [0] * len(listas)
+            lotes = [limite] * len(listas)
+
+            def aporte(i: int) -> float:
+                termino, factor, orden, _ = listas[i]
+                return factor * self._peso(termino, orden[posiciones[i]]) if posiciones[i] < len(orden) else 0.0
+
+            while True:
+                aportes = [aporte(i) for i in range(len(listas))]
+                # Ninguna sección todavía no vista puede sumar más que la frontera
+                if not any(aportes) or (len(mejores) == limite and mejores[-1][0] >= sum(aportes) - 1e-9):
+                    break
+                # Avanzar la lista que más sostiene la frontera
+                i = aportes.index(max(aportes))
+                orden = listas[i][2]
+                nuevas = [c for c in orden[posiciones[i]:posiciones[i] + lotes[i]] if c not in vistas]
+                posiciones[i] += lotes[i]
+                lotes[i] *= 2
+                vistas.update(nuevas)
+                # Puntaje completo de cada sección nueva, por acceso directo a cada término
+                normas = list(map(self._normas.__getitem__, nuevas))
+                puntajes = [0.0] * len(nuevas)
+                for _, factor, _, posting in listas:
+                    tfs = list(map(posting.get, nuevas, repeat(0)))
+                    pesos = map(truediv, tfs, map(add, tfs, normas))
+                    puntajes = list(map(add, puntajes, map(factor.__mul__, pesos)))
+                llegada = count(-len(vistas) + len(nuevas), -1)
+                mejores = heapq.nlargest(limite, chain(mejores, zip(puntajes, llegada, nuevas)))
+
+            plegados = set(terminos)
+            resultados = []
+            for puntaje, _, clave in mejores:
+                _, ruta, inicio, fin = _unidad_busqueda(self.secciones, clave)
+                texto = self.secciones.fragmento(inicio, fin)
+                resultados.append(ResultadoBusqueda(clave, ruta, puntaje, _fragmento_coincidencia(texto, plegados)))
+            return resultados
+
+
+def _fragmento_coincidencia(texto: str, terminos: set, ancho: Optional[int] = None) -> str:
+    """Primera línea que contiene algún término, recortada alrededor de la coincidencia."""
+    if not terminos:
+        return ""
+    ancho = ANCHO_MARCO - 8 if ancho is None else ancho
+    patron = re.compile(r"(?<![a-z0-9])(?:" + "|".join(sorted(terminos)) + r")(?![a-z0-9])")
+    for linea in texto.split("\n"):
+        linea = linea.strip(" \t#│║|")
+        plegada = linea.lower() if linea.isascii() else _strip_accents(linea).lower()
+        match = patron.search(plegada)
+        if not match:
+            continue
+        desde = 0
+        # Quitar acentos conserva la longitud de los caracteres precompuestos
+        if match.end() > ancho - 10 and len(plegada) == len(linea):
+            desde = linea.rfind(" ", 0, match.start() - ancho // 4) + 1
+        return ("…" if desde else "") + recortar_visual(linea[desde:], ancho - 1)
+    return ""
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SALTO DIRECTO A SECCIONES (ÍNDICE DE TRIGRAMAS)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+UMBRAL_TRIGRAMAS = 0.5
+
+
+@lru_cache(maxsize=65536)
+def _trigramas_termino(termino: str) -> frozenset:
+    relleno = "  " + termino + " "
+    return frozenset(relleno[i:i + 3] for i in range(len(relleno) - 2))
+
+
+def _trigramas(texto: str) -> frozenset:
+    """Trigramas de cada palabra plegada, con dos espacios de relleno al inicio y uno al final."""
+    return frozenset().union(*map(_trigramas_termino, _terminos(texto)))
+
+
+def _mascara(ids: List[int], ancho: int) -> int:
+    """Entero con los bits `ids` encendidos (armado en bytes para no crear un entero por bit)."""
+    bits = bytearray((ancho + 7) // 8)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+class _EntradaTitulo(NamedTuple):
+    clave: str
+    ruta: Tuple[str, ...]
+    trigramas: frozenset
+
+
+class IndiceTitulos:
+    """
+    Índice de trigramas sobre el título y la clave de cada encabezado, para
+    saltar a una sección escribiendo parte de su nombre (comando [G]).
+
+    Cada entrada tiene un id entero y cada trigrama guarda como máscara de
+    bits (un int de Python) las entradas que lo contienen. Una consulta suma
+    las máscaras de sus trigramas con un contador por planos de bits, así que
+    cuenta coincidencias de todas las entradas a la vez con unas pocas
+    operaciones sobre enteros largos, sin recorrer candidatos en Python.
+    """
+
+    def __init__(self):
+        self.secciones: Optional[SeccionesDoc] = None
+        self._entradas: List[Optional[_EntradaTitulo]] = []
+        self._ids: Dict[str, int] = {}
+        self._libres: List[int] = []
+        self._mascaras: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def sincronizar(self, secciones: SeccionesDoc):
+        """Actualiza las entradas cuyo título o ubicación cambió y descarta las que ya no existen."""
+        with self._lock:
+            self._sincronizar(secciones)
+
+    def _sincronizar(self, secciones: SeccionesDoc):
+        if secciones is self.secciones:
+            return
+        quitar: Dict[str, List[int]] = {}
+        poner: Dict[str, List[int]] = {}
+        unidades, candidatas = _unidades_a_sincronizar(secciones, self.secciones)
+        vistas = set()
+        for clave, ruta, _, _ in unidades:
+            vistas.add(clave)
+            i = self._ids.get(clave)
+            if i is not None and self._entradas[i].ruta == ruta:
+                continue
+            if i is not None:
+                self._liberar(i, quitar)
+            entrada = _EntradaTitulo(clave, ruta, _trigramas(ruta[-1]) | _trigramas(clave))
+            i = self._libres.pop() if self._libres else len(self._entradas)
+            if i == len(self._entradas):
+                self._entradas.append(None)
+            self._entradas[i] = entrada
+            self._ids[clave] = i
+            for trigrama in entrada.trigramas:
+                poner.setdefault(trigrama, []).append(i)
+        for clave in [c for c in (self._ids if candidatas is None else candidatas)
+                      if c not in vistas and c in self._ids]:
+            self._liberar(self._ids[clave], quitar)
+
+        ancho = len(self._entradas)
+        for trigrama, ids in quitar.items():
+            mascara = self._mascaras[trigrama] & ~_mascara(ids, ancho)
+            if mascara:
+                self._mascaras[trigrama] = mascara
+            else:
+                del self._mascaras[trigrama]
+        for trigrama, ids in poner.items():
+            self._mascaras[trigrama] = self._mascaras.get(trigrama, 0) | _mascara(ids, ancho)
+        self.secciones = secciones
+
+    def _liberar(self, i: int, quitar: Dict[str, List[int]]):
+        entrada = self._entradas[i]
+        for trigrama in entrada.trigramas:
+            quitar.setdefault(trigrama, []).append(i)
+        del self._ids[entrada.clave]
+        self._entradas[i] = None
+        self._libres.append(i)
+
+    def buscar(self, consulta: str, limite: int = MAX_RESULTADOS,
+               secciones: Optional[SeccionesDoc] = None) -> List[ResultadoBusqueda]:
+        """
+        Encabezados que comparten al menos la mitad de los trigramas de la
+        consulta, de más a menos coincidencias; ante empates primero los de
+        nombre más corto (más parecidos a lo escrito). El puntaje es la
+        fracción de trigramas de la consulta encontrados. Con `secciones`,
+        sincroniza con esa versión dentro del mismo lock, como IndiceBusqueda.
+        """
+        with self._lock:
+            if secciones is not None:
+                self._sincronizar(secciones)
+            trigramas = _trigramas(consulta)
+            mascaras = [self._mascaras[t] for t in trigramas if t in self._mascaras]
+            minimo = max(1, math.ceil(len(trigramas) * UMBRAL_TRIGRAMAS))
+            if len(mascaras) < minimo:
+                return []
+
+            # Contador por planos: el bit i del plano p es el bit p de la
+            # cantidad de trigramas que comparte la entrada i
+            planos: List[int] = []
+            for mascara in mascaras:
+                acarreo = mascara
+                for p in range(len(planos)):
+                    planos[p], acarreo = planos[p] ^ acarreo, planos[p] & acarreo
+                    if not acarreo:
+                        break
+                if acarreo:
+                    planos.append(acarreo)
+
+            # De la mayor cantidad de coincidencias hacia abajo; se juntan
+            # algunos de más para desempatar por largo
+            candidatos: List[Tuple[int, int, int]] = []
+            for comunes in range(min(len(mascaras), 2 ** len(planos) - 1), minimo - 1, -1):
+                iguales = -1
+                for p, plano in enumerate(planos):
+                    iguales &= plano if comunes >> p & 1 else ~plano
+                while iguales and len(candidatos) < limite * 5:
+                    bajo = iguales & -iguales
+                    iguales ^= bajo
+                    i = bajo.bit_length() - 1
+                    candidatos.append((-comunes, len(self._entradas[i].trigramas), i))
+                if len(candidatos) >= limite * 5:
+                    break
+
+            resultados = []
+            for comunes, _, i in sorted(candidatos)[:limite]:
+                entrada = self._entradas[i]
+                resultados.append(ResultadoBusqueda(entrada.clave, entrada.ruta, -comunes / len(trigramas), ""))
+            return resultados
+
+
+def indexar_en_segundo_plano(secciones: SeccionesDoc, titulos: IndiceTitulos, buscador: IndiceBusqueda):
+    """Construye el índice de títulos y luego el de texto completo en un hilo daemon."""
+
+    def construir():
+        titulos.sincronizar(secciones)
+        buscador.sincronizar(secciones)
+        buscador.precalentar()
+
+    threading.Thread(target=construir, name="indices-navegacion", daemon=True).start()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# VIGILANCIA DEL DOCUMENTO EN SEGUNDO PLANO
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class Instantanea(NamedTuple):
+    """
+    Versión del documento publicada por el vigilante.
+
+    La tupla no se reemplaza, pero el árbol de menús no es inmutable:
+    `expandir_submenu` completa los submenús diferidos la primera vez que se
+    abren, desde cualquier hilo, bajo `_CERROJO_MENUS`. Además, el navegador
+    del visor usa como propio el árbol de la instantánea inicial y lo
+    actualiza en el lugar con `parchear_menu` al adoptar otra; las sesiones
+    del servidor (`SesionNavegador`) cambian de árbol sin modificarlo. En
+    modo --mmap, `secciones` se reindexa si el archivo cambió en disco.
+    """
+    secciones: SeccionesDoc
+    menu_raiz: OpcionMenu
+    firma: Tuple[int, int]
+
+
+def _firma_stat(ruta: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class VigilanteDocumento(threading.Thread):
+    """
+    Hilo que sondea DOCUMENTACION.md y, cuando cambia, lo reparsea fuera del
+    hilo de la interfaz y publica una nueva Instantanea.
+
+    La publicación es una simple asignación de atributo (atómica), así que el
+    navegador solo lee `instantanea` sin bloquearse ni tomar locks. Un cambio
+    se procesa recién cuando el tamaño y el mtime se mantienen estables entre
+    dos sondeos, para no leer el archivo a mitad de una reescritura. Si una
+    versión no se puede indexar (vacía, ilegible o con un error al parsear),
+    se descarta y el hilo sigue vigilando hasta el próximo cambio.
+    """
+
+    def __init__(self, ruta: str, inicial: Instantanea, intervalo: float = INTERVALO_VIGILANCIA):
+        super().__init__(name="vigilante-documentacion", daemon=True)
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.instantanea = inicial
+        self._detener = threading.Event()
+
+    def detener(self):
+        self._detener.set()
+
+    def run(self):
+        candidata: Optional[Tuple[int, int]] = None
+        descartada: Optional[Tuple[int, int]] = None
+        while not self._detener.wait(self.intervalo):
+            firma = _firma_stat(self.ruta)
+            if firma is None or firma == self.instantanea.firma or firma == descartada:
+                candidata = None
+                continue
+            if firma != candidata:
+                # Primer sondeo con cambios: esperar a que el archivo se asiente
+                candidata = firma
+                continue
+            candidata = None
+            try:
+                nueva = self._reindexar(firma)
+            except Exception:
+                # Un error al indexar no puede terminar el hilo: la instantánea
+                # vigente se conserva y se reintenta cuando el archivo cambie
+                nueva = None
+            if nueva:
+                self.instantanea = nueva
+            else:
+                descartada = firma
+
+    def _reindexar(self, firma: Tuple[int, int]) -> Optional[Instantanea]:
+        try:
+            if MMAP_MODE:
+                md = _mapear_archivo(self.ruta)
+            else:
+                with open(self.ruta, "r", encoding="utf-8") as f:
+                    md = f.read()
+        except (OSError, UnicodeDecodeError, ValueError):
+            return None
+        # _recortar_rango sirve tanto para el texto como para el archivo mapeado
+        inicio, fin = _recortar_rango(md, 0, len(md))
+        if _firma_stat(self.ruta) != firma or inicio == fin:
+            return None
+        actual = self.instantanea
+        secciones, estructura_cambiada = reparsear_secciones(actual.secciones, md)
+        menu_raiz = construir_estructura_menus(secciones) if estructura_cambiada else actual.menu_raiz
+        return Instantanea(secciones, menu_raiz, firma)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BLOQUES DE MARKDOWN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TipoBloque(Enum):
+    """Tipos de bloque en que se divide el markdown de una sección"""
+    TITULO = "titulo"
+    PARRAFO = "parrafo"
+    LISTA = "lista"
+    CODIGO = "codigo"
+    RESULTADO = "resultado"
+    TABLA = "tabla"
+    SEPARACION = "separacion"
+
+
+class Bloque(NamedTuple):
+    """
+    Bloque de markdown con sus líneas originales. `texto` es el título de un
+    encabezado o el rótulo de un bloque de resultados; en una tabla, `celdas`
+    trae las filas (la primera es la cabecera) y `anchos` el ancho natural de
+    cada columna, calculado una sola vez al tokenizar.
+    """
+    tipo: TipoBloque
+    lineas: Tuple[str, ...]
+    texto: str = ""
+    celdas: Tuple[Tuple[str, ...], ...] = ()
+    anchos: Tuple[int, ...] = ()
+    alineaciones: Tuple[str, ...] = ()
+
+
+_PATRON_TITULO_MD = re.compile(r'^#{2,4}\s+(.+)')
+_PATRON_LISTA = re.compile(r'^(\s*(?:[-*+]|\d+[.)])\s+)')
+_PATRON_SEPARADOR_TABLA = re.compile(r'^\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?$')
+_PATRON_BARRA_CELDA = re.compile(r'(?<!\\)\|')
+
+
+def _celdas_tabla(linea: str) -> List[str]:
+    linea = linea.strip()
+    if linea.startswith("|"):
+        linea = linea[1:]
+    if linea.endswith("|") and not linea.endswith("\\|"):
+        linea = linea[:-1]
+    return [celda.strip().replace("\\|", "|") for celda in _PATRON_BARRA_CELDA.split(linea)]
+
+
+def _alineacion_columna(separador: str) -> str:
+    if separador.startswith(":") and separador.endswith(":"):
+        return "center"
+    return "right" if separador.endswith(":") else "left"
+
+
+def _bloque_tabla(lineas: List[str]) -> Bloque:
+    """Arma un bloque de tabla: celdas normalizadas y ancho natural de cada columna."""
+    filas = [_celdas_tabla(linea) for linea in lineas[:1] + lineas[2:]]
+    columnas = max(map(len, filas))
+    celdas = tuple(tuple(fila) + ("",) * (columnas - len(fila)) for fila in filas)
+    separadores = _celdas_tabla(lineas[1])
+    alineaciones = tuple(_alineacion_columna(sep) for sep in separadores[:columnas])
+    alineaciones += ("left",) * (columnas - len(alineaciones))
+    anchos_celdas = anchos_visuales(celda for fila in celdas for celda in fila)
+    anchos = tuple(max(anchos_celdas[c::columnas]) for c in range(columnas))
+    return Bloque(TipoBloque.TABLA, tuple(lineas), celdas=celdas, anchos=anchos, alineaciones=alineaciones)
+
+
+def _inicia_tabla(lineas: List[str], i: int) -> bool:
+    """True si la línea i es la cabecera de una tabla (la sigue una fila separadora)."""
+    return (lineas[i].lstrip().startswith('|') and i + 1 < len(lineas)
+            and _PATRON_SEPARADOR_TABLA.match(lineas[i + 1].strip()) is not None)
+
+
+def _inicia_bloque(lineas: List[str], i: int) -> bool:
+    """True si la línea i abre un bloque propio (cerco de código, encabezado o tabla)."""
+    stripped = lineas[i].strip()
+    return (stripped.startswith('```') or _PATRON_TITULO_MD.match(stripped) is not None
+            or _inicia_tabla(lineas, i))
+
+
+def iterar_bloques(contenido: str) -> Iterator[Bloque]:
+    """
+    Divide una sección en bloques tipados en una sola pasada: encabezados,
+    párrafos, listas, código, resultados (```output, rotulados con el último
+    encabezado), tablas y tramos de líneas en blanco. Las líneas originales
+    se conservan, así que concatenar los bloques reproduce la sección.
+    """
+    lineas = contenido.split('\n')
+    ultimo_titulo = None
+    i, n = 0, len(lineas)
+    while i < n:
+        stripped = lineas[i].strip()
+        titulo = _PATRON_TITULO_MD.match(stripped)
+        if not stripped:
+            j = i + 1
+            while j < n and not lineas[j].strip():
+                j += 1
+            yield Bloque(TipoBloque.SEPARACION, tuple(lineas[i:j]))
+        elif stripped.startswith('```'):
+            j = i + 1
+            while j < n and lineas[j].strip() != '```':
+                j += 1
+            j = min(j + 1, n)
+            if stripped.startswith('```output'):
+                rotulo = f"Resultado · {ultimo_titulo}" if ultimo_titulo else 'Resultado'
+                yield Bloque(TipoBloque.RESULTADO, tuple(lineas[i:j]), rotulo)
+            else:
+                yield Bloque(TipoBloque.CODIGO, tuple(lineas[i:j]))
+        elif titulo:
+            ultimo_titulo = titulo.group(1)
+            j = i + 1
+            yield Bloque(TipoBloque.TITULO, (lineas[i],), ultimo_titulo)
+        elif _inicia_tabla(lineas, i):
+            j = i + 2
+            while j < n and lineas[j].strip().startswith('|'):
+                j += 1
+            yield _bloque_tabla(lineas[i:j])
+        else:
+            es_lista = _PATRON_LISTA.match(lineas[i]) is not None
+            j = i + 1
+            while j < n and lineas[j].strip() and not _inicia_bloque(lineas, j):
+                if not es_lista and _PATRON_LISTA.match(lineas[j]):
+                    break
+                j += 1
+            tipo = TipoBloque.LISTA if es_lista else TipoBloque.PARRAFO
+            yield Bloque(tipo, tuple(lineas[i:j]))
+        i = j
+
+
+def tokenizar_markdown(contenido: str) -> List[Bloque]:
+    """Bloques de una sección, en una lista."""
+    return list(iterar_bloques(contenido))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DISPOSICIÓN DE SECCIONES EN PANTALLA
+# ═══════════════════════════════════════════════════════════════════════════════
+
+ANCHO_MINIMO_COLUMNA = 3
+
+
+class LineasContenido(NamedTuple):
+    """
+    Sección ya envuelta al ancho de pantalla, con las posiciones a las que se
+    puede saltar. `quiebres[i]` es la primera línea envuelta que le
+    corresponde a la línea i del markdown.
+    """
+    lineas: List[str]
+    titulos: List[int]
+    resultados: List[int]
+    quiebres: List[int]
+
+    def linea_origen(self, linea: int) -> int:
+        """Línea del markdown de la que sale una línea envuelta."""
+        return max(bisect_right(self.quiebres, linea) - 1, 0)
+
+
+def _envolver_prosa(linea: str, ancho: int) -> List[str]:
+    """
+    Envuelve por palabras una línea de párrafo o de lista que no entra en el
+    ancho, conservando la sangría y colgando las continuaciones de un ítem
+    debajo de su texto.
+    """
+    if ancho_visual(linea) <= ancho:
+        return [linea]
+    marca = _PATRON_LISTA.match(linea)
+    sangria = linea[:len(linea) - len(linea.lstrip())]
+    primera = marca.group(1) if marca else sangria
+    colgada = " " * ancho_visual(primera)
+    disponible = ancho - len(colgada)
+    if disponible < ANCHO_MINIMO_MARCO // 2:
+        return dividir_por_ancho(linea, ancho)
+    envueltas = envolver_texto_display(linea[len(primera):], disponible)
+    lineas = [(primera if k == 0 else colgada) + texto for k, texto in enumerate(envueltas)]
+    # Una palabra más larga que el renglón (una URL, por ejemplo) se parte igual
+    return [parte for linea_envuelta in lineas for parte in dividir_por_ancho(linea_envuelta, ancho)]
+
+
+def _envolver_celda(texto: str, ancho: int) -> List[str]:
+    if ancho_visual(texto) <= ancho:
+        return [texto]
+    return [parte for linea in envolver_texto_display(texto, ancho) for parte in dividir_por_ancho(linea, ancho)]
+
+
+def _anchos_columnas(naturales: Tuple[int, ...], disponible: int) -> List[int]:
+    """
+    Reparte el ancho disponible entre las columnas: si no entran con su ancho
+    natural, se busca el tope más alto que, aplicado a las más anchas, hace
+    que la tabla entre; las columnas angostas no se tocan.
+    """
+    anchos = [max(ancho, 1) for ancho in naturales]
+    if sum(anchos) <= disponible:
+        return anchos
+    bajo, alto = 1, max(anchos)
+    while bajo < alto:
+        tope = (bajo + alto + 1) // 2
+        if sum(min(ancho, tope) for ancho in anchos) <= disponible:
+            bajo = tope
+        else:
+            alto = tope - 1
+    return [min(ancho, bajo) for ancho in anchos]
+
+
+def _disponer_tabla(bloque: Bloque, ancho: int) -> Optional[List[str]]:
+    """Dibuja la tabla como una grilla con bordes; None si sus columnas no entran en el ancho."""
+    columnas = len(bloque.anchos)
+    disponible = ancho - 3 * columnas - 1
+    if disponible < ANCHO_MINIMO_COLUMNA * columnas:
+        return None
+    anchos = _anchos_columnas(bloque.anchos, disponible)
+    if ASCII_MODE:
+        arriba = medio = abajo = ("+", "+", "+")
+        horizontal, vertical = "-", "|"
+    else:
+        arriba, medio, abajo = ("┌", "┬", "┐"), ("├", "┼", "┤"), ("└", "┴", "┘")
+        horizontal, vertical = "─", "│"
+
+    def borde(esquinas: Tuple[str, str, str]) -> str:
+        return esquinas[0] + esquinas[1].join(horizontal * (a + 2) for a in anchos) + esquinas[2]
+
+    lineas = [borde(arriba)]
+    for k, fila in enumerate(bloque.celdas):
+        partes = [_envolver_celda(celda, a) for celda, a in zip(fila, anchos)]
+        for renglon in range(max(map(len, partes))):
+            lineas.append(vertical + vertical.join(
+                " " + rellenar_visual(parte[renglon] if renglon < len(parte) else "", a, alineacion) + " "
+                for parte, a, alineacion in zip(partes, anchos, bloque.alineaciones)) + vertical)
+        if k == 0:
+            lineas.append(borde(medio))
+    lineas.append(borde(abajo))
+    return lineas
+
+
+def _disponer_bloque(bloque: Bloque, ancho: int, lineas: List[str], quiebres: List[int]):
+    """
+    Agrega a `lineas` las líneas de pantalla de un bloque, y a `quiebres` la
+    posición donde empieza cada una de sus líneas de markdown.
+    """
+    marco = ancho - 2
+
+    def agregar(linea: str):
+        lineas.extend(dividir_por_ancho(linea, ancho))
+
+    tipo = bloque.tipo
+    if tipo is TipoBloque.TABLA:
+        grilla = _disponer_tabla(bloque, ancho)
+        if grilla is not None:
+            quiebres.extend([len(lineas)] * len(bloque.lineas))
+            lineas.extend(grilla)
+            return
+    elif tipo is TipoBloque.RESULTADO:
+        quiebres.extend([len(lineas)] * len(bloque.lineas))
+        cuerpo = bloque.lineas[1:]
+        if cuerpo and cuerpo[-1].strip() == '```':
+            cuerpo = cuerpo[:-1]
+        agregar('')
+        if ASCII_MODE:
+            agregar('-' * ancho)
+            agregar(f" {bloque.texto} ".center(ancho, '-'))
+        else:
+            agregar('╔' + '═' * marco + '╗')
+            agregar(linea_marco(centrar_visual(f" {bloque.texto} ", marco), marco, "║", "║"))
+            agregar('╠' + '═' * marco + '╣')
+        for linea in cuerpo:
+            agregar(linea)
+        if not ASCII_MODE:
+            agregar('╚' + '═' * marco + '╝')
+            agregar('')
+        return
+
+    prosa = tipo is TipoBloque.PARRAFO or tipo is TipoBloque.LISTA
+    for linea in bloque.lineas:
+        quiebres.append(len(lineas))
+        if prosa:
+            lineas.extend(_envolver_prosa(linea, ancho))
+        else:
+            agregar(linea)
+
+
+def _cierre_seccion(ancho: int) -> List[str]:
+    marco = ancho - 2
+    return ['', "=" * marco if ASCII_MODE else "═" * marco]
+
+
+def disponer_bloques(bloques: Iterable[Bloque], ancho: Optional[int] = None) -> LineasContenido:
+    """
+    Convierte los bloques de una sección en líneas listas para la pantalla:
+    párrafos y listas se envuelven por palabras, código y resultados se
+    parten sin tocar los espacios, los bloques ```output se enmarcan con su
+    rótulo y las tablas se dibujan como grillas. Registra la línea donde
+    empieza cada encabezado y cada bloque de resultados.
+    """
+    ancho = ANCHO_MARCO + 2 if ancho is None else ancho
+    lineas: List[str] = []
+    titulos: List[int] = []
+    resultados: List[int] = []
+    quiebres: List[int] = []
+    for bloque in bloques:
+        if bloque.tipo is TipoBloque.TITULO:
+            titulos.append(len(lineas))
+        elif bloque.tipo is TipoBloque.RESULTADO:
+            resultados.append(len(lineas))
+        _disponer_bloque(bloque, ancho, lineas, quiebres)
+    lineas.extend(_cierre_seccion(ancho))
+    return LineasContenido(lineas, titulos, resultados, quiebres)
+
+
+def transmitir_seccion(contenido: str, ancho: Optional[int] = None):
+    """
+    Escribe una sección entera sin paginar, disponiendo cada bloque a medida
+    que se tokeniza. La salida se vuelca en tramos de LIMITE_BUFFER, así que
+    si el lector cierra el pipe el trabajo se corta en el tramo en curso.
+    """
+    ancho = ANCHO_MARCO + 2 if ancho is None else ancho
+    for bloque in iterar_bloques(contenido):
+        lineas: List[str] = []
+        _disponer_bloque(bloque, ancho, lineas, [])
+        escribir("\n".join(lineas))
+    escribir("\n".join(_cierre_seccion(ancho)))
+
+
+def indexar_contenido(contenido: str, ancho: Optional[int] = None) -> LineasContenido:
+    """Tokeniza y dispone una sección, sin pasar por las cachés."""
+    return disponer_bloques(tokenizar_markdown(contenido), ancho)
+
+
+def _memoria_bloques(bloques: List[Bloque]) -> int:
+    """Estimación de los bytes que retienen los bloques de una sección."""
+    return sys.getsizeof(bloques) + sum(
+        sys.getsizeof(bloque) + sys.getsizeof(bloque.lineas) + sum(map(sys.getsizeof, bloque.lineas))
+        + sum(sys.getsizeof(celda) for fila in bloque.celdas for celda in fila)
+        for bloque in bloques)
+
+
+def _memoria_lineas(contenido: LineasContenido) -> int:
+    """Estimación de los bytes que retiene una sección dispuesta."""
+    return sum(sys.getsizeof(lista) + sum(map(sys.getsizeof, lista)) for lista in contenido)
+
+
+class CacheAcotada:
+    """
+    LRU acotada por una estimación de la memoria que retienen sus valores.
+    Los valores más grandes que todo el presupuesto se devuelven sin guardarse.
+
+    Se puede compartir entre hilos: el lock cubre solo la consulta y la
+    inserción, y los valores se construyen fuera de él (si dos hilos piden
+    la misma clave a la vez, ambos la construyen y se guarda la primera).
+
+    Las consultas `fria` (las de la precarga) no renuevan lo que encuentran
+    y guardan lo nuevo en el extremo que se desaloja primero: solo ocupan
+    lugar libre y nunca desplazan una entrada pedida normalmente.
+    """
+
+    def __init__(self, presupuesto: int):
+        self.presupuesto = presupuesto
+        self.usado = 0
+        self._entradas: "OrderedDict[object, Tuple[object, int]]" = OrderedDict()
+        self._cerrojo = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def obtener(self, clave, construir: Callable[[], object], medir: Callable[[object], int],
+                fria: bool = False):
+        with self._cerrojo:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if not fria:
+                    self._entradas.move_to_end(clave)
+                return entrada[0]
+        valor = construir()
+        tamano = medir(valor)
+        if tamano <= self.presupuesto:
+            with self._cerrojo:
+                if clave in self._entradas:
+                    return self._entradas[clave][0]
+                self._entradas[clave] = (valor, tamano)
+                if fria:
+                    self._entradas.move_to_end(clave, last=False)
+                self.usado += tamano
+                while self.usado > self.presupuesto:
+                    _, (_, liberado) = self._entradas.popitem(last=False)
+                    self.usado -= liberado
+        return valor
+
+
+# Bloques por texto de sección, y secciones dispuestas por (texto, ancho, ASCII_MODE)
+_CACHE_BLOQUES = CacheAcotada(PRESUPUESTO_CACHE_BLOQUES)
+_CACHE_LINEAS = CacheAcotada(PRESUPUESTO_CACHE_LINEAS)
+
+
+def bloques_seccion(contenido: str, fria: bool = False) -> List[Bloque]:
+    """Bloques de una sección, tokenizada una sola vez mientras siga en la caché."""
+    return _CACHE_BLOQUES.obtener(contenido, lambda: tokenizar_markdown(contenido),
+                                  lambda bloques: _memoria_bloques(bloques) + sys.getsizeof(contenido), fria)
+
+
+def disponer_seccion(contenido: str, ancho: Optional[int] = None, fria: bool = False) -> LineasContenido:
+    """
+    Sección dispuesta al ancho dado (por defecto, el de la terminal). Volver a
+    abrirla, o volver a un ancho ya usado, reutiliza las líneas; un ancho
+    nuevo vuelve a disponer los bloques, sin tokenizar otra vez. Con `fria`
+    (precarga) las cachés solo la guardan si tienen lugar libre.
+    """
+    ancho = ANCHO_MARCO + 2 if ancho is None else ancho
+    return _CACHE_LINEAS.obtener((contenido, ancho, ASCII_MODE),
+                                 lambda: disponer_bloques(bloques_seccion(contenido, fria), ancho),
+                                 lambda lineas: _memoria_lineas(lineas) + sys.getsizeof(contenido), fria)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PRECARGA EN SEGUNDO PLANO
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Estimación inicial de la memoria que retiene cada carácter de una sección
+# dispuesta (bloques y líneas); el hilo la ajusta con lo que va midiendo.
+BYTES_POR_CARACTER_PRECARGA = 16.0
+
+
+class PrecargaSecciones(threading.Thread):
+    """
+    Hilo que, mientras el visor espera una opción, tokeniza y dispone las
+    secciones del menú en pantalla y arma sus submenús diferidos; abrir
+    cualquiera de ellas pasa a ser un acierto de las cachés de disposición.
+
+    Cada pedido reemplaza al anterior y navegar lo cancela: el trabajo de un
+    menú que ya se dejó se abandona entre una sección y la siguiente. Lo
+    precargado por pedido no supera `presupuesto` bytes estimados, y entra en
+    las cachés como consulta fría: ocupa solo lugar libre, así la precarga
+    no desplaza de las cachés lo que el usuario ya abrió.
+    """
+
+    def __init__(self, presupuesto: int = PRESUPUESTO_PRECARGA):
+        super().__init__(name="precarga-secciones", daemon=True)
+        self.presupuesto = presupuesto
+        self.precargadas = 0
+        self._bytes_por_caracter = BYTES_POR_CARACTER_PRECARGA
+        # Solo el hilo de la interfaz escribe estos dos atributos; publicar el
+        # pedido es una asignación atómica, igual que en VigilanteDocumento.
+        self._generacion = 0
+        self._pedido: Optional[Tuple[int, SeccionesDoc, List[OpcionMenu], int]] = None
+        self._hay_pedido = threading.Event()
+        self._libre = threading.Event()
+        self._libre.set()
+        self._detenida = False
+
+    def solicitar(self, secciones: SeccionesDoc, opciones: List[OpcionMenu], ancho: int):
+        """Precarga las opciones del menú recién mostrado, al ancho con que se abrirían."""
+        self._generacion += 1
+        self._pedido = (self._generacion, secciones, list(opciones), ancho)
+        self._libre.clear()
+        self._hay_pedido.set()
+
+    def cancelar(self):
+        """Descarta el pedido en curso; la sección que se está disponiendo se termina."""
+        self._generacion += 1
+        self._pedido = None
+
+    def detener(self):
+        self._detenida = True
+        self.cancelar()
+        self._hay_pedido.set()
+
+    def esperar(self, limite: Optional[float] = None) -> bool:
+        """Espera a que no quede trabajo pendiente (para benchmarks y pruebas)."""
+        return self._libre.wait(limite)
+
+    def run(self):
+        while not self._detenida:
+            self._hay_pedido.wait()
+            self._hay_pedido.clear()
+            pedido = self._pedido
+            if pedido is not None:
+                self._precargar(*pedido)
+            if self._pedido is None or self._pedido is pedido:
+                self._libre.set()
+
+    def _precargar(self, generacion: int, secciones: SeccionesDoc, opciones: List[OpcionMenu], ancho: int):
+        # Primero los submenús (armarlos es barato) y después las secciones de
+        # menor a mayor: entran más en el presupuesto y una cancelación casi
+        # siempre encuentra al hilo en una sección corta.
+        for opcion in opciones:
+            if generacion != self._generacion:
+                return
+            if opcion.tipo == TipoOpcion.SUBMENU:
+                expandir_submenu(opcion, secciones)
+        nodos = [secciones.nodo(o.clave) for o in opciones if o.tipo == TipoOpcion.CONTENIDO]
+        restante = self.presupuesto
+        for nodo in sorted(filter(None, nodos), key=lambda n: n.fin - n.inicio):
+            if generacion != self._generacion:
+                return
+            contenido = secciones.get(nodo.clave)
+            if contenido is None:
+                continue  # el archivo mapeado se reindexó y la sección ya no está
+            if len(contenido) * self._bytes_por_caracter > restante:
+                # No entra en lo que queda del presupuesto: se deja para cuando se abra
+                continue
+            bloques = bloques_seccion(contenido, fria=True)
+            lineas = disponer_seccion(contenido, ancho, fria=True)
+            memoria = _memoria_bloques(bloques) + _memoria_lineas(lineas) + 2 * sys.getsizeof(contenido)
+            self._bytes_por_caracter = (self._bytes_por_caracter + memoria / max(len(contenido), 1)) / 2
+            restante -= memoria
+            self.precargadas += 1
+            if restante <= 0:
+                return
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PAGINADOR DE CONTENIDO
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Filas de la barra de estado que acompaña a cada página
+FILAS_BARRA = 4
+# Alto mínimo de página, aunque la terminal sea más baja
+ALTO_MINIMO_PAGINA = 5
+# Comando para ir a una línea: "L120", "L 120" o solo "120"
+_PATRON_IR_A_LINEA = re.compile(r"L?\s*(\d+)")
+
+
+class Paginador:
+    """
+    Ventana de `alto` líneas sobre una sección indexada. Moverse cuesta una
+    búsqueda binaria como mucho, y mostrar la página, un recorte de `alto`
+    líneas, sin importar el largo de la sección.
+    """
+
+    def __init__(self, contenido: LineasContenido, alto: int = ALTO_MINIMO_PAGINA):
+        self.contenido = contenido
+        self.alto = max(alto, 1)
+        self.inicio = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.contenido.lineas)
+
+    @property
+    def ultimo_inicio(self) -> int:
+        return max(self.total - self.alto, 0)
+
+    @property
+    def al_final(self) -> bool:
+        return self.inicio >= self.ultimo_inicio
+
+    def ir_a(self, linea: int):
+        self.inicio = min(max(linea, 0), self.ultimo_inicio)
+
+    def avanzar(self, paginas: int = 1):
+        self.ir_a(self.inicio + paginas * self.alto)
+
+    def siguiente(self, posiciones: List[int]) -> bool:
+        """Lleva la ventana a la primera posición posterior al inicio actual."""
+        i = bisect_right(posiciones, self.inicio)
+        if i == len(posiciones):
+            return False
+        self.ir_a(posiciones[i])
+        return True
+
+    def visibles(self) -> List[str]:
+        return self.contenido.lineas[self.inicio:self.inicio + self.alto]
+
+
+def _barra_paginador(paginador: Paginador) -> List[str]:
+    fin = min(paginador.inicio + paginador.alto, paginador.total)
+    porcentaje = 100 * fin // max(paginador.total, 1)
+    avance = " [ENTER] Volver al menú" if paginador.al_final else " [ENTER] Siguiente"
+    return [
+        "",
+        ("-" if ASCII_MODE else "─") * ANCHO_MARCO,
+        f" Líneas {paginador.inicio + 1}–{fin} de {paginador.total} ({porcentaje}%) ·{avance} · [A] Anterior",
+        " [T] Próximo título · [O] Próximo resultado · [L n] Ir a línea n · [0] Volver",
+    ]
+
+
+def paginar_contenido(contenido: str, ruta: List[str]):
+    """
+    Recorre una sección página por página: avanzar y retroceder, saltar al
+    próximo encabezado o bloque de resultados, o ir a una línea. Si cambia
+    el ancho de la terminal, la sección se vuelve a disponer (o se toma de
+    la caché) y la página sigue empezando en la misma línea del markdown.
+    """
+    paginador: Optional[Paginador] = None
+    while True:
+        limpiar_pantalla()
+        lineas = disponer_seccion(contenido)
+        if paginador is None:
+            paginador = Paginador(lineas)
+        elif paginador.contenido is not lineas:
+            origen = paginador.contenido.linea_origen(paginador.inicio)
+            paginador.contenido = lineas
+            paginador.inicio = lineas.quiebres[origen]
+        mostrar_header()
+        mostrar_breadcrumbs(ruta)
+        pantalla = pantalla_actual()
+        usadas = pantalla.lineas_pendientes() + FILAS_BARRA + FILAS_PROMPT
+        filas = pantalla.medidas().lines
+        paginador.alto = max(filas - usadas, ALTO_MINIMO_PAGINA)
+        paginador.ir_a(paginador.inicio)
+        escribir("\n".join(paginador.visibles()))
+        escribir("\n".join(_barra_paginador(paginador)))
+        try:
+            comando = leer_entrada("\n👉 Comando: ").strip().upper()
+        except EOFError:
+            return
+
+        if comando == "0" or (comando == "" and paginador.al_final):
+            return
+        if comando in ("", "S", "+"):
+            paginador.avanzar()
+        elif comando in ("A", "-"):
+            paginador.avanzar(-1)
+        elif comando == "T":
+            paginador.siguiente(paginador.contenido.titulos)
+        elif comando == "O":
+            paginador.siguiente(paginador.contenido.resultados)
+        else:
+            linea = _PATRON_IR_A_LINEA.fullmatch(comando)
+            if linea:
+                paginador.ir_a(int(linea.group(1)) - 1)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -804,16 +3037,16 @@ def construir_submenu_etapa(secciones: Dict[str, str], clave_sprint: str,
 def mostrar_header():
     """Muestra el encabezado principal del programa."""
     if ASCII_MODE:
-        print("\n" + "=" * ANCHO_MARCO)
-        print(" PROYECTO AURELION - VISOR DE DOCUMENTACION TECNICA ".center(ANCHO_MARCO, "="))
-        print(" IBM & Guayerd · Analisis de Datos Retail · 2025 ".center(ANCHO_MARCO))
-        print("=" * ANCHO_MARCO)
+        escribir("\n" + "=" * ANCHO_MARCO)
+        escribir(" PROYECTO AURELION - VISOR DE DOCUMENTACION TECNICA ".center(ANCHO_MARCO, "="))
+        escribir(" IBM & Guayerd · Analisis de Datos Retail · 2025 ".center(ANCHO_MARCO))
+        escribir("=" * ANCHO_MARCO)
         return
-    print("\n" + "╔" + "═" * ANCHO_MARCO + "╗")
-    print(linea_marco(centrar_visual(" 🏪  PROYECTO AURELION - VISOR DE DOCUMENTACIÓN TÉCNICA  🏪 ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
-    print("╠" + "═" * ANCHO_MARCO + "╣")
-    print(linea_marco(centrar_visual(" IBM & Guayerd · Análisis de Datos Retail · 2025 ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
-    print("╚" + "═" * ANCHO_MARCO + "╝")
+    escribir("\n" + "╔" + "═" * ANCHO_MARCO + "╗")
+    escribir(linea_marco(centrar_visual(" 🏪  PROYECTO AURELION - VISOR DE DOCUMENTACIÓN TÉCNICA  🏪 ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
+    escribir("╠" + "═" * ANCHO_MARCO + "╣")
+    escribir(linea_marco(centrar_visual(" IBM & Guayerd · Análisis de Datos Retail · 2025 ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
+    escribir("╚" + "═" * ANCHO_MARCO + "╝")
 
 
 def mostrar_breadcrumbs(ruta: List[str]):
@@ -821,26 +3054,28 @@ def mostrar_breadcrumbs(ruta: List[str]):
     if len(ruta) <= 1:
         return
     
-    print("\n" + "┌" + "─" * ANCHO_MARCO + "┐")
-    print(linea_marco("📍 Ubicación: " + " → ".join(ruta), ANCHO_MARCO, "│", "│"))
-    print("└" + "─" * ANCHO_MARCO + "┘")
+    escribir("\n" + "┌" + "─" * ANCHO_MARCO + "┐")
+    escribir(linea_marco("📍 Ubicación: " + " → ".join(ruta), ANCHO_MARCO, "│", "│"))
+    escribir("└" + "─" * ANCHO_MARCO + "┘")
 
 
-def mostrar_menu(opciones: List[OpcionMenu], ruta: List[str]):
+def mostrar_menu(opciones: List[OpcionMenu], ruta: List[str],
+                 atras: bool = False, adelante: bool = False):
     """
     Muestra el menú actual con las opciones disponibles.
     
     Args:
         opciones: Lista de opciones del menú actual
         ruta: Ruta de navegación (breadcrumbs)
+        atras, adelante: si hay menús a los que volver o avanzar en el historial
     """
     limpiar_pantalla()
     mostrar_header()
     mostrar_breadcrumbs(ruta)
     
-    print("\n" + "┌" + "─" * ANCHO_MARCO + "┐")
-    print(linea_marco(centrar_visual(" MENÚ DE OPCIONES ", ANCHO_MARCO), ANCHO_MARCO, "│", "│"))
-    print("├" + "─" * ANCHO_MARCO + "┤")
+    escribir("\n" + "┌" + "─" * ANCHO_MARCO + "┐")
+    escribir(linea_marco(centrar_visual(" MENÚ DE OPCIONES ", ANCHO_MARCO), ANCHO_MARCO, "│", "│"))
+    escribir("├" + "─" * ANCHO_MARCO + "┤")
     
     for i, opcion in enumerate(opciones, 1):
         # Indicador de tipo
@@ -849,33 +3084,73 @@ def mostrar_menu(opciones: List[OpcionMenu], ruta: List[str]):
         # Línea principal con número alineado y nombre
         num_opcion = f"[{i:>2}]"
         contenido_linea = rellenar_visual(f"{num_opcion} {opcion.icono}  {opcion.etiqueta} {tipo_indicador}", ANCHO_MARCO - 2)
-        print(linea_marco(contenido_linea, ANCHO_MARCO, "│", "│"))
+        escribir(linea_marco(contenido_linea, ANCHO_MARCO, "│", "│"))
         
         # Descripción (si existe)
         if opcion.descripcion:
             for desc_line in envolver_texto_display(opcion.descripcion, ANCHO_MARCO - 6):
                 desc_fmt = rellenar_visual(f"     💬 {desc_line}", ANCHO_MARCO - 2)
-                print(linea_marco(desc_fmt, ANCHO_MARCO, "│", "│"))
+                escribir(linea_marco(desc_fmt, ANCHO_MARCO, "│", "│"))
         
         # Separador entre opciones
         if i < len(opciones):
-            print("├" + "┄" * ANCHO_MARCO + "┤")
+            escribir("├" + "┄" * ANCHO_MARCO + "┤")
 
-    print("└" + "─" * ANCHO_MARCO + "┘")
+    escribir("└" + "─" * ANCHO_MARCO + "┘")
     
     # Opciones de navegación
-    print("\n" + "╔" + "═" * ANCHO_MARCO + "╗")
-    print(linea_marco(" NAVEGACIÓN ", ANCHO_MARCO, "║", "║"))
-    print("╠" + "═" * ANCHO_MARCO + "╣")
+    escribir("\n" + "╔" + "═" * ANCHO_MARCO + "╗")
+    escribir(linea_marco(" NAVEGACIÓN ", ANCHO_MARCO, "║", "║"))
+    escribir("╠" + "═" * ANCHO_MARCO + "╣")
     if len(ruta) > 1:
-        print(linea_marco(" [0] ⬅️   Volver al menú anterior", ANCHO_MARCO, "║", "║"))
+        escribir(linea_marco(" [0] ⬅️   Volver al menú anterior", ANCHO_MARCO, "║", "║"))
     else:
-        print(linea_marco(" [Q] 🚪  Salir del programa", ANCHO_MARCO, "║", "║"))
+        escribir(linea_marco(" [Q] 🚪  Salir del programa", ANCHO_MARCO, "║", "║"))
+    if atras:
+        escribir(linea_marco(" [<] ⏪  Atrás en el historial", ANCHO_MARCO, "║", "║"))
+    if adelante:
+        escribir(linea_marco(" [>] ⏩  Adelante en el historial", ANCHO_MARCO, "║", "║"))
+
+    escribir(linea_marco(" [R] 🔄  Recargar documentación", ANCHO_MARCO, "║", "║"))
+    escribir(linea_marco(" [B] 🔍  Buscar en la documentación", ANCHO_MARCO, "║", "║"))
+    escribir(linea_marco(" [G] 🧭  Ir a una sección por nombre", ANCHO_MARCO, "║", "║"))
+    escribir("╚" + "═" * ANCHO_MARCO + "╝")
+
+
+def mostrar_resultados_busqueda(consulta: str, resultados: List[ResultadoBusqueda], ruta: List[str]):
+    """
+    Muestra los resultados de una búsqueda con la ubicación de cada sección
+    y la línea donde aparece la coincidencia.
+
+    Args:
+        consulta: Texto buscado
+        resultados: Resultados ordenados por relevancia
+        ruta: Ruta de navegación (breadcrumbs)
+    """
+    limpiar_pantalla()
+    mostrar_header()
+    mostrar_breadcrumbs(ruta)
 
-    print(linea_marco(" [R] 🔄  Recargar documentación", ANCHO_MARCO, "║", "║"))
-    print("╚" + "═" * ANCHO_MARCO + "╝")
+    escribir("\n" + "┌" + "─" * ANCHO_MARCO + "┐")
+    escribir(linea_marco(centrar_visual(f" RESULTADOS PARA «{consulta}» ", ANCHO_MARCO), ANCHO_MARCO, "│", "│"))
+    escribir("├" + "─" * ANCHO_MARCO + "┤")
 
+    if not resultados:
+        escribir(linea_marco("     Sin coincidencias. Probá con otras palabras.", ANCHO_MARCO, "│", "│"))
+    for i, resultado in enumerate(resultados, 1):
+        ubicacion = envolver_texto_display(" › ".join(resultado.ruta), ANCHO_MARCO - 7)
+        escribir(linea_marco(f"[{i:>2}] 📄 {ubicacion[0]}", ANCHO_MARCO, "│", "│"))
+        for resto in ubicacion[1:]:
+            escribir(linea_marco(f"        {resto}", ANCHO_MARCO, "│", "│"))
+        if resultado.fragmento:
+            escribir(linea_marco(f"     💬 {resultado.fragmento}", ANCHO_MARCO, "│", "│"))
+        if i < len(resultados):
+            escribir("├" + "┄" * ANCHO_MARCO + "┤")
 
+    escribir("└" + "─" * ANCHO_MARCO + "┘")
+
+
+@cronometrado("mostrar_contenido")
 def mostrar_contenido(titulo: str, contenido: str, ruta: List[str]):
     """
     Muestra el contenido de una sección.
@@ -885,15 +3160,14 @@ def mostrar_contenido(titulo: str, contenido: str, ruta: List[str]):
         contenido: Contenido a mostrar
         ruta: Ruta de navegación (breadcrumbs)
     """
-    limpiar_pantalla()
-    mostrar_header()
-    mostrar_breadcrumbs(ruta)
-
     # Mostrar diagrama de flujo profesional, alineado y detallado
     if titulo and ("DIAGRAMA_FLUJO_MENU" in titulo.upper() or "DIAGRAMA DE FLUJO DEL MENÚ" in titulo.upper()):
-        print("\n" + ("═" * ANCHO_MARCO))
-        print(linea_marco(" DIAGRAMA DE FLUJO DEL MENÚ PRINCIPAL ", ANCHO_MARCO, "║", "║"))
-        print("╠" + "═" * ANCHO_MARCO + "╣")
+        limpiar_pantalla()
+        mostrar_header()
+        mostrar_breadcrumbs(ruta)
+        escribir("\n" + ("═" * ANCHO_MARCO))
+        escribir(linea_marco(" DIAGRAMA DE FLUJO DEL MENÚ PRINCIPAL ", ANCHO_MARCO, "║", "║"))
+        escribir("╠" + "═" * ANCHO_MARCO + "╣")
         # Diagrama alineado y distribuido
         diagrama = [
             "              ┌───────────────┐",
@@ -952,68 +3226,19 @@ def mostrar_contenido(titulo: str, contenido: str, ruta: List[str]):
             "    INICIO/FIN        Óvalo",
         ]
         for l in diagrama:
-            print(linea_marco(l, ANCHO_MARCO, "║", "║"))
-        print("╚" + "═" * ANCHO_MARCO + "╝")
+            escribir(linea_marco(l, ANCHO_MARCO, "║", "║"))
+        escribir("╚" + "═" * ANCHO_MARCO + "╝")
         pausar()
         return
 
-    # ...existing code...
-    lineas = contenido.split('\n')
-    in_output_block = False
-    output_buffer = []
-    last_section_header = None
-    max_lines = 80
-    defer_counter = 0
-    shown = 0
-    for linea in lineas:
-        stripped = linea.strip()
-        if re.match(r'^#{2,4}\s+.+', stripped):
-            last_section_header = re.sub(r'^#{2,4}\s+', '', stripped)
-
-        if stripped.startswith('```output'):
-            in_output_block = True
-            output_buffer = []
-            continue
-        if in_output_block and stripped == '```':
-            titulo_bloque = 'Resultado'
-            if last_section_header:
-                titulo_bloque = f"Resultado · {last_section_header}"
-
-            if ASCII_MODE:
-                print('\n' + '-' * 80)
-                print(f" {titulo_bloque} ".center(80, '-'))
-            else:
-                print('\n' + '╔' + '═' * 78 + '╗')
-                print(linea_marco(centrar_visual(f" {titulo_bloque} ", 78), 78, "║", "║"))
-                print('╠' + '═' * 78 + '╣')
-            
-            for out_line in output_buffer:
-                print(out_line)
-            
-            if not ASCII_MODE:
-                print('╚' + '═' * 78 + '╝\n')
-            in_output_block = False
-            output_buffer = []
-            continue
-        if in_output_block:
-            output_buffer.append(linea)
-        else:
-            print(linea)
-            shown += 1
-            if shown >= max_lines and not DEMO_MODE:
-                if stripped:
-                    defer_counter += 1
-                    if defer_counter < 30:
-                        continue
-                try:
-                    input("\n--- Continuar (ENTER) ---")
-                except EOFError:
-                    return
-                shown = 0
-                defer_counter = 0
-
-    print("\n" + ("=" * ANCHO_MARCO if ASCII_MODE else "═" * ANCHO_MARCO))
-    pausar()
+    if DEMO_MODE or PIPE_MODE:
+        limpiar_pantalla()
+        mostrar_header()
+        mostrar_breadcrumbs(ruta)
+        transmitir_seccion(contenido)
+        pausar()
+        return
+    paginar_contenido(contenido, ruta)
 
 
 def mostrar_mensaje(mensaje: str, tipo: str = "info"):
@@ -1041,22 +3266,79 @@ def mostrar_mensaje(mensaje: str, tipo: str = "info"):
     icono = iconos.get(tipo, "ℹ️")
     borde = bordes.get(tipo, "─")
     
-    print("\n" + borde * ANCHO_MARCO)
-    print(f"{icono}  {mensaje}")
-    print(borde * ANCHO_MARCO)
+    escribir("\n" + borde * ANCHO_MARCO)
+    escribir(f"{icono}  {mensaje}")
+    escribir(borde * ANCHO_MARCO)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # LÓGICA DE NAVEGACIÓN
 # ═══════════════════════════════════════════════════════════════════════════════
 
+Ruta = List[Tuple[OpcionMenu, str]]
+
+
+class HistorialNavegacion:
+    """
+    Menús visitados, con atrás y adelante como en un navegador web. Cada
+    entrada es la ruta completa (menú y nombre de cada nivel); ir a un menú
+    nuevo descarta lo que hubiera para adelante.
+    """
+
+    def __init__(self, limite: int = LIMITE_HISTORIAL):
+        self.limite = limite
+        self._atras: List[Ruta] = []
+        self._adelante: List[Ruta] = []
+
+    @property
+    def puede_atras(self) -> bool:
+        return bool(self._atras)
+
+    @property
+    def puede_adelante(self) -> bool:
+        return bool(self._adelante)
+
+    def registrar(self, ruta: Ruta):
+        """Anota la ruta que se deja al ir a otro menú."""
+        self._atras.append(list(ruta))
+        del self._atras[:-self.limite]
+        self._adelante.clear()
+
+    def atras(self, actual: Ruta) -> Optional[Ruta]:
+        if not self._atras:
+            return None
+        self._adelante.append(list(actual))
+        return self._atras.pop()
+
+    def adelante(self, actual: Ruta) -> Optional[Ruta]:
+        if not self._adelante:
+            return None
+        self._atras.append(list(actual))
+        return self._adelante.pop()
+
+
 class NavegadorMenus:
     """Gestiona la navegación entre menús y secciones."""
     
-    def __init__(self, menu_raiz: OpcionMenu, secciones: Dict[str, str]):
+    def __init__(self, menu_raiz: OpcionMenu, secciones: SeccionesDoc,
+                 vigilante: Optional[VigilanteDocumento] = None,
+                 buscador: Optional[IndiceBusqueda] = None,
+                 titulos: Optional[IndiceTitulos] = None,
+                 precarga: Optional[PrecargaSecciones] = None,
+                 pantallas: Optional[CacheAcotada] = None):
         self.menu_raiz = menu_raiz
         self.secciones = secciones
         self.ruta: List[Tuple[OpcionMenu, str]] = [(menu_raiz, "Inicio")]
+        self.vigilante = vigilante
+        self._instantanea = vigilante.instantanea if vigilante else None
+        # Con `is None`: un índice compartido todavía vacío es falso por su __len__
+        self.buscador = buscador if buscador is not None else IndiceBusqueda()
+        self.titulos = titulos if titulos is not None else IndiceTitulos()
+        self.precarga = precarga
+        self.historial = HistorialNavegacion()
+        # Cuadros de menú ya compuestos, por (menú, ruta, ancho, modo); las
+        # sesiones del servidor comparten la del servidor
+        self.pantallas = pantallas if pantallas is not None else CacheAcotada(PRESUPUESTO_CACHE_PANTALLAS)
     
     def obtener_menu_actual(self) -> OpcionMenu:
         """Retorna el menú actual en la pila de navegación."""
@@ -1074,8 +3356,9 @@ class NavegadorMenus:
             opcion = menu_actual.hijos[indice]
             
             if opcion.tipo == TipoOpcion.SUBMENU:
-                # Navegar a submenú
-                self.ruta.append((opcion, opcion.etiqueta))
+                # Navegar a submenú (sus hijos se arman la primera vez que se entra)
+                expandir_submenu(opcion, self.secciones)
+                self._ir_a_ruta(self.ruta + [(opcion, opcion.etiqueta)])
             elif opcion.tipo == TipoOpcion.CONTENIDO:
                 # Mostrar contenido
                 contenido = self.secciones.get(opcion.clave, "⚠️ Contenido no disponible")
@@ -1088,68 +3371,246 @@ class NavegadorMenus:
     def volver_atras(self):
         """Vuelve al menú anterior."""
         if len(self.ruta) > 1:
-            self.ruta.pop()
+            self._ir_a_ruta(self.ruta[:-1])
+
+    def _ir_a_ruta(self, ruta: Ruta):
+        """Cambia de menú dejando la ruta actual en el historial."""
+        if [o for o, _ in ruta] != [o for o, _ in self.ruta]:
+            self.historial.registrar(self.ruta)
+        self.ruta = ruta
+
+    def historial_atras(self):
+        self._restaurar(self.historial.atras(self.ruta))
+
+    def historial_adelante(self):
+        self._restaurar(self.historial.adelante(self.ruta))
+
+    def _restaurar(self, ruta: Optional[Ruta]):
+        """Vuelve a una ruta del historial, hasta el último menú que siga existiendo."""
+        if ruta is None:
+            mostrar_mensaje("No hay más menús en esa dirección del historial.", "warning")
+            pausar()
+            return
+        self.ruta = [(self.menu_raiz, "Inicio")] + ruta[1:]
+        self._conservar_ruta()
+
+    def mostrar_menu_actual(self):
+        """
+        Muestra el menú en curso. El cuadro compuesto queda en una LRU por
+        (menú, ruta, ancho, modo), así que volver a un menú reciente (con [0]
+        o con el historial) solo cuesta escribirlo en la terminal.
+        """
+        menu = self.obtener_menu_actual()
+        ruta = self.obtener_ruta_nombres()
+        atras, adelante = self.historial.puede_atras, self.historial.puede_adelante
+        actualizar_ancho_marco()
+        compuesto: List[bool] = []
+
+        def componer() -> Tuple[OpcionMenu, Optional[str]]:
+            mostrar_menu(menu.hijos, ruta, atras, adelante)
+            compuesto.append(True)
+            # La entrada retiene el menú: mientras exista, su id no se reutiliza
+            return menu, pantalla_actual().cuadro_en_curso()
+
+        # Un cuadro que no se pudo capturar entero (None) se mide infinito: no se guarda
+        _, texto = self.pantallas.obtener((id(menu), tuple(ruta), ANCHO_MARCO, ASCII_MODE, atras, adelante),
+                                          componer, lambda v: sys.getsizeof(v[1]) if v[1] is not None else math.inf)
+        if not compuesto:
+            limpiar_pantalla()
+            escribir(texto, end="")
+
+    def _menus_cambiaron(self):
+        """El árbol de menús se modificó: los cuadros compuestos ya no sirven."""
+        self.pantallas = CacheAcotada(PRESUPUESTO_CACHE_PANTALLAS)
     
+    @cronometrado("recargar")
     def recargar(self) -> bool:
-        """Recarga la documentación. Retorna True si fue exitoso."""
+        """
+        Recarga la documentación de forma incremental. Retorna True si fue exitoso.
+
+        Solo se retokenizan los bloques H2 que cambiaron; el menú se reconstruye
+        y se parchea en el lugar únicamente si cambió la estructura de
+        encabezados, y la ruta actual se conserva hasta el último nivel que
+        siga existiendo.
+        """
         mostrar_mensaje("Recargando DOCUMENTACION.md...", "info")
-        md = cargar_documentacion(RUTA_DOC)
+        md = cargar_buffer(RUTA_DOC)
         
         if not md:
             mostrar_mensaje("Error al recargar la documentación.", "error")
             pausar()
             return False
         
-        nuevas_secciones = parsear_secciones(md)
-        print(f"ℹ️ Secciones detectadas: {len(nuevas_secciones)}")
+        nuevas_secciones, estructura_cambiada = reparsear_secciones(self.secciones, md)
+        escribir(f"ℹ️ Secciones detectadas: {len(nuevas_secciones)}")
         if not nuevas_secciones:
             mostrar_mensaje("No se pudieron detectar secciones.", "error")
             pausar()
             return False
         
         self.secciones = nuevas_secciones
+        if estructura_cambiada:
+            parchear_menu(self.menu_raiz, construir_estructura_menus(nuevas_secciones), nuevas_secciones)
+            self._conservar_ruta()
+            self._menus_cambiaron()
         mostrar_mensaje("Documentación recargada exitosamente.", "success")
         pausar()
         return True
     
+    def _conservar_ruta(self):
+        """Recorta la ruta en el primer menú que ya no cuelga de su padre."""
+        ruta = self.ruta[:1]
+        for opcion, _ in self.ruta[1:]:
+            if not any(hijo is opcion for hijo in ruta[-1][0].hijos):
+                break
+            ruta.append((opcion, opcion.etiqueta))
+        self.ruta = ruta
+    
+    def buscar(self):
+        """
+        Pide una consulta, muestra los resultados y abre el elegido.
+
+        El índice se sincroniza con las secciones vigentes antes de consultar,
+        así que tras una recarga solo se reindexan las secciones que cambiaron.
+        """
+        try:
+            consulta = leer_entrada("\n🔍 Buscar: ").strip()
+        except EOFError:
+            return
+        if not consulta:
+            return
+        if self.buscador.secciones is not self.secciones:
+            escribir("⏳ Indexando documentación...")
+        # Sincronizar y consultar juntos: en el servidor de sesiones el índice
+        # es compartido y otra sesión puede estar en otra versión
+        resultados = self.buscador.buscar(consulta, secciones=self.secciones)
+        if not resultados:
+            mostrar_mensaje(f"Sin resultados para «{consulta}».", "warning")
+            pausar()
+            return
+
+        mostrar_resultados_busqueda(consulta, resultados, self.obtener_ruta_nombres() + ["Búsqueda"])
+        try:
+            eleccion = leer_entrada("\n👉 Resultado a abrir (ENTER para volver): ").strip()
+        except EOFError:
+            return
+        if eleccion.isdigit() and 1 <= int(eleccion) <= len(resultados):
+            self.abrir_resultado(resultados[int(eleccion) - 1])
+        elif eleccion:
+            mostrar_mensaje("Opción inválida.", "warning")
+            pausar()
+
+    def ir_a(self):
+        """
+        Salto directo a una sección por su nombre. Cada texto ingresado
+        muestra los encabezados más parecidos; un número abre el resultado,
+        otro texto refina la búsqueda y ENTER vacío vuelve al menú.
+        """
+        ruta_nombres = self.obtener_ruta_nombres() + ["Ir a"]
+        try:
+            consulta = leer_entrada("\n🧭 Ir a: ").strip()
+            while consulta:
+                resultados = self.titulos.buscar(consulta, secciones=self.secciones)
+                mostrar_resultados_busqueda(consulta, resultados, ruta_nombres)
+                eleccion = leer_entrada("\n👉 Número para abrir, otro texto para refinar (ENTER para volver): ").strip()
+                if eleccion.isdigit() and 1 <= int(eleccion) <= len(resultados):
+                    self.abrir_resultado(resultados[int(eleccion) - 1], "Ir a")
+                    return
+                consulta = eleccion
+        except EOFError:
+            return
+
+    def abrir_resultado(self, resultado: ResultadoBusqueda, origen: str = "Búsqueda"):
+        """
+        Muestra la sección encontrada. Si figura en el menú, la ruta salta al
+        submenú que la contiene, para seguir navegando desde ahí al volver.
+        """
+        contenido = self.secciones.get(resultado.clave, "⚠️ Contenido no disponible")
+        camino = ruta_en_menu(self.menu_raiz, resultado.clave, self.secciones)
+        if camino:
+            *submenus, opcion = camino
+            self._ir_a_ruta(self.ruta[:1] + [(sub, sub.etiqueta) for sub in submenus])
+            mostrar_contenido(opcion.etiqueta, contenido, self.obtener_ruta_nombres() + [opcion.etiqueta])
+        else:
+            mostrar_contenido(resultado.ruta[-1], contenido, ["Inicio", origen, *resultado.ruta])
+
+    def adoptar_instantanea(self) -> bool:
+        """
+        Incorpora la última versión publicada por el vigilante, si hay una nueva.
+        Retorna True si la documentación cambió.
+        """
+        if not self.vigilante:
+            return False
+        instantanea = self.vigilante.instantanea
+        if instantanea is self._instantanea:
+            return False
+        if instantanea.menu_raiz is not self._instantanea.menu_raiz:
+            parchear_menu(self.menu_raiz, instantanea.menu_raiz, instantanea.secciones)
+            self._conservar_ruta()
+            self._menus_cambiaron()
+        self.secciones = instantanea.secciones
+        self._instantanea = instantanea
+        return True
+    
     def ejecutar(self):
         """Loop principal de navegación."""
         while True:
+            actualizada = self.adoptar_instantanea()
             menu_actual = self.obtener_menu_actual()
-            ruta_nombres = self.obtener_ruta_nombres()
             
-            mostrar_menu(menu_actual.hijos, ruta_nombres)
+            with medir_fase("mostrar_menu"):
+                self.mostrar_menu_actual()
+                if actualizada:
+                    escribir("\n🔄 DOCUMENTACION.md cambió en disco: vista actualizada.")
+                # El menú sale a la terminal antes de encargar la precarga
+                volcar_pantalla()
             
+            # Mientras se espera la opción, las secciones de este menú se disponen de antemano
+            if self.precarga:
+                self.precarga.solicitar(self.secciones, menu_actual.hijos, ANCHO_MARCO + 2)
             try:
-                opcion = input("\n👉 Seleccioná una opción: ").strip().upper()
+                opcion = leer_entrada("\n👉 Seleccioná una opción: ").strip().upper()
             except EOFError:
                 mostrar_mensaje("Entrada no disponible. Saliendo del visor.", "warning")
                 break
+            finally:
+                if self.precarga:
+                    self.precarga.cancelar()
             
             # Opción: Salir
             if opcion == 'Q' and len(self.ruta) == 1:
                 limpiar_pantalla()
-                print("\n" + "╔" + "═" * ANCHO_MARCO + "╗")
-                print(linea_marco(centrar_visual(" ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
-                print(linea_marco(centrar_visual(" 🏪  PROYECTO AURELION  🏪 ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
-                print(linea_marco(centrar_visual(" ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
-                print(linea_marco(centrar_visual(" Gracias por usar el Visor de Documentación ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
-                print(linea_marco(centrar_visual(" ¡Hasta pronto! 👋 ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
-                print(linea_marco(centrar_visual(" ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
-                print("╚" + "═" * ANCHO_MARCO + "╝\n")
+                escribir("\n" + "╔" + "═" * ANCHO_MARCO + "╗")
+                escribir(linea_marco(centrar_visual(" ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
+                escribir(linea_marco(centrar_visual(" 🏪  PROYECTO AURELION  🏪 ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
+                escribir(linea_marco(centrar_visual(" ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
+                escribir(linea_marco(centrar_visual(" Gracias por usar el Visor de Documentación ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
+                escribir(linea_marco(centrar_visual(" ¡Hasta pronto! 👋 ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
+                escribir(linea_marco(centrar_visual(" ", ANCHO_MARCO), ANCHO_MARCO, "║", "║"))
+                escribir("╚" + "═" * ANCHO_MARCO + "╝\n")
                 break
             
             # Opción: Volver
             elif opcion == '0' and len(self.ruta) > 1:
                 self.volver_atras()
+
+            # Opciones: Atrás / Adelante en el historial
+            elif opcion == '<':
+                self.historial_atras()
+            elif opcion == '>':
+                self.historial_adelante()
             
             # Opción: Recargar
             elif opcion == 'R':
-                if self.recargar():
-                    # Reconstruir estructura de menús
-                    nuevo_menu = construir_estructura_menus(self.secciones)
-                    self.menu_raiz = nuevo_menu
-                    self.ruta = [(nuevo_menu, "Inicio")]
+                self.recargar()
+
+            # Opción: Buscar
+            elif opcion == 'B':
+                self.buscar()
+
+            # Opción: Ir a una sección
+            elif opcion == 'G':
+                self.ir_a()
             
             # Opción numérica
             elif opcion.isdigit():
@@ -1162,53 +3623,781 @@ class NavegadorMenus:
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# FUNCIÓN PRINCIPAL
+# EXTRACCIÓN DIRECTA DE SECCIONES (--section / --key)
+# ═══════════════════════════════════════════════════════════════════════════════
 
-def main():
-    mostrar_mensaje("Cargando documentación...", "info")
-    md = cargar_documentacion(RUTA_DOC)
-    if not md:
-        mostrar_mensaje("No se pudo cargar DOCUMENTACION.md", "error")
-        return
+def ubicar_seccion(md: TextoDoc, clave: Optional[str] = None,
+                   numero: Optional[str] = None) -> Optional[Tuple[int, int]]:
+    """
+    Rango [inicio, fin) de una sección buscada por clave normalizada o por
+    numeración ("4.3"), sin armar el índice ni los menús: los encabezados se
+    recorren solo hasta el que cierra la sección buscada.
 
+    Las claves se encadenan igual que en `_tokenizar_bloques`. Si una clave
+    se repite, se devuelve la primera aparición; confirmar que no hay otra
+    obligaría a leer el documento entero. Un número repetido se resuelve
+    como en `SeccionesDoc.por_numero`: el encabezado menos profundo y, entre
+    los del mismo nivel, el primero; por eso el recorrido solo se corta
+    antes del final cuando la coincidencia es un H2. Si en lo recorrido hay
+    un marcador con el título en otra línea, se recurre al índice completo
+    (ver _TituloEnOtraLinea).
+    """
+    doc_inicio, doc_fin = _recortar_rango(md, 0, len(md))
+    if doc_inicio == doc_fin:
+        return None
+    if clave == "DOC_COMPLETA":
+        return doc_inicio, doc_fin
+    try:
+        return _ubicar_por_encabezados(md, doc_inicio, doc_fin, clave, numero)
+    except _TituloEnOtraLinea:
+        pass
     secciones = parsear_secciones(md)
-    print(f"ℹ️ Secciones detectadas: {len(secciones)}")
-
-    # Validar presencia de secciones clave
-    requeridas = {
-        "DOC_COMPLETA": secciones.get("DOC_COMPLETA"),
-        "INTRO": secciones.get("INTRO"),
-        "SPRINT1": _find_first_key_by_tokens(secciones, ["sprint", "1"]),
-        "SPRINT2": _find_first_key_by_tokens(secciones, ["sprint", "2"]),
-        "SPRINT3": _find_first_key_by_tokens(secciones, ["sprint", "3"]),
+    if clave == "INTRO":
+        nodo = secciones.nodo("INTRO")
+        return (nodo.inicio, nodo.fin) if nodo else None
+    if clave:
+        nodo = next((nodo for bloque in secciones._bloques for nodo in bloque if nodo.clave == clave), None)
+    else:
+        nodo = secciones.por_numero(numero) if numero else None
+    return (nodo.inicio, nodo.fin) if nodo else None
+
+
+def _ubicar_por_encabezados(md: TextoDoc, doc_inicio: int, doc_fin: int, clave: Optional[str],
+                            numero: Optional[str]) -> Optional[Tuple[int, int]]:
+    if clave == "INTRO":
+        for nivel, _, pos in _iterar_encabezados(md, doc_inicio, doc_fin):
+            if nivel == 2:
+                inicio, fin = _recortar_rango(md, doc_inicio, pos)
+                return (inicio, fin) if inicio < fin else None
+        return None
+
+    # Pila de (nivel, clave) de las secciones abiertas
+    abiertas: List[Tuple[int, str]] = []
+    # [nivel, inicio, fin] de la mejor coincidencia; fin es None mientras siga abierta
+    encontrada: Optional[List] = None
+    for nivel, titulo, pos in _iterar_encabezados(md, doc_inicio, doc_fin):
+        if encontrada:
+            if encontrada[2] is None and nivel <= encontrada[0]:
+                encontrada[2] = pos
+                # Por número, solo un H2 no puede ser superado por uno posterior
+                if clave or encontrada[0] == 2:
+                    break
+            if clave:
+                continue
+        while abiertas and abiertas[-1][0] >= nivel:
+            abiertas.pop()
+        if nivel == 2:
+            prefijo = ""
+        elif abiertas and abiertas[-1][0] == nivel - 1:
+            prefijo = abiertas[-1][1] + "_"
+        else:
+            continue
+        titulo = titulo.strip()
+        clave_nodo = prefijo + normalizar_clave(titulo)
+        abiertas.append((nivel, clave_nodo))
+        if clave:
+            if clave_nodo == clave:
+                encontrada = [nivel, pos, None]
+        elif (numero and titulo[:1].isdigit() and numero_seccion(titulo) == numero
+              and (encontrada is None or nivel < encontrada[0])):
+            encontrada = [nivel, pos, None]
+    if encontrada is None:
+        return None
+    return _recortar_rango(md, encontrada[1], doc_fin if encontrada[2] is None else encontrada[2])
+
+
+def extraer_seccion(clave: Optional[str] = None, numero: Optional[str] = None) -> int:
+    """
+    Modo --section / --key: escribe en stdout el markdown de una sola sección
+    y devuelve el código de salida. El documento se mapea en memoria, se
+    recorre en bytes hasta el final de la sección y el texto sale sin
+    decodificar ni copiar.
+    """
+    try:
+        md = _mapear_archivo(RUTA_DOC)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"❌ No se pudo abrir {RUTA_DOC}: {e}\n")
+        return 1
+    with md:
+        rango = ubicar_seccion(md, clave, numero)
+        if rango is None:
+            sys.stderr.write(f"⚠️ No se encontró la sección {numero or clave!r}\n")
+            return 1
+        salida = getattr(sys.stdout, "buffer", None)
+        try:
+            if salida is None:
+                sys.stdout.write(md[rango[0]:rango[1]].decode("utf-8", errors="replace") + "\n")
+            else:
+                with memoryview(md) as vista:
+                    salida.write(vista[rango[0]:rango[1]])
+                salida.write(b"\n")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            _silenciar_salida()
+    return 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SERVIDOR HTTP DE SOLO LECTURA (--serve)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Cuerpos más chicos que esto viajan sin comprimir: gzip no compensa
+MINIMO_GZIP = 512
+# Segundos que una conexión keep-alive puede quedar ociosa
+ESPERA_CONEXION = 15.0
+
+_RAZONES_HTTP = {200: "OK", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+                 404: "Not Found", 405: "Method Not Allowed"}
+_CABECERAS_CORS = [
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Expose-Headers", "ETag"),
+]
+
+
+class RespuestaJSON(NamedTuple):
+    """Cuerpo JSON ya serializado, su versión gzip (si conviene) y su ETag."""
+    cuerpo: bytes
+    comprimido: Optional[bytes]
+    etag: str
+
+    @property
+    def etag_gzip(self) -> str:
+        # La variante comprimida es otra representación: lleva su propio ETag
+        return self.etag[:-1] + '-gz"'
+
+
+def respuesta_json(datos: object) -> RespuestaJSON:
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    comprimido = gzip.compress(cuerpo, 6, mtime=0) if len(cuerpo) >= MINIMO_GZIP else None
+    if comprimido is not None and len(comprimido) >= len(cuerpo):
+        comprimido = None
+    return RespuestaJSON(cuerpo, comprimido, '"%s"' % hashlib.blake2b(cuerpo, digest_size=12).hexdigest())
+
+
+def _memoria_respuesta(respuesta: RespuestaJSON) -> int:
+    return sys.getsizeof(respuesta.cuerpo) + (sys.getsizeof(respuesta.comprimido) if respuesta.comprimido else 0)
+
+
+def _acepta_gzip(valor: str) -> bool:
+    """
+    Interpreta Accept-Encoding: manda la entrada explícita de gzip y "*" vale
+    solo si gzip no figura. Las entradas con un q ilegible se ignoran.
+    """
+    calidades: Dict[str, float] = {}
+    for opcion in valor.lower().split(","):
+        nombre, *parametros = opcion.split(";")
+        q = 1.0
+        for parametro in parametros:
+            clave, _, numero = parametro.partition("=")
+            if clave.strip() == "q":
+                try:
+                    q = float(numero)
+                except ValueError:
+                    q = math.nan
+        if nombre.strip() and not math.isnan(q):
+            calidades[nombre.strip()] = q
+    return calidades.get("gzip", calidades.get("*", 0.0)) > 0
+
+
+def _coincide_etag(valor: str, etags: Tuple[str, ...]) -> bool:
+    """If-None-Match: comparación débil contra cualquiera de los ETag de la respuesta."""
+    for etiqueta in valor.split(","):
+        etiqueta = etiqueta.strip()
+        if etiqueta == "*" or (etiqueta[2:] if etiqueta.startswith("W/") else etiqueta) in etags:
+            return True
+    return False
+
+
+def _ficha_nodo(nodo: NodoSeccion) -> dict:
+    return {"clave": nodo.clave, "titulo": nodo.titulo, "nivel": nodo.nivel,
+            "numero": numero_seccion(nodo.titulo) if nodo.nivel else None}
+
+
+def arbol_secciones(secciones: SeccionesDoc) -> dict:
+    """
+    Árbol de encabezados en JSON, sin el texto: cada nodo trae su clave para
+    pedir después solo la sección que se va a mostrar, y su tamaño en el
+    buffer (caracteres, o bytes con --mmap) para decidir si conviene pedirla.
+    """
+    def nodo_json(nodo: NodoSeccion) -> dict:
+        ficha = _ficha_nodo(nodo)
+        ficha["tamano"] = nodo.fin - nodo.inicio
+        ficha["hijos"] = [nodo_json(hijo) for hijo in nodo.hijos]
+        return ficha
+
+    especiales = [secciones.nodo(c) for c in ("DOC_COMPLETA", "INTRO") if c in secciones]
+    return {
+        "secciones": len(secciones),
+        "especiales": [dict(_ficha_nodo(n), tamano=n.fin - n.inicio) for n in especiales],
+        "arbol": [nodo_json(raiz) for raiz in secciones.raices()],
     }
-    faltantes = [k for k, v in requeridas.items() if not v]
-    if faltantes:
-        print(f"⚠️ Secciones faltantes: {', '.join(faltantes)}")
-    
-    # Construir estructura de menús
-    print("🏗️  Construyendo estructura de menús...")
-    menu_raiz = construir_estructura_menus(secciones)
-    
-    # Iniciar navegador o demo
-    if DEMO_MODE:
-        print("✅ Sistema listo. Modo demo activado.\n")
+
+
+def seccion_json(secciones: SeccionesDoc, nodo: NodoSeccion) -> dict:
+    """Una sección con su markdown, la ruta de títulos hasta ella y sus subsecciones."""
+    ruta: List[dict] = []
+    ancestro = nodo.padre
+    while ancestro is not None:
+        ruta.append(_ficha_nodo(ancestro))
+        ancestro = ancestro.padre
+    ficha = _ficha_nodo(nodo)
+    ficha["ruta"] = ruta[::-1]
+    ficha["hijos"] = [_ficha_nodo(hijo) for hijo in nodo.hijos]
+    ficha["contenido"] = secciones.fragmento(nodo.inicio, nodo.fin)
+    return ficha
+
+
+class ServidorDocumentacion:
+    """
+    API JSON de solo lectura sobre un único índice de secciones, compartido
+    por todas las conexiones:
+
+        GET /api/secciones            árbol de encabezados, sin texto
+        GET /api/secciones/<clave>    una sección por su clave normalizada
+        GET /api/numeros/<numero>     una sección por su numeración ("4.3")
+
+    Cada respuesta se serializa y comprime una sola vez, en un hilo del
+    executor, y queda en una CacheAcotada junto con su ETag; las siguientes
+    peticiones (o un 304 si el cliente ya la tiene) solo cuestan la
+    escritura en el socket. Con un vigilante, cada instantanea nueva
+    reemplaza el índice y descarta las respuestas de la versión anterior.
+    """
+
+    def __init__(self, instantanea: Instantanea, vigilante: Optional[VigilanteDocumento] = None):
+        self.vigilante = vigilante
+        self._adoptar(instantanea)
+
+    def _adoptar(self, instantanea: Instantanea):
+        self._instantanea = instantanea
+        self._respuestas = CacheAcotada(PRESUPUESTO_CACHE_RESPUESTAS)
+
+    @property
+    def secciones(self) -> SeccionesDoc:
+        if self.vigilante and self.vigilante.instantanea is not self._instantanea:
+            self._adoptar(self.vigilante.instantanea)
+        return self._instantanea.secciones
+
+    def _recurso(self, ruta: str) -> Optional[RespuestaJSON]:
+        secciones = self.secciones
+        if ruta.rstrip("/") == "/api/secciones":
+            return self._respuestas.obtener(None, lambda: respuesta_json(arbol_secciones(secciones)),
+                                            _memoria_respuesta)
+        coleccion, _, valor = ruta.rpartition("/")
+        if coleccion == "/api/secciones":
+            nodo = secciones.nodo(valor)
+        elif coleccion == "/api/numeros":
+            nodo = secciones.por_numero(valor.rstrip("."))
+        else:
+            return None
+        if nodo is None:
+            return None
+        return self._respuestas.obtener(nodo, lambda: respuesta_json(seccion_json(secciones, nodo)),
+                                        _memoria_respuesta)
+
+    def responder(self, metodo: str, objetivo: str,
+                  encabezados: Dict[str, str]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """Estado, cabeceras y cuerpo para una petición ya leída del socket."""
+        if metodo == "OPTIONS":
+            return 204, _CABECERAS_CORS + [
+                ("Access-Control-Allow-Methods", "GET, HEAD, OPTIONS"),
+                ("Access-Control-Allow-Headers", "If-None-Match"),
+                ("Access-Control-Max-Age", "86400"),
+            ], b""
+        if metodo not in ("GET", "HEAD"):
+            return self._error(405, "Método no permitido", [("Allow", "GET, HEAD, OPTIONS")])
+
+        respuesta = self._recurso(unquote(urlsplit(objetivo).path))
+        if respuesta is None:
+            return self._error(404, "Recurso no encontrado")
+
+        cabeceras = _CABECERAS_CORS + [("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        if respuesta.comprimido is not None and _acepta_gzip(encabezados.get("accept-encoding", "")):
+            cuerpo, etag = respuesta.comprimido, respuesta.etag_gzip
+            cabeceras.append(("Content-Encoding", "gzip"))
+        else:
+            cuerpo, etag = respuesta.cuerpo, respuesta.etag
+        cabeceras.append(("ETag", etag))
+        condicion = encabezados.get("if-none-match")
+        if condicion and _coincide_etag(condicion, (respuesta.etag, respuesta.etag_gzip)):
+            return 304, cabeceras, b""
+        cabeceras.append(("Content-Type", "application/json; charset=utf-8"))
+        return 200, cabeceras, cuerpo
+
+    @staticmethod
+    def _error(estado: int, mensaje: str,
+               extra: Optional[List[Tuple[str, str]]] = None) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        cuerpo = json.dumps({"error": mensaje}, ensure_ascii=False).encode("utf-8")
+        return estado, _CABECERAS_CORS + (extra or []) + [
+            ("Content-Type", "application/json; charset=utf-8")], cuerpo
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        """Atiende las peticiones de una conexión, con keep-alive en HTTP/1.1."""
+        try:
+            while True:
+                try:
+                    linea = await asyncio.wait_for(lector.readline(), ESPERA_CONEXION)
+                except asyncio.TimeoutError:
+                    break
+                if not linea.strip():
+                    break
+                partes = linea.decode("latin-1").split()
+                encabezados: Dict[str, str] = {}
+                while True:
+                    cabecera = await lector.readline()
+                    if cabecera in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = cabecera.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+                if len(partes) != 3 or not partes[2].startswith("HTTP/"):
+                    estado, cabeceras, cuerpo = self._error(400, "Petición mal formada")
+                    mantener, metodo = False, "GET"
+                else:
+                    metodo, objetivo, version = partes
+                    largo = encabezados.get("content-length", "0")
+                    if largo.isdigit() and int(largo):
+                        await lector.readexactly(int(largo))
+                    # Serializar y comprimir una sección grande por primera vez
+                    # lleva tiempo: se hace en un hilo para no frenar al resto
+                    estado, cabeceras, cuerpo = await asyncio.get_running_loop().run_in_executor(
+                        None, self.responder, metodo, objetivo, encabezados)
+                    mantener = version == "HTTP/1.1" and encabezados.get("connection", "").lower() != "close"
+                lineas = [f"HTTP/1.1 {estado} {_RAZONES_HTTP[estado]}"]
+                lineas += [f"{nombre}: {valor}" for nombre, valor in cabeceras]
+                if estado != 304 and estado != 204:
+                    lineas.append(f"Content-Length: {len(cuerpo)}")
+                lineas.append("Connection: " + ("keep-alive" if mantener else "close"))
+                escritor.write("\r\n".join(lineas).encode("latin-1") + b"\r\n\r\n")
+                if metodo != "HEAD" and estado != 304:
+                    escritor.write(cuerpo)
+                await escritor.drain()
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Cliente que cortó a mitad de camino o cabeceras fuera de límite
+            pass
+        except asyncio.CancelledError:
+            # El servidor se está cerrando: la conexión termina sin más
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, anfitrion: str, puerto: int):
+        servidor = await asyncio.start_server(self.atender, anfitrion, puerto)
+        direcciones = ", ".join(f"http://{s.getsockname()[0]}:{s.getsockname()[1]}/api/secciones"
+                                for s in servidor.sockets)
+        escribir(f"🌐 API de documentación en {direcciones} (Ctrl+C para terminar)")
+        volcar_pantalla()
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def servir_documentacion(anfitrion: str, puerto: int, vigilar: bool, intervalo: float) -> int:
+    """Modo --serve: carga el índice una vez y lo expone por HTTP hasta Ctrl+C."""
+    md = cargar_buffer(RUTA_DOC)
+    if not md:
+        mostrar_mensaje("No se pudo cargar DOCUMENTACION.md", "error")
+        volcar_pantalla()
+        return 1
+    secciones, menu_raiz = obtener_indice(RUTA_DOC, md)
+    escribir(f"ℹ️ Secciones detectadas: {len(secciones)}")
+    inicial = Instantanea(secciones, menu_raiz, _firma_stat(RUTA_DOC) or (0, 0))
+    vigilante = VigilanteDocumento(RUTA_DOC, inicial, intervalo) if vigilar else None
+    if vigilante:
+        vigilante.start()
+    try:
+        asyncio.run(ServidorDocumentacion(inicial, vigilante).servir(anfitrion, puerto))
+    except KeyboardInterrupt:
+        escribir("\n👋 Servidor detenido.")
+    except OSError as e:
+        mostrar_mensaje(f"No se pudo abrir {anfitrion}:{puerto}: {e}", "error")
+        return 1
+    finally:
+        if vigilante:
+            vigilante.detener()
+        volcar_pantalla()
+    return 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SESIONES REMOTAS (--sessions)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+DIRECCION_SESIONES = "127.0.0.1:8766"
+MAX_SESIONES = 64
+# Medidas de la terminal que se asumen para cada sesión: el marco es global
+# (ANCHO_MARCO), así que todas las sesiones comparten el mismo ancho.
+COLUMNAS_SESION = 80
+FILAS_SESION = 24
+
+
+class TerminalSesion(CompositorPantalla):
+    """
+    Pantalla de una sesión remota: los cuadros salen por el socket de la
+    conexión y las respuestas llegan como líneas encoladas por el lazo de
+    asyncio. Cuando el cliente corta, toda lectura posterior da EOFError,
+    igual que con la entrada estándar cerrada.
+    """
+
+    def __init__(self, enviar: Callable[[bytes], None],
+                 columnas: int = COLUMNAS_SESION, filas: int = FILAS_SESION):
+        super().__init__()
+        self._enviar = enviar
+        self._medidas = os.terminal_size((columnas, filas))
+        self._lineas: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._cerrada = False
+
+    def recibir(self, linea: Optional[str]):
+        """Encola una línea del cliente; None indica que la conexión terminó."""
+        self._lineas.put(linea)
+
+    def es_terminal(self) -> bool:
+        return True
+
+    def medidas(self) -> os.terminal_size:
+        return self._medidas
+
+    def _emitir(self, texto: str):
+        self._enviar(texto.encode("utf-8"))
+
+    def _pedir(self, mensaje: str) -> str:
+        if not self._cerrada:
+            self._emitir(mensaje)
+            linea = self._lineas.get()
+            if linea is not None:
+                return linea
+            self._cerrada = True
+        raise EOFError
+
+
+class SesionNavegador(NavegadorMenus):
+    """
+    Navegador de una sesión remota. El índice y el árbol de menús son los
+    de la instantánea compartida y no se modifican: [R] adopta la última
+    versión publicada por el servidor en lugar de releer el archivo, y al
+    adoptarla la sesión cambia de árbol y reubica su ruta por claves, sin
+    parchear el árbol que usan las demás sesiones. Por eso los cuadros de
+    menú compuestos valen para todas y se guardan en la caché del servidor.
+    """
+
+    def __init__(self, servidor: "ServidorSesiones"):
+        instantanea = servidor.instantanea
+        super().__init__(instantanea.menu_raiz, instantanea.secciones,
+                         buscador=servidor.buscador, titulos=servidor.titulos,
+                         pantallas=servidor.pantallas)
+        self.servidor = servidor
+        self._instantanea = instantanea
+
+    @cronometrado("recargar")
+    def recargar(self) -> bool:
+        if self.adoptar_instantanea():
+            mostrar_mensaje("Documentación actualizada a la última versión publicada.", "success")
+        else:
+            mostrar_mensaje("La documentación ya está al día.", "info")
         pausar()
-        clave_tldr = _find_first_key_by_tokens(secciones, ["TLDR"]) or "DOC_COMPLETA"
-        contenido_demo = secciones.get(clave_tldr, "Contenido no disponible")
-        mostrar_contenido("DEMO - Resumen Ejecutivo (TL;DR)", contenido_demo, ["Inicio", "Demo"])
-        print("\n" + "═" * ANCHO_MARCO)
-        print("  ✅ Modo demo completado. El visor está funcionando correctamente.")
-        print("  💡 Ejecutá 'python programa.py' sin --demo para usar el modo interactivo.")
-        print("═" * ANCHO_MARCO + "\n")
-        return
+        return True
+
+    def adoptar_instantanea(self) -> bool:
+        instantanea = self.servidor.instantanea
+        if instantanea is self._instantanea:
+            return False
+        if instantanea.menu_raiz is not self.menu_raiz:
+            self.menu_raiz = instantanea.menu_raiz
+            ruta = [(self.menu_raiz, "Inicio")]
+            for opcion, _ in self.ruta[1:]:
+                padre = ruta[-1][0]
+                igual = next((h for h in expandir_submenu(padre, instantanea.secciones)
+                              if h.clave == opcion.clave and h.tipo == opcion.tipo), None)
+                if igual is None:
+                    break
+                ruta.append((igual, igual.etiqueta))
+            # El árbol anterior no cambió: sus cuadros siguen en la caché
+            # compartida para las sesiones que todavía lo usan
+            self.ruta = ruta
+        self.secciones = instantanea.secciones
+        self._instantanea = instantanea
+        return True
+
+
+class ServidorSesiones:
+    """
+    Servidor de sesiones del visor por TCP o socket Unix: cada conexión es
+    un visor completo (menús, búsqueda, paginador) sobre un único índice
+    compartido e inmutable, así que por sesión solo se guarda el estado de
+    navegación y el último cuadro enviado.
+
+    El navegador está escrito alrededor de una entrada bloqueante, de modo
+    que su lazo corre en un hilo del pool de sesiones mientras el socket lo
+    atiende una tarea de asyncio: la tarea encola las líneas que llegan y
+    los cuadros vuelven al lazo con `call_soon_threadsafe`. Un hilo dormido
+    en la entrada solo ocupa su pila; lo que crece con el contenido (índices
+    y cuadros de menú compuestos) es uno por servidor, con su presupuesto.
+    """
+
+    def __init__(self, instantanea: Instantanea, vigilante: Optional[VigilanteDocumento] = None,
+                 max_sesiones: int = MAX_SESIONES):
+        self.vigilante = vigilante
+        self._inicial = instantanea
+        self.max_sesiones = max_sesiones
+        self.buscador, self.titulos = IndiceBusqueda(), IndiceTitulos()
+        self.pantallas = CacheAcotada(PRESUPUESTO_CACHE_PANTALLAS)
+        self._terminales: set = set()
+        self._hilos = ThreadPoolExecutor(max_workers=max_sesiones, thread_name_prefix="sesion-visor")
+
+    @property
+    def instantanea(self) -> Instantanea:
+        return self.vigilante.instantanea if self.vigilante else self._inicial
+
+    @property
+    def activas(self) -> int:
+        return len(self._terminales)
+
+    def _ejecutar_sesion(self, terminal: TerminalSesion):
+        _PANTALLA_SESION.set(terminal)
+        actualizar_ancho_marco()
+        try:
+            SesionNavegador(self).ejecutar()
+        except (EOFError, BrokenPipeError):
+            pass
+        finally:
+            terminal.volcar()
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        if self.activas >= self.max_sesiones:
+            escritor.write("⚠️ El visor alcanzó el máximo de sesiones. Probá más tarde.\n".encode("utf-8"))
+            await escritor.drain()
+            escritor.close()
+            return
+
+        lazo = asyncio.get_running_loop()
+
+        def enviar(datos: bytes):
+            if not escritor.is_closing():
+                escritor.write(datos)
 
-    print("✅ Sistema listo. Iniciando navegador...\n")
-    pausar()
+        terminal = TerminalSesion(lambda datos: lazo.call_soon_threadsafe(enviar, datos))
+        self._terminales.add(terminal)
+        # Contexto nuevo por sesión: la pantalla activa no se filtra a otros hilos del pool
+        sesion = lazo.run_in_executor(self._hilos, Context().run, self._ejecutar_sesion, terminal)
+        lectura = asyncio.ensure_future(self._leer(lector, terminal))
+        try:
+            await sesion
+            await escritor.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # Cliente desconectado, o el servidor se está cerrando
+            pass
+        finally:
+            self._terminales.discard(terminal)
+            lectura.cancel()
+            escritor.close()
+
+    @staticmethod
+    async def _leer(lector: asyncio.StreamReader, terminal: TerminalSesion):
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                terminal.recibir(linea.decode("utf-8", errors="replace").rstrip("\r\n"))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            terminal.recibir(None)
+
+    async def servir(self, direccion: str):
+        indexar_en_segundo_plano(self.instantanea.secciones, self.titulos, self.buscador)
+        if direccion.startswith("unix:"):
+            ruta = direccion[len("unix:"):]
+            servidor = await asyncio.start_unix_server(self.atender, ruta)
+            descripcion = ruta
+        else:
+            anfitrion, _, puerto = direccion.rpartition(":")
+            servidor = await asyncio.start_server(self.atender, anfitrion or ANFITRION_SERVIDOR, int(puerto))
+            descripcion = ", ".join("%s:%s" % s.getsockname()[:2] for s in servidor.sockets)
+        escribir(f"🖥️ Sesiones del visor en {descripcion} (hasta {self.max_sesiones}; Ctrl+C para terminar)")
+        volcar_pantalla()
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            # Las sesiones abiertas reciben fin de entrada y sus hilos terminan
+            for terminal in list(self._terminales):
+                terminal.recibir(None)
+            self._hilos.shutdown(wait=False)
+
+
+def servir_sesiones(direccion: str, vigilar: bool, intervalo: float) -> int:
+    """Modo --sessions: carga el índice una vez y atiende sesiones del visor hasta Ctrl+C."""
+    md = cargar_buffer(RUTA_DOC)
+    if not md:
+        mostrar_mensaje("No se pudo cargar DOCUMENTACION.md", "error")
+        volcar_pantalla()
+        return 1
+    secciones, menu_raiz = obtener_indice(RUTA_DOC, md)
+    escribir(f"ℹ️ Secciones detectadas: {len(secciones)}")
+    inicial = Instantanea(secciones, menu_raiz, _firma_stat(RUTA_DOC) or (0, 0))
+    vigilante = VigilanteDocumento(RUTA_DOC, inicial, intervalo) if vigilar else None
+    if vigilante:
+        vigilante.start()
+    try:
+        asyncio.run(ServidorSesiones(inicial, vigilante).servir(direccion))
+    except KeyboardInterrupt:
+        escribir("\n👋 Servidor de sesiones detenido.")
+    except (OSError, ValueError) as e:
+        mostrar_mensaje(f"No se pudo abrir {direccion}: {e}", "error")
+        return 1
+    finally:
+        if vigilante:
+            vigilante.detener()
+        volcar_pantalla()
+    return 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FUNCIÓN PRINCIPAL
+
+def _parsear_argumentos(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Visor interactivo de DOCUMENTACION.md")
+    parser.add_argument("--demo", action="store_true",
+                        help="Muestra solo el resumen ejecutivo, sin entrada interactiva")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Mapea el documento en memoria y decodifica solo la sección mostrada")
+    parser.add_argument("--watch", action="store_true",
+                        help="Vigila DOCUMENTACION.md y actualiza la vista cuando cambia")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_VIGILANCIA,
+                        help="Segundos entre sondeos en modo --watch (por defecto %(default)s)")
+    seccion = parser.add_mutually_exclusive_group()
+    seccion.add_argument("--section", metavar="NUMERO",
+                         help="Escribe solo la sección con esa numeración (p. ej. \"4.3\") y termina")
+    seccion.add_argument("--key", metavar="CLAVE",
+                         help="Escribe solo la sección con esa clave normalizada y termina")
+    parser.add_argument("--prefetch", type=float, default=PRESUPUESTO_PRECARGA / 2**20, metavar="MB",
+                        help="Memoria para precargar las secciones del menú actual "
+                             "(por defecto %(default)g MB; 0 la desactiva)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Expone el árbol de secciones y cada sección como API JSON por HTTP")
+    parser.add_argument("--host", default=ANFITRION_SERVIDOR,
+                        help="Dirección en la que escucha --serve (por defecto %(default)s)")
+    parser.add_argument("--port", type=int, default=PUERTO_SERVIDOR,
+                        help="Puerto de --serve (por defecto %(default)s)")
+    parser.add_argument("--sessions", nargs="?", const=DIRECCION_SESIONES, metavar="DIRECCION",
+                        help="Atiende sesiones del visor por TCP (HOST:PUERTO, por defecto "
+                             f"{DIRECCION_SESIONES}) o por socket Unix (unix:RUTA)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="RUTA_JSON",
+                        help="Al salir, muestra p50/p95/p99 de cada fase (carga, parseo, menús, "
+                             "pantallas, recargas) y, con RUTA_JSON, los guarda como JSON")
+    parser.add_argument("--mem-report", action="store_true",
+                        help="Sigue la memoria con tracemalloc y al salir la reparte entre documento, "
+                             "secciones, menús, índices y cachés, con el pico y lo retenido")
+    return parser.parse_args(argv)
+
+
+def _silenciar_salida():
+    """
+    El lector cerró el pipe (`| head`, o `| less` al salir): lo que quede por
+    escribir va a parar a /dev/null, así el cierre del intérprete no vuelve a
+    fallar al vaciar stdout.
+    """
+    nulo = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(nulo, sys.stdout.fileno())
+    finally:
+        os.close(nulo)
+
+
+def main(argv: Optional[List[str]] = None) -> Optional[int]:
+    global _PERFIL, _MEMORIA
+    args = _parsear_argumentos(argv)
+    if args.profile is None and not args.mem_report:
+        return ejecutar_visor(args)
+    if args.mem_report:
+        _MEMORIA = InformeMemoria()
+    if args.profile is not None:
+        _PERFIL = RegistroLatencias()
+    try:
+        return ejecutar_visor(args)
+    finally:
+        if _PERFIL:
+            informar_perfil(_PERFIL, args.profile)
+        if _MEMORIA:
+            informar_memoria(_MEMORIA)
+
+
+def ejecutar_visor(args: argparse.Namespace) -> Optional[int]:
+    global DEMO_MODE, MMAP_MODE, PIPE_MODE
+    if args.section or args.key:
+        return extraer_seccion(args.key, args.section.strip().rstrip(".") if args.section else None)
+    DEMO_MODE = DEMO_MODE or args.demo
+    MMAP_MODE = MMAP_MODE or args.mmap
+    if args.serve:
+        return servir_documentacion(args.host, args.port, args.watch, args.intervalo)
+    if args.sessions:
+        return servir_sesiones(args.sessions, args.watch, args.intervalo)
+    # Con la salida redirigida no hay pausas: las secciones salen enteras
+    PIPE_MODE = PIPE_MODE or not _es_terminal()
+    actualizar_ancho_marco()
+    try:
+        mostrar_mensaje("Cargando documentación...", "info")
+        md = cargar_buffer(RUTA_DOC)
+        if not md:
+            mostrar_mensaje("No se pudo cargar DOCUMENTACION.md", "error")
+            return 1
+
+        # Índice y menús: desde la caché en disco si el documento no cambió
+        secciones, menu_raiz = obtener_indice(RUTA_DOC, md)
+        escribir(f"ℹ️ Secciones detectadas: {len(secciones)}")
+        anotar_memoria("carga", secciones, menu_raiz)
+
+        # Validar presencia de las secciones que la especificación marca como requeridas
+        faltantes = cargar_especificacion_menu(RUTA_MENU).faltantes(secciones)
+        if faltantes:
+            escribir(f"⚠️ Secciones faltantes: {', '.join(faltantes)}")
+    
+        # Iniciar navegador o demo
+        if DEMO_MODE:
+            escribir("✅ Sistema listo. Modo demo activado.\n")
+            pausar()
+            clave_tldr = _primeras_claves_por_tokens(secciones, [("TLDR",)]).get(("TLDR",), "DOC_COMPLETA")
+            contenido_demo = secciones.get(clave_tldr, "Contenido no disponible")
+            mostrar_contenido("DEMO - Resumen Ejecutivo (TL;DR)", contenido_demo, ["Inicio", "Demo"])
+            escribir("\n" + "═" * ANCHO_MARCO)
+            escribir("  ✅ Modo demo completado. El visor está funcionando correctamente.")
+            escribir("  💡 Ejecutá 'python programa.py' sin --demo para usar el modo interactivo.")
+            escribir("═" * ANCHO_MARCO + "\n")
+            anotar_memoria("demo", secciones, menu_raiz)
+            return
+
+        escribir("✅ Sistema listo. Iniciando navegador...\n")
+        pausar()
     
-    navegador = NavegadorMenus(menu_raiz, secciones)
-    navegador.ejecutar()
+        vigilante = None
+        if args.watch:
+            inicial = Instantanea(secciones, menu_raiz, _firma_stat(RUTA_DOC) or (0, 0))
+            vigilante = VigilanteDocumento(RUTA_DOC, inicial, args.intervalo)
+            vigilante.start()
+
+        buscador, titulos = IndiceBusqueda(), IndiceTitulos()
+        indexar_en_segundo_plano(secciones, titulos, buscador)
+        precarga = PrecargaSecciones(int(args.prefetch * 2**20)) if args.prefetch > 0 else None
+        if precarga:
+            precarga.start()
+        navegador = NavegadorMenus(menu_raiz, secciones, vigilante, buscador, titulos, precarga)
+        try:
+            navegador.ejecutar()
+        finally:
+            anotar_memoria("navegación", navegador.secciones, navegador.menu_raiz, navegador)
+            if vigilante:
+                vigilante.detener()
+            if precarga:
+                precarga.detener()
+    except BrokenPipeError:
+        _silenciar_salida()
+    finally:
+        # Lo que quedó en el cuadro en curso sale antes de devolver el control
+        try:
+            volcar_pantalla()
+        except BrokenPipeError:
+            _silenciar_salida()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,877 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de regresión del índice de secciones del visor (programa.py).
+
+Comparan el parser de un solo recorrido con la versión original por niveles
+sobre los mismos documentos, la recarga incremental con un parseo completo
+tras ediciones al azar, y el índice leído de la caché (.visor_cache) con el
+que se escribió. También cubren los índices de búsqueda compartidos entre
+sesiones en versiones distintas y las respuestas de la API HTTP de --serve,
+y hacen una pasada corta del benchmark de repetición de sesiones.
+
+Uso (desde esta carpeta):
+    python -m pytest -q test_programa.py
+    python -m unittest test_programa
+"""
+
+import contextlib
+import gzip
+import io
+import json
+import math
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from contextvars import Context
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import benchmark_visor
+import programa
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# VERSIÓN ORIGINAL DEL PARSER (REFERENCIA)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _normalizar_clave_original(titulo: str) -> str:
+    titulo = re.sub(r'[^\w\s\-]', '', titulo)
+    titulo = re.sub(r'\s+', '_', titulo.strip())
+    return titulo.upper()
+
+
+def parsear_por_niveles(md: str) -> Dict[str, str]:
+    """El parser anterior al recorrido único: una búsqueda por nivel dentro de cada sección."""
+    secciones: Dict[str, str] = {}
+    md = md.strip()
+    if not md:
+        return secciones
+    secciones["DOC_COMPLETA"] = md
+
+    patron_h2 = re.compile(r"^##\s+(.+?)$", re.MULTILINE)
+    patron_h3 = re.compile(r"^###\s+(.+?)$", re.MULTILINE)
+    patron_h4 = re.compile(r"^####\s+(.+?)$", re.MULTILINE)
+
+    matches_h2 = list(patron_h2.finditer(md))
+    if matches_h2:
+        intro = md[:matches_h2[0].start()].strip()
+        if intro:
+            secciones["INTRO"] = intro
+
+    for i, match in enumerate(matches_h2):
+        fin = matches_h2[i + 1].start() if i + 1 < len(matches_h2) else len(md)
+        contenido = md[match.start():fin].strip()
+        clave = _normalizar_clave_original(match.group(1).strip())
+        secciones[clave] = contenido
+
+        matches_h3 = list(patron_h3.finditer(contenido))
+        for j, sub in enumerate(matches_h3):
+            sub_fin = matches_h3[j + 1].start() if j + 1 < len(matches_h3) else len(contenido)
+            sub_contenido = contenido[sub.start():sub_fin].strip()
+            sub_clave = f"{clave}_{_normalizar_clave_original(sub.group(1).strip())}"
+            secciones[sub_clave] = sub_contenido
+
+            matches_h4 = list(patron_h4.finditer(sub_contenido))
+            for k, h4 in enumerate(matches_h4):
+                h4_fin = matches_h4[k + 1].start() if k + 1 < len(matches_h4) else len(sub_contenido)
+                h4_clave = f"{sub_clave}_{_normalizar_clave_original(h4.group(1).strip())}"
+                secciones[h4_clave] = sub_contenido[h4.start():h4_fin].strip()
+
+    return secciones
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DOCUMENTOS DE PRUEBA
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def documento_sintetico() -> str:
+    """Documento chico con los casos raros: huérfanos, claves repetidas, H4 bajo un H2, numeraciones."""
+    partes = ["# Título\n\nintro\n\n### H3 antes del primer H2\n\n#### H4 huérfano\n",
+              "## TLDR - Resumen\n\ntexto\n#### 0.1 H4 directo en el H2\nx\n",
+              "## 2. Sprint 1\n\n### 2.2 Datasets\nd\n#### 2.2.1 Clientes\nc\n### 2.1 Problema\np\n### Sin número\nz\n"]
+    for i in range(1, 5):
+        partes.append(f"### 3.{i} Etapa {i} limpieza y normalización\n\ncuerpo {i}\n")
+        for j in range(1, 4):
+            partes.append(f"#### 3.{i}.{j} Objetivo {j}\n\ntexto {j}\n```output\nsalida {j}\n```\n")
+    partes.append("## 5. Referencias\nr\n## Glosario de Términos\ng\n## Outputs\n### Métricas\n  \n"
+                  "## Glosario de Términos\nduplicado\n## 6. Cierre\nv\n   \n\n")
+    return "\n".join(partes)
+
+
+def _leer_documentacion() -> str:
+    with open(programa.RUTA_DOC, encoding="utf-8") as f:
+        return f.read()
+
+
+DOCUMENTOS: List[Tuple[str, str]] = [
+    ("documentación", _leer_documentacion()),
+    ("sintético", documento_sintetico()),
+    ("sin encabezados", "Solo un párrafo.\n\nY otro.\n"),
+    ("en blanco", "  \n\t\n"),
+    ("encabezado con sangría al inicio", "   ## Uno\nx\n### 1.1 Dos\ny\n"),
+    ("título en la línea siguiente", "Intro\n\n##\nPrimero\n\ntexto\n### \n## Segundo\n\nmás\n"
+                                     "#### \n\nh4\n## Tercero\n### 3.1 Sub\n####\n\n#### 3.1.1 Hoja\nfin\n"),
+    ("marcador con espacios raros", "## A\n\n### \x0b\nB\n## C\nc\n"),
+    ("fin de línea CRLF", "## Uno\r\ntexto\r\n### 1.1 Dos\r\nmás\r\n"),
+    ("números repetidos", "## A\n### 2.1 Hondo\nx\n#### 2.1.1 Más\n## 2.1 Arriba\ny\n### 2.1 Otro\nz\n"
+                          "## 3. Tres\n### 3.1 Uno\n#### 3.1 Cuatro\n### 3.1 Dos\nw\n## 3.1\n"),
+]
+
+# Fragmentos que las ediciones al azar insertan en el documento
+FRAGMENTOS = ["\n## Nueva H2\n", "\n### 3.9 Nueva H3\n", "\n#### 3.9.1 Nueva H4\n", "texto ", "\n", "  ",
+              "## ", "\n## Glosario de Términos\n", "\n## \n", "\n###\n\n", "x"]
+
+
+def editar_al_azar(md: str, azar: random.Random) -> str:
+    for _ in range(azar.randint(1, 3)):
+        pos = azar.randint(0, len(md))
+        if azar.random() < 0.5:
+            md = md[:pos] + azar.choice(FRAGMENTOS) + md[pos:]
+        else:
+            md = md[:pos] + md[pos + azar.randint(1, 40):]
+    return md
+
+
+def _arbol(secciones: programa.SeccionesDoc) -> list:
+    return [(n.clave, n.inicio, n.fin, n.padre.clave if n.padre else None, [h.clave for h in n.hijos])
+            for bloque in secciones._bloques for n in bloque]
+
+
+def _menu(secciones: programa.SeccionesDoc) -> tuple:
+    return programa._menu_a_tupla(programa.construir_estructura_menus(secciones))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PRUEBAS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class ParserTest(unittest.TestCase):
+    """El recorrido único debe dar las mismas claves, en el mismo orden y con el mismo texto."""
+
+    def test_mismas_secciones_que_la_version_original(self):
+        for nombre, md in DOCUMENTOS:
+            with self.subTest(documento=nombre):
+                self.assertEqual(list(programa.parsear_secciones(md).items()),
+                                 list(parsear_por_niveles(md).items()))
+
+    def test_mismas_secciones_tras_ediciones_al_azar(self):
+        azar = random.Random(1)
+        for i in range(300):
+            md = editar_al_azar(documento_sintetico(), azar)
+            with self.subTest(edicion=i):
+                self.assertEqual(list(programa.parsear_secciones(md).items()),
+                                 list(parsear_por_niveles(md).items()))
+
+    def test_archivo_mapeado_da_las_mismas_secciones(self):
+        for nombre, md in DOCUMENTOS:
+            if "\r" in md:
+                continue  # el modo --mmap normaliza CRLF al decodificar
+            with self.subTest(documento=nombre):
+                self.assertEqual(list(programa.parsear_secciones(md.encode("utf-8")).items()),
+                                 list(programa.parsear_secciones(md).items()))
+
+    def test_ubicar_seccion_coincide_con_el_indice(self):
+        for nombre, md in DOCUMENTOS:
+            secciones = programa.parsear_secciones(md)
+            primeras: Dict[str, Tuple[int, int]] = {}
+            for bloque in secciones._bloques:
+                for nodo in bloque:
+                    primeras.setdefault(nodo.clave, (nodo.inicio, nodo.fin))
+            intro = secciones.nodo("INTRO")
+            primeras["INTRO"] = (intro.inicio, intro.fin) if intro else None
+            for clave, rango in primeras.items():
+                with self.subTest(documento=nombre, clave=clave):
+                    self.assertEqual(programa.ubicar_seccion(md, clave), rango)
+
+    def test_ubicar_seccion_por_numero_como_el_indice(self):
+        azar = random.Random(8)
+        documentos = DOCUMENTOS + [("editado", editar_al_azar(DOCUMENTOS[-1][1], azar)) for _ in range(100)]
+        for nombre, md in documentos:
+            secciones = programa.parsear_secciones(md)
+            for numero in list(secciones._numeros) + ["9.9", "2.1.1.1"]:
+                nodo = secciones.por_numero(numero)
+                with self.subTest(documento=nombre, numero=numero):
+                    self.assertEqual(programa.ubicar_seccion(md, numero=numero),
+                                     (nodo.inicio, nodo.fin) if nodo else None)
+
+    def test_rangos_ida_y_vuelta(self):
+        for nombre, md in DOCUMENTOS:
+            secciones = programa.parsear_secciones(md)
+            reconstruidas = programa.SeccionesDoc.desde_rangos(md, secciones.rangos())
+            with self.subTest(documento=nombre):
+                self.assertEqual(list(reconstruidas.items()), list(secciones.items()))
+                self.assertEqual(_arbol(reconstruidas), _arbol(secciones))
+
+
+class RecargaIncrementalTest(unittest.TestCase):
+    """reparsear_secciones debe dar lo mismo que parsear_secciones sobre la versión editada."""
+
+    def test_igual_a_parseo_completo(self):
+        azar = random.Random(2)
+        for i in range(400):
+            md = azar.choice(DOCUMENTOS[:2])[1]
+            anterior = programa.parsear_secciones(md)
+            arbol_anterior = _arbol(anterior)
+            editado = editar_al_azar(md, azar)
+            nuevas, estructura_cambiada = programa.reparsear_secciones(anterior, editado)
+            completas = programa.parsear_secciones(editado)
+            with self.subTest(edicion=i):
+                self.assertEqual(nuevas.rangos(), completas.rangos())
+                self.assertEqual(list(nuevas.items()), list(completas.items()))
+                self.assertEqual(_arbol(nuevas), _arbol(completas))
+                if not estructura_cambiada:
+                    self.assertEqual(_menu(nuevas), _menu(anterior))
+                # El índice anterior no se toca: puede estar publicado en otra instantánea
+                self.assertEqual(_arbol(anterior), arbol_anterior)
+
+    def test_claves_cambiadas_cubren_las_diferencias(self):
+        azar = random.Random(3)
+        for i in range(300):
+            md = azar.choice(DOCUMENTOS[:2])[1]
+            anterior = programa.parsear_secciones(md)
+            nuevas, _ = programa.reparsear_secciones(anterior, editar_al_azar(md, azar))
+            cambiadas = nuevas.claves_cambiadas(anterior)
+            if cambiadas is None:
+                continue
+            for clave in (set(anterior) | set(nuevas)) - cambiadas:
+                with self.subTest(edicion=i, clave=clave):
+                    self.assertEqual(nuevas.get(clave), anterior.get(clave))
+                    self.assertEqual(nuevas.titulo(clave), anterior.titulo(clave))
+
+    def test_indices_de_busqueda_incrementales(self):
+        azar = random.Random(4)
+        md = DOCUMENTOS[0][1]
+        secciones = programa.parsear_secciones(md)
+        buscador, titulos = programa.IndiceBusqueda(), programa.IndiceTitulos()
+        buscador.sincronizar(secciones)
+        titulos.sincronizar(secciones)
+        for i in range(60):
+            md = editar_al_azar(md, azar)
+            secciones, _ = programa.reparsear_secciones(secciones, md)
+            buscador.sincronizar(secciones)
+            titulos.sincronizar(secciones)
+            nuevo_buscador, nuevos_titulos = programa.IndiceBusqueda(), programa.IndiceTitulos()
+            nuevo_buscador.sincronizar(secciones)
+            nuevos_titulos.sincronizar(secciones)
+            with self.subTest(edicion=i):
+                self.assertEqual(buscador._docs, nuevo_buscador._docs)
+                self.assertEqual(buscador._postings, nuevo_buscador._postings)
+                self.assertEqual(sorted((e.clave, e.ruta) for e in titulos._entradas if e),
+                                 sorted((e.clave, e.ruta) for e in nuevos_titulos._entradas if e))
+
+
+class CacheIndiceTest(unittest.TestCase):
+    """El índice guardado en .visor_cache se lee tal como se escribió."""
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._dir_cache = programa.DIR_CACHE
+        programa.DIR_CACHE = os.path.join(self._dir, ".visor_cache")
+        self.ruta = os.path.join(self._dir, "DOCUMENTACION.md")
+        shutil.copyfile(programa.RUTA_DOC, self.ruta)
+
+    def tearDown(self):
+        programa.DIR_CACHE = self._dir_cache
+        shutil.rmtree(self._dir)
+
+    def _ida_y_vuelta(self, md: programa.TextoDoc):
+        secciones = programa.parsear_secciones(md)
+        menu_raiz = programa.construir_estructura_menus(secciones)
+        programa.guardar_cache_indice(self.ruta, md, secciones, menu_raiz)
+        leido = programa.leer_cache_indice(self.ruta, md)
+        self.assertIsNotNone(leido)
+        secciones_leidas, menu_leido = leido
+        self.assertEqual(secciones_leidas.rangos(), secciones.rangos())
+        self.assertEqual(list(secciones_leidas.items()), list(secciones.items()))
+        self.assertEqual(_arbol(secciones_leidas), _arbol(secciones))
+        self.assertEqual(programa._menu_a_tupla(menu_leido), programa._menu_a_tupla(menu_raiz))
+
+    def test_ida_y_vuelta_texto(self):
+        with open(self.ruta, encoding="utf-8") as f:
+            self._ida_y_vuelta(f.read())
+
+    def test_ida_y_vuelta_archivo_mapeado(self):
+        with programa.ArchivoMapeado(self.ruta) as md:
+            self._ida_y_vuelta(md)
+
+    def test_documento_modificado_invalida_la_cache(self):
+        with open(self.ruta, encoding="utf-8") as f:
+            md = f.read()
+        secciones = programa.parsear_secciones(md)
+        programa.guardar_cache_indice(self.ruta, md, secciones, programa.construir_estructura_menus(secciones))
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            f.write("\n## Agregada\n")
+        with open(self.ruta, encoding="utf-8") as f:
+            self.assertIsNone(programa.leer_cache_indice(self.ruta, f.read()))
+
+
+class AnchosTest(unittest.TestCase):
+    """La tabla de anchos mide igual que las funciones anteriores, carácter por carácter."""
+
+    # Latín con acentos, marcas combinantes, CJK, hangul, emojis y bloques raros
+    TEXTOS = ["Año 2024: métricas ✓", "e\u0301xito combinante", "日本語のテキスト", "한국어 문장",
+              "📊 Resultados 🚀 finales", "│ cuadro ║ doble │", "देवनागरी लिपि", "ｆｕｌｌ ｗｉｄｔｈ",
+              "mezcla 中文 y 😀 con ́ suelta", "\u200b\u00ad invisibles", "𝔘𝔫𝔦𝔠𝔬𝔡𝔢 astral", ""]
+
+    def setUp(self):
+        # Tabla nueva: los bloques se clasifican a medida que aparecen
+        self._anchos = programa._ANCHOS
+        programa._ANCHOS = programa._TablaAnchos()
+
+    def tearDown(self):
+        programa._ANCHOS = self._anchos
+
+    def _textos(self) -> List[str]:
+        azar = random.Random(6)
+        lineas = [l for l in DOCUMENTOS[0][1].splitlines() if l.strip()]
+        al_azar = ["".join(chr(azar.choice((azar.randrange(0x20, 0x3000), azar.randrange(0x1F300, 0x1FB00))))
+                           for _ in range(azar.randint(1, 60))) for _ in range(200)]
+        return self.TEXTOS + lineas + al_azar
+
+    def test_igual_a_las_funciones_anteriores(self):
+        textos = self._textos()
+        self.assertEqual(programa.anchos_visuales(textos), [benchmark_visor._ancho_visual_anterior(t) for t in textos])
+        for texto in textos:
+            with self.subTest(texto=texto[:40]):
+                self.assertEqual(programa.ancho_visual(texto), benchmark_visor._ancho_visual_anterior(texto))
+                for ancho in (1, 7, 40):
+                    self.assertEqual(programa.recortar_visual(texto, ancho),
+                                     benchmark_visor._recortar_visual_anterior(texto, ancho))
+                    self.assertEqual(programa.rellenar_visual(texto, ancho),
+                                     benchmark_visor._rellenar_visual_anterior(texto, ancho))
+                    self.assertEqual(programa.envolver_texto_display(texto, ancho),
+                                     benchmark_visor._envolver_texto_anterior(texto, ancho))
+                    self.assertEqual(programa.dividir_por_ancho(texto, ancho),
+                                     benchmark_visor._dividir_por_ancho_anterior(texto, ancho))
+
+    def test_especiales_son_los_de_ancho_distinto_de_uno(self):
+        for texto in self._textos():
+            with self.subTest(texto=texto[:40]):
+                self.assertEqual(programa._ANCHOS.especiales(texto),
+                                 [ch for ch in texto if programa._ancho_caracter(ch) != 1])
+                self.assertEqual(programa.anchos_acumulados(texto)[-1], benchmark_visor._ancho_visual_anterior(texto))
+
+
+TABLA = """| Métrica | Valor | Descripción larga de la columna |
+|:--------|------:|:-------------------------------:|
+| AUC | 0.91 | Área bajo la curva ROC del modelo de churn entrenado |
+| F1 | 0.8 | Media armónica entre precisión y exhaustividad |
+| 日本 | 12 | celda con \\| barra escapada |
+| corta |
+"""
+
+
+class TokenizadorTest(unittest.TestCase):
+    """Bloques que reproducen la sección y tablas dibujadas como grillas al ancho pedido."""
+
+    def _secciones(self) -> List[str]:
+        azar = random.Random(7)
+        textos = [TABLA, "", "\n\n", "```\nsin cerrar", "- a\n- b\n\n```output\nx\n```\n"]
+        for _, md in DOCUMENTOS:
+            secciones = programa.parsear_secciones(md)
+            textos += [secciones[clave] for clave in secciones]
+        textos += [editar_al_azar(DOCUMENTOS[0][1], azar) for _ in range(20)]
+        return textos
+
+    def test_los_bloques_reproducen_la_seccion(self):
+        for i, contenido in enumerate(self._secciones()):
+            bloques = programa.tokenizar_markdown(contenido)
+            with self.subTest(seccion=i):
+                self.assertEqual("\n".join(linea for b in bloques for linea in b.lineas), contenido)
+                for bloque in bloques:
+                    if bloque.tipo is programa.TipoBloque.TABLA:
+                        self.assertEqual({len(fila) for fila in bloque.celdas}, {len(bloque.anchos)})
+                        self.assertEqual(list(bloque.anchos), [max(programa.ancho_visual(c) for c in columna)
+                                                               for columna in zip(*bloque.celdas)])
+
+    def test_quiebres_por_linea_del_markdown(self):
+        for i, contenido in enumerate(self._secciones()):
+            for ancho in (24, 80):
+                dispuesta = programa.indexar_contenido(contenido, ancho)
+                with self.subTest(seccion=i, ancho=ancho):
+                    self.assertEqual(len(dispuesta.quiebres), contenido.count("\n") + 1)
+                    self.assertEqual(dispuesta.quiebres, sorted(dispuesta.quiebres))
+                    self.assertLessEqual(max(map(programa.ancho_visual, dispuesta.lineas)), ancho)
+
+    def test_grilla_de_tabla(self):
+        ascii_mode = programa.ASCII_MODE
+        try:
+            for programa.ASCII_MODE in (False, True):
+                vertical = "|" if programa.ASCII_MODE else "│"
+                (bloque,) = programa.tokenizar_markdown(TABLA.rstrip("\n"))
+                self.assertEqual(bloque.alineaciones, ("left", "right", "center"))
+                self.assertEqual(bloque.celdas[-1], ("corta", "", ""))
+                self.assertEqual(bloque.celdas[3][2], "celda con | barra escapada")
+                for ancho in range(10, 120, 7):
+                    grilla = programa._disponer_tabla(bloque, ancho)
+                    with self.subTest(ascii=programa.ASCII_MODE, ancho=ancho):
+                        if ancho - 3 * 3 - 1 < programa.ANCHO_MINIMO_COLUMNA * 3:
+                            self.assertIsNone(grilla)
+                            continue
+                        anchos = {programa.ancho_visual(linea) for linea in grilla}
+                        self.assertEqual(len(anchos), 1)
+                        self.assertLessEqual(anchos.pop(), ancho)
+                        # Cada celda se lee entera juntando sus renglones, columna por
+                        # columna (hasta la fila con la barra escapada, que en ASCII se confunde)
+                        hasta = next(k for k, linea in enumerate(grilla) if "日本" in linea)
+                        filas = [linea[1:-1].split(vertical) for linea in grilla[:hasta] if linea.startswith(vertical)]
+                        for c, columna in enumerate(zip(*filas)):
+                            texto = "".join(columna).replace(" ", "")
+                            for fila in bloque.celdas[:3]:
+                                self.assertIn(fila[c].replace(" ", ""), texto)
+                        # La columna alineada a la derecha termina pegada al borde
+                        self.assertTrue(next(f[1] for f in filas if "0.91" in f[1]).endswith("0.91 "))
+        finally:
+            programa.ASCII_MODE = ascii_mode
+
+
+class _PostingContado(dict):
+    """Posting que cuenta las lecturas con `get`: las que hace la búsqueda al puntuar una sección."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.lecturas = 0
+
+    def get(self, *args):
+        self.lecturas += 1
+        return super().get(*args)
+
+
+def bm25_lineal(secciones: programa.SeccionesDoc, consulta: str) -> Dict[str, float]:
+    """Puntaje BM25 de cada sección recorriéndolas todas, con la longitud media real."""
+    frecuencias = {clave: Counter(programa._terminos(secciones.fragmento(inicio, fin)))
+                   for clave, _, inicio, fin in programa._unidades_busqueda(secciones)}
+    media = sum(sum(f.values()) for f in frecuencias.values()) / len(frecuencias)
+    puntajes: Dict[str, float] = {}
+    for termino in dict.fromkeys(programa._terminos(consulta)):
+        con_termino = [clave for clave, f in frecuencias.items() if termino in f]
+        idf = math.log(1 + (len(frecuencias) - len(con_termino) + 0.5) / (len(con_termino) + 0.5))
+        for clave in con_termino:
+            tf = frecuencias[clave][termino]
+            largo = sum(frecuencias[clave].values())
+            norma = programa.BM25_K1 * (1 - programa.BM25_B + programa.BM25_B * largo / media)
+            puntajes[clave] = puntajes.get(clave, 0.0) + idf * tf * (programa.BM25_K1 + 1) / (tf + norma)
+    return puntajes
+
+
+class BusquedaTest(unittest.TestCase):
+    """El umbral de Fagin da el mismo ranking BM25 que puntuar todas las secciones."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.secciones = programa.parsear_secciones(
+            benchmark_visor.generar_documento(0.3, programa.cargar_documentacion(programa.RUTA_DOC)))
+        cls.buscador = programa.IndiceBusqueda()
+        cls.buscador.sincronizar(cls.secciones)
+
+    def test_mismo_ranking_que_el_recorrido_lineal(self):
+        for consulta in benchmark_visor.CONSULTAS_BUSQUEDA + ["ñandú", "modelo modelo churn"]:
+            puntajes = bm25_lineal(self.secciones, consulta)
+            esperados = sorted(puntajes.values(), reverse=True)
+            for limite in (1, 3, programa.MAX_RESULTADOS, 50):
+                with self.subTest(consulta=consulta, limite=limite):
+                    resultados = self.buscador.buscar(consulta, limite)
+                    self.assertEqual(len(resultados), min(limite, len(esperados)))
+                    for resultado, esperado in zip(resultados, esperados):
+                        # Ante empates el orden puede diferir; el puntaje de cada puesto no
+                        self.assertAlmostEqual(resultado.puntaje, esperado, places=9)
+                        self.assertAlmostEqual(puntajes[resultado.clave], resultado.puntaje, places=9)
+
+    def test_el_umbral_corta_antes_de_puntuar_todo(self):
+        self.buscador.precalentar()
+        postings = self.buscador._postings
+        for consulta in ("churn", "de", "de la el", "ventas clientes de"):
+            terminos = [t for t in dict.fromkeys(programa._terminos(consulta)) if t in postings]
+            originales = {t: postings[t] for t in terminos}
+            contados = {t: _PostingContado(posting) for t, posting in originales.items()}
+            postings.update(contados)
+            try:
+                self.assertEqual(len(self.buscador.buscar(consulta, 5)), 5)
+            finally:
+                postings.update(originales)
+            # Cada sección puntuada se lee una vez en el posting de cada término
+            puntuadas = contados[terminos[0]].lecturas
+            with self.subTest(consulta=consulta):
+                self.assertLess(puntuadas, len(bm25_lineal(self.secciones, consulta)) / 2)
+
+
+def titulos_lineal(secciones: programa.SeccionesDoc, consulta: str) -> Dict[str, Tuple[float, int]]:
+    """(fracción de trigramas de la consulta, trigramas del encabezado) de cada encabezado que pasa el umbral."""
+    buscados = programa._trigramas(consulta)
+    minimo = max(1, math.ceil(len(buscados) * programa.UMBRAL_TRIGRAMAS))
+    encontrados: Dict[str, Tuple[float, int]] = {}
+    for clave, ruta, _, _ in programa._unidades_busqueda(secciones):
+        trigramas = programa._trigramas(ruta[-1]) | programa._trigramas(clave)
+        comunes = len(buscados & trigramas)
+        if buscados and comunes >= minimo:
+            encontrados[clave] = (comunes / len(buscados), len(trigramas))
+    return encontrados
+
+
+class TitulosTest(unittest.TestCase):
+    """El índice de trigramas encuentra lo mismo que comparar con cada encabezado."""
+
+    CONSULTAS = benchmark_visor.CONSULTAS_TITULOS + ["sprint", "resumen ejecutivo", "x", "", "zzzz qqqq"]
+
+    def _comparar(self, secciones: programa.SeccionesDoc, titulos: programa.IndiceTitulos):
+        for consulta in self.CONSULTAS:
+            encontrados = titulos_lineal(secciones, consulta)
+            esperados = sorted(encontrados.values(), key=lambda e: (-e[0], e[1]))
+            for limite in (1, programa.MAX_RESULTADOS, 40):
+                with self.subTest(consulta=consulta, limite=limite):
+                    resultados = titulos.buscar(consulta, limite)
+                    self.assertEqual(len(resultados), min(limite, len(esperados)))
+                    for resultado in resultados:
+                        self.assertEqual(resultado.puntaje, encontrados[resultado.clave][0])
+                    obtenidos = [encontrados[r.clave] for r in resultados]
+                    if len(esperados) <= limite * 5:
+                        # Sin recortar candidatos, los empates se desempatan por largo
+                        self.assertEqual(obtenidos, esperados[:limite])
+                    else:
+                        self.assertEqual([e[0] for e in obtenidos], [e[0] for e in esperados[:limite]])
+
+    def test_igual_al_recorrido_lineal(self):
+        md = benchmark_visor.generar_documento(0.3, programa.cargar_documentacion(programa.RUTA_DOC))
+        secciones = programa.parsear_secciones(md)
+        titulos = programa.IndiceTitulos()
+        titulos.sincronizar(secciones)
+        self._comparar(secciones, titulos)
+
+    def test_igual_tras_sincronizar_ediciones(self):
+        azar = random.Random(5)
+        md = DOCUMENTOS[0][1]
+        secciones = programa.parsear_secciones(md)
+        titulos = programa.IndiceTitulos()
+        titulos.sincronizar(secciones)
+        for _ in range(20):
+            md = editar_al_azar(md, azar)
+            secciones, _ = programa.reparsear_secciones(secciones, md)
+            titulos.sincronizar(secciones)
+        self._comparar(secciones, titulos)
+
+
+class HistorialTest(unittest.TestCase):
+    """Atrás y adelante ([<] y [>]) después de volver con [0]."""
+
+    def setUp(self):
+        secciones = programa.parsear_secciones(DOCUMENTOS[0][1])
+        self.navegador = programa.NavegadorMenus(programa.construir_estructura_menus(secciones), secciones)
+        self.terminal = programa.TerminalSesion(lambda datos: None)
+        self._ficha = programa._PANTALLA_SESION.set(self.terminal)
+        self.sprint1, self.sprint2 = (self.navegador.menu_raiz.hijos[i].etiqueta for i in (5, 6))
+
+    def tearDown(self):
+        programa._PANTALLA_SESION.reset(self._ficha)
+
+    def _ruta(self) -> List[str]:
+        return self.navegador.obtener_ruta_nombres()
+
+    def test_atras_y_adelante_tras_volver(self):
+        navegador, inicio = self.navegador, ["Inicio"]
+        for _ in range(4):
+            self.terminal.recibir("")  # la pausa de "no hay más menús"
+        navegador.navegar_a_hijo(5)
+        navegador.volver_atras()
+        pasos = [(navegador.historial_atras, inicio + [self.sprint1]),
+                 (navegador.historial_atras, inicio),
+                 (navegador.historial_atras, inicio),  # no hay más: no se mueve
+                 (navegador.historial_adelante, inicio + [self.sprint1]),
+                 (navegador.historial_adelante, inicio),
+                 (navegador.historial_adelante, inicio)]
+        for i, (paso, esperada) in enumerate(pasos):
+            paso()
+            with self.subTest(paso=i):
+                self.assertEqual(self._ruta(), esperada)
+                self.assertIs(navegador.obtener_menu_actual(),
+                              navegador.menu_raiz if len(esperada) == 1 else navegador.menu_raiz.hijos[5])
+
+        # Ir a un menú nuevo descarta lo que había para adelante
+        navegador.historial_atras()
+        navegador.volver_atras()
+        self.assertFalse(navegador.historial.puede_adelante)
+        navegador.navegar_a_hijo(6)
+        navegador.historial_atras()
+        self.assertEqual(self._ruta(), inicio)
+        navegador.historial_atras()
+        self.assertEqual(self._ruta(), inicio + [self.sprint1])
+        navegador.historial_adelante()
+        navegador.historial_adelante()
+        self.assertEqual(self._ruta(), inicio + [self.sprint2])
+
+    def test_teclas_en_el_menu(self):
+        # Sprint 1, [0], dos veces atrás, adelante (Sprint 1), [0], Sprint 2, [0] y atrás
+        for tecla in ("6", "0", "<", "<", ">", "0", "7", "0", "<"):
+            self.terminal.recibir(tecla)
+        self.terminal.recibir(None)
+        self.navegador.ejecutar()
+        self.assertEqual(self._ruta(), ["Inicio", self.sprint2])
+        self.assertTrue(self.navegador.historial.puede_adelante)
+
+    def test_limite(self):
+        historial = programa.HistorialNavegacion(limite=3)
+        for i in range(5):
+            historial.registrar([(None, str(i))])
+        rutas = []
+        while historial.puede_atras:
+            rutas.append(historial.atras([(None, "actual")])[0][1])
+        self.assertEqual(rutas, ["4", "3", "2"])
+
+
+class PrecargaTest(unittest.TestCase):
+    """La precarga solo ocupa lugar libre en las cachés de disposición."""
+
+    def setUp(self):
+        self._caches = (programa._CACHE_BLOQUES, programa._CACHE_LINEAS)
+        programa._CACHE_BLOQUES = programa.CacheAcotada(programa.PRESUPUESTO_CACHE_BLOQUES)
+        programa._CACHE_LINEAS = programa.CacheAcotada(programa.PRESUPUESTO_CACHE_LINEAS)
+        self.secciones = programa.parsear_secciones(DOCUMENTOS[0][1])
+        self.menu = programa.construir_estructura_menus(self.secciones)
+
+    def tearDown(self):
+        programa._CACHE_BLOQUES, programa._CACHE_LINEAS = self._caches
+
+    def _precargar(self) -> int:
+        precarga = programa.PrecargaSecciones()
+        precarga.start()
+        try:
+            precarga.solicitar(self.secciones, self.menu.hijos, 80)
+            self.assertTrue(precarga.esperar(30))
+            return precarga.precargadas
+        finally:
+            precarga.detener()
+
+    def test_lo_abierto_sobrevive_a_la_precarga(self):
+        contenido = self.secciones["TLDR_-_RESUMEN_EJECUTIVO"]
+        abierta = programa.disponer_seccion(contenido, 80)
+        # Lugar para lo abierto y poco más: cualquier sección de más desalojaría algo
+        for cache in (programa._CACHE_BLOQUES, programa._CACHE_LINEAS):
+            cache.presupuesto = cache.usado + 1024
+        self.assertGreater(self._precargar(), 0)
+        self.assertIn(contenido, programa._CACHE_BLOQUES._entradas)
+        self.assertIn((contenido, 80, programa.ASCII_MODE), programa._CACHE_LINEAS._entradas)
+        self.assertIs(programa.disponer_seccion(contenido, 80), abierta)
+        for cache in (programa._CACHE_BLOQUES, programa._CACHE_LINEAS):
+            self.assertLessEqual(cache.usado, cache.presupuesto)
+
+    def test_precarga_con_lugar_libre(self):
+        precargadas = self._precargar()
+        abiertas = [o.clave for o in self.menu.hijos
+                    if o.tipo == programa.TipoOpcion.CONTENIDO and self.secciones.get(o.clave)]
+        self.assertGreater(precargadas, 0)
+        en_cache = [clave for clave in abiertas
+                    if (self.secciones[clave], 80, programa.ASCII_MODE) in programa._CACHE_LINEAS._entradas]
+        self.assertEqual(len(en_cache), precargadas)
+
+
+class _CerrojoIntercalado:
+    """Lock que, cada vez que se suelta, llama a `intercalar` antes de seguir."""
+
+    def __init__(self, intercalar):
+        self._lock = threading.Lock()
+        self._intercalar = intercalar
+
+    def __enter__(self):
+        self._lock.acquire()
+
+    def __exit__(self, *_):
+        self._lock.release()
+        self._intercalar()
+
+
+class SesionesTest(unittest.TestCase):
+    """Sesiones del servidor en versiones distintas comparten los índices sin pisarse."""
+
+    def setUp(self):
+        self._mostrar = programa.mostrar_resultados_busqueda
+        self.vistos: Dict[int, list] = {}
+        programa.mostrar_resultados_busqueda = lambda consulta, resultados, ruta: self.vistos.setdefault(
+            id(programa.pantalla_actual()), []).append((consulta, [r.clave for r in resultados]))
+
+    def tearDown(self):
+        programa.mostrar_resultados_busqueda = self._mostrar
+
+    @staticmethod
+    def _instantanea(md: str) -> programa.Instantanea:
+        secciones = programa.parsear_secciones(md)
+        return programa.Instantanea(secciones, programa.construir_estructura_menus(secciones), (0, 0))
+
+    @staticmethod
+    def _paso(sesion: programa.SesionNavegador, terminal: programa.TerminalSesion, consulta: str):
+        """Una búsqueda ([B] o [G] según la consulta) en la pantalla de la sesión."""
+        terminal.recibir(consulta)
+        terminal.recibir("")
+
+        def buscar():
+            programa._PANTALLA_SESION.set(terminal)
+            (sesion.ir_a if consulta.startswith("Bibli") else sesion.buscar)()
+        Context().run(buscar)
+
+    def test_dos_instantaneas_buscando_intercaladas(self):
+        base = documento_sintetico()
+        vieja = self._instantanea(base.replace("cuerpo 1\n", "cuerpo 1 zorro\n"))
+        nueva = self._instantanea(base.replace("cuerpo 3\n", "cuerpo 3 zorro\n")
+                                      .replace("## 5. Referencias", "## 5. Bibliografía"))
+        vigilante = SimpleNamespace(instantanea=vieja)
+        servidor = programa.ServidorSesiones(vieja, vigilante)
+        sesion_vieja = programa.SesionNavegador(servidor)
+        vigilante.instantanea = nueva
+        sesion_nueva = programa.SesionNavegador(servidor)
+        terminal_vieja = programa.TerminalSesion(lambda datos: None)
+        terminal_nueva = programa.TerminalSesion(lambda datos: None)
+
+        # Cada vez que la sesión vieja suelta el lock de un índice, la nueva
+        # hace una búsqueda completa: el peor intercalado posible
+        consultas = ["zorro", "Bibliografía", "limpieza zorro"]
+        turnos = iter(consultas * 20)
+        intercalando = False
+
+        def intercalar():
+            nonlocal intercalando
+            if not intercalando:
+                intercalando = True
+                try:
+                    self._paso(sesion_nueva, terminal_nueva, next(turnos, "zorro"))
+                finally:
+                    intercalando = False
+
+        servidor.buscador._lock = _CerrojoIntercalado(intercalar)
+        servidor.titulos._lock = _CerrojoIntercalado(intercalar)
+        for consulta in consultas * 3:
+            self._paso(sesion_vieja, terminal_vieja, consulta)
+
+        etapa = "2_SPRINT_1_3%d_ETAPA_%d_LIMPIEZA_Y_NORMALIZACIÓN"
+        for nombre, terminal, secciones, zorro in (("vieja", terminal_vieja, vieja.secciones, etapa % (1, 1)),
+                                                   ("nueva", terminal_nueva, nueva.secciones, etapa % (3, 3))):
+            vistos = self.vistos[id(terminal)]
+            self.assertGreaterEqual(len(vistos), len(consultas) * 3)
+            for i, (consulta, claves) in enumerate(vistos):
+                with self.subTest(sesion=nombre, consulta=i):
+                    self.assertTrue(set(claves) <= set(secciones))
+                    if consulta == "zorro":
+                        self.assertEqual(claves, [zorro])
+                    elif consulta == "limpieza zorro":
+                        self.assertEqual(claves[0], zorro)
+                    elif nombre == "nueva":
+                        self.assertEqual(claves[0], "5_BIBLIOGRAFÍA")
+                    else:
+                        self.assertNotIn("5_BIBLIOGRAFÍA", claves)
+
+
+class ServidorDocumentacionTest(unittest.TestCase):
+    """Respuestas de la API de --serve, pidiéndolas directo al manejador."""
+
+    def setUp(self):
+        secciones = programa.parsear_secciones(documento_sintetico())
+        self.servidor = programa.ServidorDocumentacion(
+            programa.Instantanea(secciones, programa.construir_estructura_menus(secciones), (0, 0)))
+
+    def _pedir(self, objetivo: str, metodo: str = "GET", **encabezados: str):
+        estado, cabeceras, cuerpo = self.servidor.responder(
+            metodo, objetivo, {k.replace("_", "-"): v for k, v in encabezados.items()})
+        return estado, dict(cabeceras), cuerpo
+
+    def test_acepta_gzip(self):
+        casos = [("gzip", True), ("", False), ("br, deflate", False), ("*", True), ("GZIP; Q=0.5", True),
+                 ("gzip;q=0", False), ("gzip;q=0.000", False), ("*;q=0, gzip", True), ("gzip;q=0, *", False),
+                 ("deflate, *;q=0.1", True), ("gzip;q=0, gzip", True), ("gzip;q=basura, *;q=0", False)]
+        for valor, esperado in casos:
+            with self.subTest(valor=valor):
+                self.assertEqual(programa._acepta_gzip(valor), esperado)
+
+    def test_coincide_etag(self):
+        casos = [('"a"', True), ('W/"a"', True), ('"b", "a"', True), ("*", True),
+                 ('"b"', False), ('"a-gz"', False), ("", False)]
+        for valor, esperado in casos:
+            with self.subTest(valor=valor):
+                self.assertEqual(programa._coincide_etag(valor, ('"a"', '"c"')), esperado)
+
+    def test_secciones_y_numeros(self):
+        estado, cabeceras, cuerpo = self._pedir("/api/secciones/")
+        self.assertEqual(estado, 200)
+        self.assertEqual(cabeceras["Content-Type"], "application/json; charset=utf-8")
+        self.assertNotIn("Content-Encoding", cabeceras)
+        self.assertIsInstance(json.loads(cuerpo), (list, dict))
+        estado, _, cuerpo = self._pedir("/api/numeros/3.1.")
+        self.assertEqual(estado, 200)
+        self.assertEqual(json.loads(cuerpo)["numero"], "3.1")
+        estado, _, cuerpo = self._pedir("/api/secciones/2_SPRINT_1_22_DATASETS")
+        self.assertEqual(json.loads(cuerpo)["titulo"], "2.2 Datasets")
+
+    def test_gzip_negociado(self):
+        _, plano, cuerpo = self._pedir("/api/secciones")
+        for valor in ("gzip", "deflate, gzip;q=0.5", "*;q=0, gzip"):
+            with self.subTest(valor=valor):
+                estado, cabeceras, comprimido = self._pedir("/api/secciones", accept_encoding=valor)
+                self.assertEqual(estado, 200)
+                self.assertEqual(cabeceras["Content-Encoding"], "gzip")
+                self.assertEqual(cabeceras["Vary"], "Accept-Encoding")
+                self.assertNotEqual(cabeceras["ETag"], plano["ETag"])
+                self.assertEqual(gzip.decompress(comprimido), cuerpo)
+        for valor in ("gzip;q=0", "gzip;q=0, *", "br"):
+            with self.subTest(valor=valor):
+                _, cabeceras, sin_comprimir = self._pedir("/api/secciones", accept_encoding=valor)
+                self.assertNotIn("Content-Encoding", cabeceras)
+                self.assertEqual(cabeceras["ETag"], plano["ETag"])
+                self.assertEqual(sin_comprimir, cuerpo)
+
+    def test_if_none_match_da_304(self):
+        _, plano, _ = self._pedir("/api/secciones")
+        _, comprimido, _ = self._pedir("/api/secciones", accept_encoding="gzip")
+        for etag in (plano["ETag"], comprimido["ETag"], "W/" + plano["ETag"], f'"otro", {plano["ETag"]}', "*"):
+            with self.subTest(etag=etag):
+                estado, cabeceras, cuerpo = self._pedir("/api/secciones", if_none_match=etag)
+                self.assertEqual((estado, cuerpo), (304, b""))
+                self.assertEqual(cabeceras["ETag"], plano["ETag"])
+        estado, _, cuerpo = self._pedir("/api/secciones", if_none_match='"otro"')
+        self.assertEqual(estado, 200)
+        self.assertTrue(cuerpo)
+
+    def test_errores(self):
+        for objetivo in ("/api/secciones/NO_EXISTE", "/api/numeros/9.9", "/api/otra", "/"):
+            with self.subTest(objetivo=objetivo):
+                estado, _, cuerpo = self._pedir(objetivo)
+                self.assertEqual(estado, 404)
+                self.assertIn("error", json.loads(cuerpo))
+        for metodo in ("POST", "PUT", "DELETE"):
+            with self.subTest(metodo=metodo):
+                estado, cabeceras, _ = self._pedir("/api/secciones", metodo)
+                self.assertEqual(estado, 405)
+                self.assertEqual(cabeceras["Allow"], "GET, HEAD, OPTIONS")
+        estado, cabeceras, cuerpo = self._pedir("/api/secciones", "OPTIONS")
+        self.assertEqual((estado, cuerpo), (204, b""))
+        self.assertIn("Access-Control-Allow-Methods", cabeceras)
+
+
+class BenchmarkRepeticionTest(unittest.TestCase):
+    """Pasada corta de `benchmark_visor.py repeticion`: que corra, no cuánto tarda."""
+
+    def test_sesion_grabada(self):
+        secciones = programa.parsear_secciones(DOCUMENTOS[0][1])
+        terminal = benchmark_visor.TerminalGuionada(0, benchmark_visor.GUION_SESION)
+        benchmark_visor.repetir_sesion(secciones, programa.construir_estructura_menus(secciones), terminal)
+        self.assertEqual(terminal._restantes, 0)
+        self.assertGreater(terminal.bytes, 0)
+        self.assertLessEqual({"menú", "paginador", "búsqueda", "ir a", "resultado"}, set(terminal.latencias))
+
+    def test_sesiones_al_azar(self):
+        originales = (programa.RUTA_DOC, programa._CACHE_BLOQUES, programa._CACHE_LINEAS)
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida):
+            resultado = benchmark_visor.bench_repeticion([0.05, 0.2], 80, None, 0, math.inf)
+        # Con documentos tan chicos los exponentes son ruido: no se controlan acá
+        self.assertIn(resultado, (0, 1))
+        filas = [linea for linea in salida.getvalue().splitlines() if re.match(r"\s*[\d.]+MB ", linea)]
+        self.assertEqual(len(filas), 2)
+        self.assertIn("Exponente", salida.getvalue())
+        self.assertEqual((programa.RUTA_DOC, programa._CACHE_BLOQUES, programa._CACHE_LINEAS), originales)
+
+
+if __name__ == "__main__":
+    unittest.main()
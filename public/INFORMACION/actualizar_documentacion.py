@@ -1,5 +1,7 @@
 import nbformat
+import os
 import re
+import tempfile
 
 NOTEBOOK_PATH = "Proyecto_Aurelion.ipynb"
 MARKDOWN_PATH = "DOCUMENTACION.md"
@@ -57,9 +59,20 @@ def actualizar_markdown_con_outputs():
             md_nuevo = md_nuevo[:insert_pos] + '\n' + output_md + md_nuevo[insert_pos:]
             offset += len(output_md) + 1
 
-    # Guardar el markdown actualizado
-    with open(MARKDOWN_PATH, "w", encoding="utf-8") as f:
-        f.write(md_nuevo)
+    # Guardar el markdown actualizado en un temporal y reemplazar el original:
+    # reescribirlo en el lugar lo trunca, y el visor en modo --mmap puede
+    # estar leyendo el archivo mapeado en ese momento
+    directorio = os.path.dirname(os.path.abspath(MARKDOWN_PATH))
+    fd, tmp = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(md_nuevo)
+        # mkstemp crea el temporal con permisos 0600: conservar los del original
+        os.chmod(tmp, os.stat(MARKDOWN_PATH).st_mode & 0o777)
+        os.replace(tmp, MARKDOWN_PATH)
+    except BaseException:
+        os.remove(tmp)
+        raise
 
     print("✅ DOCUMENTACION.md actualizada con outputs del notebook.")
 
@@ -0,0 +1,1039 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks del visor de documentación (programa.py).
+
+Genera documentos sintéticos de varios megabytes a partir de DOCUMENTACION.md
+replicando sus secciones, y mide cómo escalan las etapas del visor.
+
+Uso:
+    python benchmark_visor.py parseo --tamanos 1 2 4 8
+    python benchmark_visor.py memoria --tamanos 1 4 16
+    python benchmark_visor.py recarga --tamanos 1 4 16
+    python benchmark_visor.py apertura --tamanos 16 64 256
+    python benchmark_visor.py busqueda --tamanos 1 16 100
+    python benchmark_visor.py titulos --tamanos 8 32 100
+    python benchmark_visor.py menus --tamanos 1 16 100
+    python benchmark_visor.py anchos
+    python benchmark_visor.py pantalla
+    python benchmark_visor.py historial --repeticiones 200
+    python benchmark_visor.py paginador --tamanos 1 4 16
+    python benchmark_visor.py disposicion --tamanos 1 4 16
+    python benchmark_visor.py sesiones --clientes 1 8 32
+    python benchmark_visor.py precarga --tamanos 1 4 16
+    python benchmark_visor.py repeticion --tamanos 1 4 16 --acciones 2000
+    python benchmark_visor.py repeticion --guion sesion.txt --max-exponente 0.3
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import unicodedata
+from itertools import chain
+from typing import Callable, Dict, List, Optional, Tuple
+
+import programa
+
+_PATRON_TITULO = re.compile(r"^(#{2,4}\s+.+?)\s*$", re.MULTILINE)
+
+
+def generar_documento(megabytes: float, base: str = "") -> str:
+    """
+    Construye un markdown de al menos `megabytes` MB replicando el cuerpo de
+    DOCUMENTACION.md. Cada réplica renombra sus encabezados para que las
+    claves de sección no colisionen.
+    """
+    if not base:
+        base = programa.cargar_documentacion(programa.RUTA_DOC)
+    corte = base.find("\n## ")
+    portada, cuerpo = (base[:corte], base[corte:]) if corte >= 0 else ("", base)
+
+    objetivo = int(megabytes * 1024 * 1024)
+    partes: List[str] = [portada]
+    total = len(portada.encode("utf-8"))
+    ancho_cuerpo = len(cuerpo.encode("utf-8"))
+    replica = 0
+    while total < objetivo:
+        replica += 1
+        partes.append(_PATRON_TITULO.sub(rf"\1 · réplica {replica}", cuerpo))
+        total += ancho_cuerpo
+    return "".join(partes)
+
+
+def _mejor_tiempo(funcion: Callable[[], object], repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def bench_parseo(tamanos: List[float], repeticiones: int) -> None:
+    """Mide parsear_secciones sobre documentos de tamaño creciente."""
+    print(f"{'Tamaño':>10} {'Secciones':>10} {'Tiempo':>10} {'MB/s':>8} {'ns/byte':>8}")
+    for mb in tamanos:
+        md = generar_documento(mb)
+        octetos = len(md.encode("utf-8"))
+        secciones = programa.parsear_secciones(md)
+        t = _mejor_tiempo(lambda: programa.parsear_secciones(md), repeticiones)
+        print(f"{octetos / 2**20:>8.1f}MB {len(secciones):>10} {t * 1000:>8.1f}ms "
+              f"{octetos / 2**20 / t:>8.1f} {t * 1e9 / octetos:>8.2f}")
+
+
+def _memoria_retenida(construir: Callable[[], object]) -> int:
+    """Bytes que siguen asignados tras construir el objeto (sin contar el documento)."""
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        objeto = construir()
+        despues = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objeto
+    return despues - antes
+
+
+def bench_memoria(tamanos: List[float]) -> None:
+    """
+    Compara la memoria retenida por el índice de rangos (SeccionesDoc) contra
+    el diccionario equivalente con una copia del texto de cada sección.
+    """
+    print(f"{'Tamaño':>10} {'Secciones':>10} {'Índice':>10} {'Copias':>10} {'Ahorro':>10}")
+    for mb in tamanos:
+        md = generar_documento(mb)
+        secciones = programa.parsear_secciones(md)
+        indice = _memoria_retenida(lambda: programa.parsear_secciones(md))
+        copias = _memoria_retenida(lambda: {k: secciones[k] for k in secciones})
+        print(f"{len(md.encode('utf-8')) / 2**20:>8.1f}MB {len(secciones):>10} "
+              f"{indice / 2**20:>8.2f}MB {copias / 2**20:>8.2f}MB {(copias - indice) / 2**20:>8.2f}MB")
+
+
+def bench_recarga(tamanos: List[float], repeticiones: int) -> None:
+    """
+    Compara el parseo completo con la recarga incremental tras editar el
+    cuerpo de una sola sección en mitad del documento.
+    """
+    print(f"{'Tamaño':>10} {'Completo':>10} {'Incremental':>12} {'Menú':>8}")
+    for mb in tamanos:
+        md = generar_documento(mb)
+        anterior = programa.parsear_secciones(md)
+        mitad = md.find("\n## ", len(md) // 2)
+        editado = md[:mitad] + "\nPárrafo agregado en la recarga.\n" + md[mitad:]
+        completo = _mejor_tiempo(lambda: programa.parsear_secciones(editado), repeticiones)
+        incremental = _mejor_tiempo(lambda: programa.reparsear_secciones(anterior, editado), repeticiones)
+        _, cambio = programa.reparsear_secciones(anterior, editado)
+        print(f"{len(editado.encode('utf-8')) / 2**20:>8.1f}MB {completo * 1000:>8.1f}ms "
+              f"{incremental * 1000:>10.1f}ms {'rehace' if cambio else 'intacto':>8}")
+
+
+_CODIGO_APERTURA = """
+import sys, time
+import programa
+programa.MMAP_MODE = sys.argv[2] == "mmap"
+programa.DIR_CACHE = sys.argv[3]
+t0 = time.perf_counter()
+buffer = programa.cargar_buffer(sys.argv[1])
+secciones, _ = programa.obtener_indice(sys.argv[1], buffer)
+t1 = time.perf_counter()
+secciones[next(k for k in secciones if k not in ("DOC_COMPLETA", "INTRO"))]
+estado = dict(l.split(":", 1) for l in open("/proc/self/status") if ":" in l)
+print(len(secciones), t1 - t0, estado["RssAnon"].split()[0])
+"""
+
+
+def bench_apertura(tamanos: List[float]) -> None:
+    """
+    Abre archivos de tamaño creciente en un proceso nuevo por medición, en modo
+    texto y en modo --mmap, sin caché y con caché vigente. Reporta el tiempo
+    hasta tener el índice y la memoria anónima residente (RssAnon) del proceso;
+    las páginas del archivo mapeado no cuentan porque las respalda el disco.
+    """
+    if not os.path.exists("/proc/self/status"):
+        print("La medición de memoria requiere /proc (Linux).")
+        return
+    print(f"{'Tamaño':>10} {'Modo':>6} {'Caché':>6} {'Tiempo':>10} {'RssAnon':>10}")
+    for mb in tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "DOCUMENTACION.md")
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(generar_documento(mb))
+            for modo in ("texto", "mmap"):
+                dir_cache = os.path.join(tmp, f"cache_{modo}")
+                for cache in ("fría", "tibia"):
+                    salida = subprocess.run(
+                        [sys.executable, "-c", _CODIGO_APERTURA, ruta, modo, dir_cache],
+                        cwd=os.path.dirname(os.path.abspath(programa.__file__)),
+                        capture_output=True, text=True, check=True,
+                    ).stdout.split()
+                    _, segundos, rss_kb = salida
+                    print(f"{os.path.getsize(ruta) / 2**20:>8.1f}MB {modo:>6} {cache:>6} "
+                          f"{float(segundos) * 1000:>8.1f}ms {int(rss_kb) / 1024:>8.1f}MB")
+
+
+CONSULTAS_BUSQUEDA = [
+    "churn",
+    "de",
+    "ventas clientes de",
+    "métricas del modelo de churn",
+    "python programa ejecutar visor",
+    "kmeans silhouette ticket",
+]
+
+
+def bench_busqueda(tamanos: List[float], repeticiones: int) -> None:
+    """
+    Construcción del índice invertido (tokenizado y listas de impacto, como
+    lo hace el hilo de indexado) y latencia de consultas BM25: la primera
+    ejecución y la mejor de las repeticiones. Al final mide la sincronización
+    incremental tras editar una sección.
+    """
+    print(f"{'Tamaño':>10} {'Consulta':<32} {'Primera':>9} {'Mejor':>9}")
+    for mb in tamanos:
+        md = generar_documento(mb)
+        etiqueta = f"{len(md.encode('utf-8')) / 2**20:>8.1f}MB"
+        secciones = programa.parsear_secciones(md)
+        indice = programa.IndiceBusqueda()
+        t0 = time.perf_counter()
+        indice.sincronizar(secciones)
+        t1 = time.perf_counter()
+        indice.precalentar()
+        t2 = time.perf_counter()
+        print(f"{etiqueta} {'(índice, ' + str(len(indice)) + ' secciones)':<32} {(t1 - t0) * 1000:>7.1f}ms")
+        print(f"{etiqueta} {'(listas de impacto)':<32} {(t2 - t1) * 1000:>7.1f}ms")
+        for consulta in CONSULTAS_BUSQUEDA:
+            t0 = time.perf_counter()
+            indice.buscar(consulta)
+            primera = time.perf_counter() - t0
+            mejor = _mejor_tiempo(lambda: indice.buscar(consulta), repeticiones)
+            print(f"{etiqueta} {consulta:<32} {primera * 1000:>7.2f}ms {mejor * 1000:>7.2f}ms")
+        mitad = md.find("\n## ", len(md) // 2)
+        editado = md[:mitad] + "\nPárrafo agregado en la recarga.\n" + md[mitad:]
+        nuevas, _ = programa.reparsear_secciones(secciones, editado)
+        t0 = time.perf_counter()
+        indice.sincronizar(nuevas)
+        print(f"{etiqueta} {'(sincronización incremental)':<32} {(time.perf_counter() - t0) * 1000:>7.1f}ms")
+
+
+CONSULTAS_TITULOS = [
+    "hiperparametos validacion",
+    "churn importancia",
+    "4.10 mantenimiento",
+    "replica 900 churn",
+    "glosario",
+]
+
+
+def bench_titulos(tamanos: List[float], repeticiones: int) -> None:
+    """
+    Índice de trigramas del comando [G]: construcción, latencia de cada
+    consulta (mejor de las repeticiones) y sincronización tras agregar un
+    encabezado en mitad del documento.
+    """
+    print(f"{'Tamaño':>10} {'Encabezados':>12} {'Consulta':<28} {'Tiempo':>10}")
+    for mb in tamanos:
+        md = generar_documento(mb)
+        secciones = programa.parsear_secciones(md)
+        indice = programa.IndiceTitulos()
+        t0 = time.perf_counter()
+        indice.sincronizar(secciones)
+        construccion = time.perf_counter() - t0
+        etiqueta = f"{len(md.encode('utf-8')) / 2**20:>8.1f}MB {len(indice):>12}"
+        print(f"{etiqueta} {'(construcción)':<28} {construccion * 1000:>8.1f}ms")
+        for consulta in CONSULTAS_TITULOS:
+            t = _mejor_tiempo(lambda: indice.buscar(consulta), repeticiones)
+            print(f"{etiqueta} {consulta:<28} {t * 1e6:>8.0f}µs")
+        mitad = md.find("\n## ", len(md) // 2)
+        editado = md[:mitad] + "\n### Sección agregada en la recarga\n" + md[mitad:]
+        nuevas, _ = programa.reparsear_secciones(secciones, editado)
+        t0 = time.perf_counter()
+        indice.sincronizar(nuevas)
+        print(f"{etiqueta} {'(sincronización incremental)':<28} {(time.perf_counter() - t0) * 1000:>8.1f}ms")
+
+
+def _expandir_todo(opcion: "programa.OpcionMenu", secciones: "programa.SeccionesDoc") -> int:
+    """Abre todos los submenús diferidos y devuelve la cantidad de opciones."""
+    return 1 + sum(_expandir_todo(h, secciones) for h in programa.expandir_submenu(opcion, secciones))
+
+
+def bench_menus(tamanos: List[float], repeticiones: int) -> None:
+    """
+    Mide construir_estructura_menus (primer menú, con los submenús diferidos)
+    y el árbol completo con todos los submenús abiertos. Al resolverse sobre
+    el árbol de encabezados, ninguno depende de la cantidad de secciones.
+    """
+    print(f"{'Tamaño':>10} {'Secciones':>10} {'Opciones':>9} {'Primer menú':>12} {'Árbol completo':>15}")
+    for mb in tamanos:
+        md = generar_documento(mb)
+        secciones = programa.parsear_secciones(md)
+        opciones = _expandir_todo(programa.construir_estructura_menus(secciones), secciones)
+        primero = _mejor_tiempo(lambda: programa.construir_estructura_menus(secciones), repeticiones)
+        completo = _mejor_tiempo(
+            lambda: _expandir_todo(programa.construir_estructura_menus(secciones), secciones), repeticiones)
+        print(f"{len(md.encode('utf-8')) / 2**20:>8.1f}MB {len(secciones):>10} {opciones:>9} "
+              f"{primero * 1000:>10.2f}ms {completo * 1000:>13.2f}ms")
+
+
+# Versiones anteriores de las funciones de ancho, carácter por carácter con
+# unicodedata; sirven de referencia de resultados y de tiempos.
+
+def _ancho_visual_anterior(texto: str) -> int:
+    ancho = 0
+    for ch in texto:
+        if unicodedata.combining(ch):
+            continue
+        if unicodedata.east_asian_width(ch) in ("F", "W") or programa._es_emoji(ch):
+            ancho += 2
+        else:
+            ancho += 1
+    return ancho
+
+
+def _recortar_visual_anterior(texto: str, ancho: int) -> str:
+    resultado = []
+    acumulado = 0
+    for ch in texto:
+        w = _ancho_visual_anterior(ch)
+        if acumulado + w > ancho:
+            break
+        resultado.append(ch)
+        acumulado += w
+    return "".join(resultado)
+
+
+def _rellenar_visual_anterior(texto: str, ancho: int) -> str:
+    if ancho <= 0:
+        return ""
+    if _ancho_visual_anterior(texto) > ancho:
+        texto = _recortar_visual_anterior(texto, max(ancho - 1, 0)) + ("…" if ancho > 1 else "")
+    return texto + " " * max(ancho - _ancho_visual_anterior(texto), 0)
+
+
+def _envolver_texto_anterior(texto: str, ancho: int) -> List[str]:
+    lineas: List[str] = []
+    actual = ""
+    ancho_actual = 0
+    for palabra in texto.split():
+        palabra_ancho = _ancho_visual_anterior(palabra)
+        sep = 1 if actual else 0
+        if ancho_actual + sep + palabra_ancho > ancho:
+            if actual:
+                lineas.append(actual)
+            actual = palabra
+            ancho_actual = palabra_ancho
+        else:
+            if actual:
+                actual += " "
+                ancho_actual += 1
+            actual += palabra
+            ancho_actual += palabra_ancho
+    if actual:
+        lineas.append(actual)
+    return lineas or [""]
+
+
+def _dividir_por_ancho_anterior(texto: str, ancho: int) -> List[str]:
+    if ancho <= 0:
+        return [""]
+    lineas: List[str] = []
+    actual = ""
+    ancho_actual = 0
+    for ch in texto:
+        w = _ancho_visual_anterior(ch)
+        if ancho_actual + w > ancho:
+            lineas.append(actual)
+            actual = ch
+            ancho_actual = w
+        else:
+            actual += ch
+            ancho_actual += w
+    if actual or not lineas:
+        lineas.append(actual)
+    return lineas
+
+
+def bench_anchos(repeticiones: int) -> None:
+    """
+    Microbenchmarks del motor de anchos frente a las versiones anteriores,
+    sobre todas las líneas de DOCUMENTACION.md (separadas en ASCII y no
+    ASCII). Antes de medir verifica que ambas den los mismos resultados.
+    """
+    lineas = [l for l in programa.cargar_documentacion(programa.RUTA_DOC).splitlines() if l.strip()]
+    grupos = {
+        "ascii": [l for l in lineas if l.isascii()],
+        "no ascii": [l for l in lineas if not l.isascii()],
+    }
+    ancho = programa.ANCHO_MARCO - 2
+    casos = [
+        ("ancho_visual", lambda ls: [_ancho_visual_anterior(l) for l in ls],
+         lambda ls: [programa.ancho_visual(l) for l in ls]),
+        ("anchos_visuales (lote)", lambda ls: [_ancho_visual_anterior(l) for l in ls],
+         programa.anchos_visuales),
+        ("recortar_visual", lambda ls: [_recortar_visual_anterior(l, 40) for l in ls],
+         lambda ls: [programa.recortar_visual(l, 40) for l in ls]),
+        ("rellenar_visual", lambda ls: [_rellenar_visual_anterior(l, ancho) for l in ls],
+         lambda ls: [programa.rellenar_visual(l, ancho) for l in ls]),
+        ("envolver_texto_display", lambda ls: [_envolver_texto_anterior(l, 40) for l in ls],
+         lambda ls: [programa.envolver_texto_display(l, 40) for l in ls]),
+        ("dividir_por_ancho", lambda ls: [_dividir_por_ancho_anterior(l, 40) for l in ls],
+         lambda ls: [programa.dividir_por_ancho(l, 40) for l in ls]),
+    ]
+    print(f"{'Función':<24} {'Líneas':<9} {'Anterior':>11} {'Motor':>11} {'Mejora':>8}")
+    for nombre, anterior, nueva in casos:
+        for grupo, ls in grupos.items():
+            if anterior(ls) != nueva(ls):
+                print(f"{nombre:<24} {grupo:<9} ¡resultados distintos!")
+                continue
+            t_ant = _mejor_tiempo(lambda: anterior(ls), repeticiones) / len(ls)
+            t_nue = _mejor_tiempo(lambda: nueva(ls), repeticiones) / len(ls)
+            print(f"{nombre:<24} {grupo:<9} {t_ant * 1e6:>9.2f}µs {t_nue * 1e6:>9.2f}µs {t_ant / t_nue:>7.1f}x")
+
+
+def _drenar(descriptor: int, recibidos: List[int]) -> None:
+    while True:
+        try:
+            datos = os.read(descriptor, 1 << 16)
+        except OSError:
+            return
+        if not datos:
+            return
+        recibidos[0] += len(datos)
+
+
+def bench_pantalla(repeticiones: int) -> None:
+    """
+    Repinta menús sobre una pseudo-terminal alternando entre el menú
+    principal y un submenú, como al entrar y volver. Compara el camino
+    anterior (`clear` como subproceso y un print por línea) con el
+    compositor, repintando completo y repintando solo las filas que cambian
+    (también sobre el mismo menú, como tras una opción inválida).
+    """
+    import pty
+
+    md = programa.cargar_documentacion(programa.RUTA_DOC)
+    secciones = programa.parsear_secciones(md)
+    raiz = programa.construir_estructura_menus(secciones)
+    submenu = max((h for h in raiz.hijos if h.tipo == programa.TipoOpcion.SUBMENU),
+                  key=lambda h: len(programa.expandir_submenu(h, secciones)))
+    pantallas = [(raiz.hijos, ["Inicio"]), (submenu.hijos, ["Inicio", submenu.etiqueta])]
+
+    maestro, esclavo = pty.openpty()
+    recibidos = [0]
+    threading.Thread(target=_drenar, args=(maestro, recibidos), daemon=True).start()
+    os.environ.update(LINES="200", COLUMNS="120", TERM=os.environ.get("TERM") or "xterm")
+    terminal = open(esclavo, "w", encoding="utf-8", buffering=1)
+    originales = (programa.escribir, programa.limpiar_pantalla, programa._PANTALLA, sys.stdout)
+    stdout_real = os.dup(1)
+
+    def anterior() -> None:
+        programa.escribir, programa.limpiar_pantalla = print, lambda: os.system("clear")
+
+    def completo() -> None:
+        programa.escribir, programa.limpiar_pantalla = originales[:2]
+        programa._PANTALLA = programa.CompositorPantalla()
+
+    def diferencial() -> None:
+        programa.escribir, programa.limpiar_pantalla = originales[:2]
+
+    resultados = []
+    try:
+        os.dup2(esclavo, 1)
+        sys.stdout = terminal
+        casos = (("anterior", anterior, pantallas), ("compositor, completo", completo, pantallas),
+                 ("compositor, diferencial", diferencial, pantallas),
+                 ("compositor, mismo menú", diferencial, pantallas[:1]))
+        for nombre, preparar, ciclo in casos:
+            programa._PANTALLA = programa.CompositorPantalla()
+            tiempos = []
+            inicio_bytes = recibidos[0]
+            for i in range(repeticiones * len(ciclo)):
+                preparar()
+                opciones, ruta = ciclo[i % len(ciclo)]
+                t0 = time.perf_counter()
+                programa.mostrar_menu(opciones, ruta)
+                programa.volcar_pantalla()
+                tiempos.append(time.perf_counter() - t0)
+            time.sleep(0.3)
+            resultados.append((nombre, sorted(tiempos)[len(tiempos) // 2],
+                               (recibidos[0] - inicio_bytes) / len(tiempos)))
+    finally:
+        sys.stdout.flush()
+        os.dup2(stdout_real, 1)
+        os.close(stdout_real)
+        programa.escribir, programa.limpiar_pantalla, programa._PANTALLA, sys.stdout = originales
+        terminal.close()
+        os.close(maestro)
+
+    print(f"{'Repintado':<26} {'Mediana':>10} {'Bytes/pantalla':>15}")
+    for nombre, mediana, bytes_pantalla in resultados:
+        print(f"{nombre:<26} {mediana * 1000:>8.2f}ms {bytes_pantalla:>15.0f}")
+
+
+def bench_historial(repeticiones: int) -> None:
+    """
+    Va y vuelve entre el menú principal y su submenú más largo, como con
+    [0] y el historial, sobre una pantalla de sesión que solo cuenta bytes.
+    Compara componer cada cuadro de nuevo (LRU vaciada en cada visita) con
+    reusar el cuadro guardado por NavegadorMenus.mostrar_menu_actual.
+    """
+    md = programa.cargar_documentacion(programa.RUTA_DOC)
+    secciones = programa.parsear_secciones(md)
+    raiz = programa.construir_estructura_menus(secciones)
+    submenu = max((h for h in raiz.hijos if h.tipo == programa.TipoOpcion.SUBMENU),
+                  key=lambda h: len(programa.expandir_submenu(h, secciones)))
+    enviados = [0]
+
+    def contar(datos: bytes) -> None:
+        enviados[0] += len(datos)
+
+    ficha = programa._PANTALLA_SESION.set(programa.TerminalSesion(contar, 120, 200))
+    resultados = []
+    try:
+        navegador = programa.NavegadorMenus(raiz, secciones)
+        for nombre, vaciar in (("componiendo", True), ("LRU de pantallas", False)):
+            tiempos = []
+            inicio_bytes = enviados[0]
+            for i in range(repeticiones * 2):
+                if vaciar:
+                    navegador._menus_cambiaron()
+                if i % 2:
+                    navegador.navegar_a_hijo(raiz.hijos.index(submenu))
+                else:
+                    navegador.volver_atras()
+                t0 = time.perf_counter()
+                navegador.mostrar_menu_actual()
+                programa.volcar_pantalla()
+                tiempos.append(time.perf_counter() - t0)
+            resultados.append((nombre, sorted(tiempos)[len(tiempos) // 2],
+                               (enviados[0] - inicio_bytes) / len(tiempos)))
+    finally:
+        programa._PANTALLA_SESION.reset(ficha)
+
+    print(f"{'Visita':<18} {'Mediana':>10} {'Bytes/pantalla':>15}")
+    for nombre, mediana, bytes_pantalla in resultados:
+        print(f"{nombre:<18} {mediana * 1000:>8.3f}ms {bytes_pantalla:>15.0f}")
+
+
+def bench_paginador(tamanos: List[float], repeticiones: int) -> None:
+    """
+    Indexa DOC_COMPLETA de documentos sintéticos (una vez por sección) y
+    mide lo que cuesta cada tecla del paginador: avanzar, saltar al próximo
+    título o resultado e ir a una línea, armando la página visible.
+    """
+    print(f"{'Tamaño':>10} {'Líneas':>10} {'Indexado':>10} {'Avanzar':>9} {'Título':>9} "
+          f"{'Resultado':>10} {'Ir a línea':>11}")
+    for mb in tamanos:
+        md = generar_documento(mb)
+        secciones = programa.parsear_secciones(md)
+        t0 = time.perf_counter()
+        contenido = programa.indexar_contenido(secciones["DOC_COMPLETA"])
+        indexado = time.perf_counter() - t0
+        paginador = programa.Paginador(contenido, 40)
+        mitad = len(contenido.lineas) // 2
+
+        def tecla(mover: Callable[[], object]) -> float:
+            def pulsar() -> None:
+                paginador.ir_a(mitad)
+                mover()
+                paginador.visibles()
+            return _mejor_tiempo(pulsar, repeticiones)
+
+        tiempos = [tecla(paginador.avanzar), tecla(lambda: paginador.siguiente(contenido.titulos)),
+                   tecla(lambda: paginador.siguiente(contenido.resultados)),
+                   tecla(lambda: paginador.ir_a(len(contenido.lineas) - 1))]
+        print(f"{len(md.encode('utf-8')) / 2**20:>8.1f}MB {len(contenido.lineas):>10} {indexado * 1000:>8.0f}ms "
+              + " ".join(f"{t * 1e6:>{w - 2}.1f}µs" for t, w in zip(tiempos, (9, 9, 10, 11))))
+
+
+def bench_disposicion(tamanos: List[float], repeticiones: int) -> None:
+    """
+    Mide las cachés de bloques y de disposición sobre DOC_COMPLETA: la primera
+    apertura (tokenizar y disponer), volver a abrirla con una copia nueva del
+    texto como la entrega el índice de secciones, pasar a un ancho nuevo
+    (solo se disponen los bloques ya tokenizados) y volver a un ancho visto.
+    """
+    print(f"{'Tamaño':>10} {'Bloques':>8} {'Primera apertura':>17} {'Reapertura':>11} "
+          f"{'Otro ancho':>11} {'Ancho ya visto':>15}")
+    originales = (programa._CACHE_BLOQUES, programa._CACHE_LINEAS)
+    try:
+        for mb in tamanos:
+            md = generar_documento(mb)
+            secciones = programa.parsear_secciones(md)
+            programa._CACHE_BLOQUES = programa.CacheAcotada(programa.PRESUPUESTO_CACHE_BLOQUES)
+            programa._CACHE_LINEAS = programa.CacheAcotada(programa.PRESUPUESTO_CACHE_LINEAS)
+            t0 = time.perf_counter()
+            programa.disponer_seccion(secciones["DOC_COMPLETA"], 80)
+            primera = time.perf_counter() - t0
+            reapertura = _mejor_tiempo(lambda: programa.disponer_seccion(secciones["DOC_COMPLETA"], 80), repeticiones)
+            t0 = time.perf_counter()
+            programa.disponer_seccion(secciones["DOC_COMPLETA"], 120)
+            otro = time.perf_counter() - t0
+            visto = _mejor_tiempo(lambda: programa.disponer_seccion(secciones["DOC_COMPLETA"], 80), repeticiones)
+            bloques = len(programa.bloques_seccion(secciones["DOC_COMPLETA"]))
+            print(f"{len(md.encode('utf-8')) / 2**20:>8.1f}MB {bloques:>8} {primera * 1000:>15.1f}ms "
+                  f"{reapertura * 1000:>9.2f}ms {otro * 1000:>9.1f}ms {visto * 1000:>13.2f}ms")
+    finally:
+        programa._CACHE_BLOQUES, programa._CACHE_LINEAS = originales
+
+
+def bench_precarga(tamanos: List[float], presupuesto: float) -> None:
+    """
+    Sobre el menú principal de documentos sintéticos, compara abrir cada
+    sección con las cachés vacías y después de que el hilo de precarga
+    terminó con ese menú (mediana de las aperturas); mide también cuánto
+    tarda el hilo en soltar un pedido cancelado y cuántas secciones entraron
+    en el presupuesto (DOC_COMPLETA queda afuera en documentos grandes).
+    """
+    print(f"{'Tamaño':>10} {'Precarga':>9} {'Abrir en frío':>14} {'Tras precarga':>14} "
+          f"{'Cancelación':>12} {'Precargadas':>12}")
+    originales = (programa._CACHE_BLOQUES, programa._CACHE_LINEAS)
+
+    def vaciar_cachés() -> None:
+        programa._CACHE_BLOQUES = programa.CacheAcotada(programa.PRESUPUESTO_CACHE_BLOQUES)
+        programa._CACHE_LINEAS = programa.CacheAcotada(programa.PRESUPUESTO_CACHE_LINEAS)
+
+    def abrir_todas(opciones: List["programa.OpcionMenu"], secciones: "programa.SeccionesDoc") -> float:
+        """Mediana del tiempo de apertura de las secciones del menú."""
+        tiempos = []
+        for opcion in opciones:
+            if opcion.tipo == programa.TipoOpcion.CONTENIDO and opcion.clave in secciones:
+                contenido = secciones[opcion.clave]
+                t0 = time.perf_counter()
+                programa.disponer_seccion(contenido, 80)
+                tiempos.append(time.perf_counter() - t0)
+        return sorted(tiempos)[len(tiempos) // 2]
+
+    try:
+        for mb in tamanos:
+            md = generar_documento(mb)
+            secciones = programa.parsear_secciones(md)
+            menu = programa.construir_estructura_menus(secciones)
+            hijos = [h for h in menu.hijos if h.tipo == programa.TipoOpcion.CONTENIDO]
+
+            vaciar_cachés()
+            frio = abrir_todas(menu.hijos, secciones)
+
+            vaciar_cachés()
+            precarga = programa.PrecargaSecciones(int(presupuesto * 2**20))
+            precarga.start()
+            t0 = time.perf_counter()
+            precarga.solicitar(secciones, menu.hijos, 80)
+            precarga.esperar()
+            duracion = time.perf_counter() - t0
+            tras = abrir_todas(menu.hijos, secciones)
+            precargadas = precarga.precargadas
+
+            vaciar_cachés()
+            precarga.solicitar(secciones, menu.hijos, 80)
+            time.sleep(0.002)
+            t0 = time.perf_counter()
+            precarga.cancelar()
+            precarga.esperar()
+            cancelacion = time.perf_counter() - t0
+            precarga.detener()
+
+            print(f"{len(md.encode('utf-8')) / 2**20:>8.1f}MB {duracion * 1000:>7.1f}ms "
+                  f"{frio * 1000:>12.2f}ms {tras * 1000:>12.3f}ms {cancelacion * 1000:>10.2f}ms "
+                  f"{precargadas:>7}/{len(hijos):<4}")
+    finally:
+        programa._CACHE_BLOQUES, programa._CACHE_LINEAS = originales
+
+
+# Recorrido de un cliente de sesión: entra a submenús, abre secciones en el
+# paginador, busca y salta a una sección por nombre, y termina en el inicio.
+GUION_SESION = ["6", "1", "0", "0", "7", "1", "0", "0", "B", "churn", "",
+                "G", "resumen", "1", "0", "3", "0", "4", "0", "8", "2", "T", "0", "0"]
+# Finales de los prompts del visor: el menú, el paginador y las búsquedas
+# terminan en ": ", y la pausa en "...".
+_FINES_PROMPT = (b": ", b"...")
+
+
+def _hasta_prompt(conexion: socket.socket) -> int:
+    """Lee hasta el próximo prompt y devuelve los bytes recibidos."""
+    recibidos = b""
+    while not recibidos.endswith(_FINES_PROMPT):
+        datos = conexion.recv(1 << 16)
+        if not datos:
+            raise ConnectionError("la sesión terminó antes del prompt")
+        recibidos += datos
+    return len(recibidos)
+
+
+def _conectar(ruta: str) -> socket.socket:
+    conexion = socket.socket(socket.AF_UNIX)
+    conexion.connect(ruta)
+    _hasta_prompt(conexion)
+    return conexion
+
+
+def _esperar_cierre(servidor: "programa.ServidorSesiones") -> None:
+    """Espera a que el servidor termine de cerrar las sesiones desconectadas."""
+    while servidor.activas:
+        time.sleep(0.01)
+
+
+def bench_sesiones(clientes: List[int], vueltas: int) -> None:
+    """
+    Levanta el servidor de sesiones en este proceso sobre un socket Unix y
+    conecta clientes guionados (GUION_SESION) a la vez. Mide la memoria que
+    retiene cada sesión abierta con tracemalloc (el índice es compartido) y,
+    sin tracemalloc, las acciones por segundo y la latencia de cada acción
+    hasta recibir el prompt siguiente.
+    """
+    md = programa.cargar_documentacion(programa.RUTA_DOC)
+    secciones = programa.parsear_secciones(md)
+    inicial = programa.Instantanea(secciones, programa.construir_estructura_menus(secciones), (0, 0))
+    servidor = programa.ServidorSesiones(inicial, max_sesiones=max(clientes))
+    ruta = os.path.join(tempfile.mkdtemp(), "visor.sock")
+    # El lazo del servidor corre en un hilo daemon hasta que termina el proceso
+    lazo = asyncio.new_event_loop()
+    threading.Thread(target=lazo.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(servidor.servir("unix:" + ruta), lazo)
+    while not os.path.exists(ruta):
+        time.sleep(0.01)
+    # Una sesión de calentamiento completa los submenús diferidos y los índices
+    conexion = _conectar(ruta)
+    for tecla in GUION_SESION:
+        conexion.sendall(tecla.encode("utf-8") + b"\n")
+        _hasta_prompt(conexion)
+    conexion.close()
+    _esperar_cierre(servidor)
+
+    print(f"{'Clientes':>9} {'Memoria/sesión':>15} {'Acciones/s':>11} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for cantidad in clientes:
+        tracemalloc.start()
+        antes = tracemalloc.get_traced_memory()[0]
+        abiertas = [_conectar(ruta) for _ in range(cantidad)]
+        por_sesion = (tracemalloc.get_traced_memory()[0] - antes) / cantidad
+        tracemalloc.stop()
+        for conexion in abiertas:
+            conexion.close()
+        _esperar_cierre(servidor)
+
+        latencias: List[float] = []
+
+        def cliente() -> None:
+            conexion = _conectar(ruta)
+            propias = []
+            for _ in range(vueltas):
+                for tecla in GUION_SESION:
+                    t0 = time.perf_counter()
+                    conexion.sendall(tecla.encode("utf-8") + b"\n")
+                    _hasta_prompt(conexion)
+                    propias.append(time.perf_counter() - t0)
+            conexion.close()
+            latencias.extend(propias)
+
+        hilos = [threading.Thread(target=cliente) for _ in range(cantidad)]
+        t0 = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        total = time.perf_counter() - t0
+        latencias.sort()
+        p50, p95, p99 = (latencias[int(q * (len(latencias) - 1))] * 1000 for q in (0.5, 0.95, 0.99))
+        print(f"{cantidad:>9} {por_sesion / 1024:>12.1f}KiB {len(latencias) / total:>11.0f} "
+              f"{p50:>7.2f}ms {p95:>7.2f}ms {p99:>7.2f}ms")
+    _esperar_cierre(servidor)
+
+
+# Tipo de acción según el prompt en que se ingresó la tecla (se prueba en orden:
+# los prompts de resultados también mencionan ENTER)
+_PROMPTS_ACCION = (("Seleccioná una opción", "menú"), ("Comando", "paginador"),
+                   ("Buscar", "búsqueda"), ("Ir a", "ir a"), ("Resultado a abrir", "resultado"),
+                   ("Número para abrir", "resultado"), ("ENTER", "pausa"))
+# Teclas del menú que generan las sesiones al azar, con su peso relativo
+_TECLAS_MENU = (("hijo", 55), ("0", 15), ("<", 6), (">", 4), ("B", 6), ("G", 6), ("R", 4))
+_TECLAS_PAGINADOR = ("", "", "A", "T", "O", "L 1", "0", "0")
+# Exponente de crecimiento de la latencia (p50) con el tamaño del documento
+# tolerado por tipo de acción; el resto no debería depender del tamaño. La
+# recarga relee el archivo y lo compara con la versión anterior (lineal, pero
+# solo vuelve a tokenizar el tramo editado), y las búsquedas recorren listas
+# que crecen con las secciones (texto completo) o con los encabezados (ir a).
+EXPONENTES_ESPERADOS = {"recarga": 1.1, "búsqueda": 1.2, "ir a": 0.6}
+
+
+def _tipo_accion(mensaje: str, tecla: str) -> str:
+    tipo = next((tipo for fragmento, tipo in _PROMPTS_ACCION if fragmento in mensaje), "otro")
+    if tipo == "menú" and tecla.upper() == "R":
+        return "recarga"
+    return tipo
+
+
+class TerminalGuionada(programa.TerminalSesion):
+    """
+    Pantalla sin terminal que responde cada prompt del visor con la próxima
+    tecla de un guion grabado o, sin guion, con una tecla al azar válida
+    para el estado del navegador. Solo cuenta los bytes que recibiría la
+    terminal. La latencia de cada acción va desde que se entrega la tecla
+    hasta que el visor pide la siguiente; al agotarse las teclas la entrada
+    se cierra y el navegador termina como con stdin cerrado.
+    """
+
+    def __init__(self, acciones: int, guion: Optional[List[str]] = None, semilla: int = 0):
+        super().__init__(self._contar)
+        self.navegador: Optional[programa.NavegadorMenus] = None
+        self.bytes = 0
+        self.latencias: Dict[str, List[float]] = {}
+        self.guionada = guion is not None
+        self._restantes = len(guion) if self.guionada else acciones
+        self._guion = iter(guion or ())
+        self._azar = random.Random(semilla)
+        self._pendiente: Optional[Tuple[str, float]] = None
+
+    def _contar(self, datos: bytes) -> None:
+        self.bytes += len(datos)
+
+    def _pedir(self, mensaje: str) -> str:
+        ahora = time.perf_counter()
+        if self._pendiente:
+            tipo, inicio = self._pendiente
+            self.latencias.setdefault(tipo, []).append(ahora - inicio)
+            self._pendiente = None
+        if self._restantes <= 0:
+            raise EOFError
+        self._restantes -= 1
+        tecla = next(self._guion) if self.guionada else self._al_azar(mensaje)
+        self._pendiente = (_tipo_accion(mensaje, tecla), time.perf_counter())
+        return tecla
+
+    def _al_azar(self, mensaje: str) -> str:
+        tipo = _tipo_accion(mensaje, "")
+        azar = self._azar
+        if tipo == "menú":
+            tecla = azar.choices([t for t, _ in _TECLAS_MENU], [p for _, p in _TECLAS_MENU])[0]
+            if tecla != "hijo":
+                return tecla
+            # DOC_COMPLETA dispone el documento entero: crece con el tamaño por diseño
+            hijos = [i for i, hijo in enumerate(self.navegador.obtener_menu_actual().hijos, 1)
+                     if hijo.clave != "DOC_COMPLETA"]
+            return str(azar.choice(hijos)) if hijos else "0"
+        if tipo == "paginador":
+            return azar.choice(_TECLAS_PAGINADOR)
+        if tipo in ("búsqueda", "ir a"):
+            return azar.choice(CONSULTAS_BUSQUEDA + CONSULTAS_TITULOS)
+        if tipo == "resultado":
+            return azar.choice(("1", "2", ""))
+        return ""
+
+
+def repetir_sesion(secciones: "programa.SeccionesDoc", menu_raiz: "programa.OpcionMenu",
+                   terminal: TerminalGuionada) -> float:
+    """Corre un navegador completo sobre la terminal guionada y devuelve los segundos que tardó."""
+    buscador, titulos = programa.IndiceBusqueda(), programa.IndiceTitulos()
+    # Los índices se arman antes, como hace el hilo de indexado mientras se lee el primer menú
+    buscador.sincronizar(secciones)
+    buscador.precalentar()
+    titulos.sincronizar(secciones)
+    navegador = programa.NavegadorMenus(menu_raiz, secciones, buscador=buscador, titulos=titulos)
+    terminal.navegador = navegador
+    ficha = programa._PANTALLA_SESION.set(terminal)
+    try:
+        t0 = time.perf_counter()
+        navegador.ejecutar()
+        return time.perf_counter() - t0
+    finally:
+        programa._PANTALLA_SESION.reset(ficha)
+
+
+def bench_repeticion(tamanos: List[float], acciones: int, guion: Optional[List[str]],
+                     semilla: int, max_exponente: float) -> int:
+    """
+    Repite la misma sesión (grabada o al azar con semilla fija) sobre
+    documentos sintéticos de tamaño creciente, con la salida descartada.
+    Informa acciones por segundo y percentiles de latencia por acción y, por
+    tipo de acción, cuánto crece la mediana con el tamaño: exponente de la
+    potencia entre el documento más chico y el más grande (0: no depende
+    del tamaño, 1: lineal). Devuelve 1 si algún tipo supera el exponente
+    tolerado, para usarlo como control de regresiones en CI.
+    """
+    originales = (programa.RUTA_DOC, programa._CACHE_BLOQUES, programa._CACHE_LINEAS)
+    directorio = tempfile.mkdtemp()
+    medianas: Dict[str, Dict[float, float]] = {}
+    megas: List[float] = []
+    print(f"{'Tamaño':>10} {'Acciones':>9} {'Acciones/s':>11} {'p50':>9} {'p95':>9} {'p99':>9} {'Bytes/acción':>13}")
+    try:
+        # La recarga [R] relee el documento del disco
+        programa.RUTA_DOC = os.path.join(directorio, "DOCUMENTACION.md")
+        # La primera vuelta solo calienta (tablas de anchos, submenús diferidos)
+        for vuelta, mb in enumerate([tamanos[0]] + tamanos):
+            md = generar_documento(mb, programa.cargar_documentacion(originales[0]))
+            with open(programa.RUTA_DOC, "w", encoding="utf-8") as f:
+                f.write(md)
+            programa._CACHE_BLOQUES = programa.CacheAcotada(programa.PRESUPUESTO_CACHE_BLOQUES)
+            programa._CACHE_LINEAS = programa.CacheAcotada(programa.PRESUPUESTO_CACHE_LINEAS)
+            secciones = programa.parsear_secciones(md)
+            terminal = TerminalGuionada(acciones, guion, semilla)
+            total = repetir_sesion(secciones, programa.construir_estructura_menus(secciones), terminal)
+            if not vuelta:
+                continue
+
+            tamano = len(md.encode("utf-8")) / 2**20
+            megas.append(tamano)
+            todas = sorted(chain.from_iterable(terminal.latencias.values()))
+            p50, p95, p99 = (todas[int(q * (len(todas) - 1))] * 1000 for q in (0.5, 0.95, 0.99))
+            print(f"{tamano:>8.1f}MB {len(todas):>9} {len(todas) / total:>11.0f} "
+                  f"{p50:>7.3f}ms {p95:>7.3f}ms {p99:>7.3f}ms {terminal.bytes / len(todas):>13.0f}")
+            for tipo, latencias in terminal.latencias.items():
+                latencias.sort()
+                medianas.setdefault(tipo, {})[tamano] = latencias[len(latencias) // 2]
+    finally:
+        if os.path.exists(programa.RUTA_DOC):
+            os.remove(programa.RUTA_DOC)
+        os.rmdir(directorio)
+        programa.RUTA_DOC, programa._CACHE_BLOQUES, programa._CACHE_LINEAS = originales
+
+    if len(megas) < 2:
+        return 0
+    chico, grande = megas[0], megas[-1]
+    regresiones = 0
+    print(f"\n{'Acción':<12} {'p50 ' + format(chico, '.0f') + 'MB':>11} {'p50 ' + format(grande, '.0f') + 'MB':>11} "
+          f"{'Exponente':>10} {'Tolerado':>9}")
+    for tipo, por_tamano in sorted(medianas.items()):
+        if chico not in por_tamano or grande not in por_tamano:
+            continue
+        exponente = math.log(por_tamano[grande] / por_tamano[chico]) / math.log(grande / chico)
+        tolerado = EXPONENTES_ESPERADOS.get(tipo, max_exponente)
+        excedido = exponente > tolerado
+        regresiones += excedido
+        print(f"{tipo:<12} {por_tamano[chico] * 1000:>9.3f}ms {por_tamano[grande] * 1000:>9.3f}ms "
+              f"{exponente:>10.2f} {tolerado:>9.2f}{'  ✗ REGRESIÓN' if excedido else ''}")
+    return 1 if regresiones else 0
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del visor de documentación")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_parseo = sub.add_parser("parseo", help="Escalado de parsear_secciones")
+    p_parseo.add_argument("--tamanos", type=float, nargs="+", default=[1, 2, 4, 8, 16],
+                          help="Tamaños de documento en MB")
+    p_parseo.add_argument("--repeticiones", type=int, default=3)
+
+    p_memoria = sub.add_parser("memoria", help="Memoria retenida por el índice de secciones")
+    p_memoria.add_argument("--tamanos", type=float, nargs="+", default=[1, 4, 16],
+                           help="Tamaños de documento en MB")
+
+    p_recarga = sub.add_parser("recarga", help="Recarga incremental frente a parseo completo")
+    p_recarga.add_argument("--tamanos", type=float, nargs="+", default=[1, 4, 16],
+                           help="Tamaños de documento en MB")
+    p_recarga.add_argument("--repeticiones", type=int, default=3)
+
+    p_apertura = sub.add_parser("apertura", help="Apertura en modo texto frente a --mmap")
+    p_apertura.add_argument("--tamanos", type=float, nargs="+", default=[16, 64, 256],
+                            help="Tamaños de documento en MB")
+
+    p_busqueda = sub.add_parser("busqueda", help="Índice invertido y consultas BM25")
+    p_busqueda.add_argument("--tamanos", type=float, nargs="+", default=[1, 16, 100],
+                            help="Tamaños de documento en MB")
+    p_busqueda.add_argument("--repeticiones", type=int, default=5)
+
+    p_titulos = sub.add_parser("titulos", help="Índice de trigramas para saltar a una sección")
+    p_titulos.add_argument("--tamanos", type=float, nargs="+", default=[8, 32, 100],
+                           help="Tamaños de documento en MB")
+    p_titulos.add_argument("--repeticiones", type=int, default=20)
+
+    p_menus = sub.add_parser("menus", help="Construcción del árbol de menús")
+    p_menus.add_argument("--tamanos", type=float, nargs="+", default=[1, 16, 100],
+                         help="Tamaños de documento en MB")
+    p_menus.add_argument("--repeticiones", type=int, default=5)
+
+    p_anchos = sub.add_parser("anchos", help="Motor de anchos frente a las funciones anteriores")
+    p_anchos.add_argument("--repeticiones", type=int, default=5)
+
+    p_pantalla = sub.add_parser("pantalla", help="Repintado de menús: clear y print frente al compositor")
+    p_pantalla.add_argument("--repeticiones", type=int, default=20)
+
+    p_historial = sub.add_parser("historial", help="Revisitar menús: componer frente a la LRU de pantallas")
+    p_historial.add_argument("--repeticiones", type=int, default=200)
+
+    p_paginador = sub.add_parser("paginador", help="Indexado de una sección y costo por tecla del paginador")
+    p_paginador.add_argument("--tamanos", type=float, nargs="+", default=[1, 4, 16],
+                             help="Tamaños de documento en MB")
+    p_paginador.add_argument("--repeticiones", type=int, default=50)
+
+    p_disposicion = sub.add_parser("disposicion", help="Cachés de bloques y de secciones dispuestas por ancho")
+    p_disposicion.add_argument("--tamanos", type=float, nargs="+", default=[1, 4, 16],
+                               help="Tamaños de documento en MB")
+    p_disposicion.add_argument("--repeticiones", type=int, default=5)
+
+    p_sesiones = sub.add_parser("sesiones", help="Servidor de sesiones con clientes guionados simultáneos")
+    p_sesiones.add_argument("--clientes", type=int, nargs="+", default=[1, 8, 32],
+                            help="Cantidad de sesiones simultáneas")
+    p_sesiones.add_argument("--vueltas", type=int, default=5,
+                            help="Veces que cada cliente recorre el guion")
+
+    p_precarga = sub.add_parser("precarga", help="Precarga en segundo plano de las secciones del menú actual")
+    p_precarga.add_argument("--tamanos", type=float, nargs="+", default=[1, 4, 16],
+                            help="Tamaños de documento en MB")
+    p_precarga.add_argument("--presupuesto", type=float, default=programa.PRESUPUESTO_PRECARGA / 2**20,
+                            help="Memoria de la precarga en MB")
+
+    p_repeticion = sub.add_parser("repeticion", help="Sesión grabada o al azar sin terminal; "
+                                                     "falla si la latencia crece con el tamaño")
+    p_repeticion.add_argument("--tamanos", type=float, nargs="+", default=[1, 4, 16],
+                              help="Tamaños de documento en MB")
+    p_repeticion.add_argument("--acciones", type=int, default=2000,
+                              help="Teclas de la sesión al azar")
+    p_repeticion.add_argument("--guion", help="Archivo con una tecla por línea (línea vacía: ENTER)")
+    p_repeticion.add_argument("--semilla", type=int, default=0)
+    p_repeticion.add_argument("--max-exponente", type=float, default=0.3,
+                              help="Crecimiento tolerado de la mediana con el tamaño para las acciones "
+                                   "que no deberían depender de él (0: constante, 1: lineal)")
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(programa.RUTA_DOC):
+        print(f"No se encontró {programa.RUTA_DOC}")
+        return 1
+
+    if args.comando == "parseo":
+        bench_parseo(args.tamanos, args.repeticiones)
+    elif args.comando == "memoria":
+        bench_memoria(args.tamanos)
+    elif args.comando == "recarga":
+        bench_recarga(args.tamanos, args.repeticiones)
+    elif args.comando == "apertura":
+        bench_apertura(args.tamanos)
+    elif args.comando == "busqueda":
+        bench_busqueda(args.tamanos, args.repeticiones)
+    elif args.comando == "titulos":
+        bench_titulos(args.tamanos, args.repeticiones)
+    elif args.comando == "menus":
+        bench_menus(args.tamanos, args.repeticiones)
+    elif args.comando == "anchos":
+        bench_anchos(args.repeticiones)
+    elif args.comando == "pantalla":
+        bench_pantalla(args.repeticiones)
+    elif args.comando == "historial":
+        bench_historial(args.repeticiones)
+    elif args.comando == "paginador":
+        bench_paginador(args.tamanos, args.repeticiones)
+    elif args.comando == "disposicion":
+        bench_disposicion(args.tamanos, args.repeticiones)
+    elif args.comando == "sesiones":
+        bench_sesiones(args.clientes, args.vueltas)
+    elif args.comando == "precarga":
+        bench_precarga(args.tamanos, args.presupuesto)
+    elif args.comando == "repeticion":
+        guion = None
+        if args.guion:
+            with open(args.guion, encoding="utf-8") as f:
+                guion = f.read().splitlines()
+        return bench_repeticion(args.tamanos, args.acciones, guion, args.semilla, args.max_exponente)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))